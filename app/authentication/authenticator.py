@@ -11,9 +11,10 @@ from structlog import get_logger
 from app.authentication.no_token_exception import NoTokenException
 from app.authentication.user import User
 from app.data_model.session_data import SessionData
-from app.globals import get_questionnaire_store, get_session_store, create_session_store
+from app.globals import get_questionnaire_store, get_session_store, create_session_store, store_user_id_in_cookie
+from app.instrumentation import increment
 from app.keys import KEY_PURPOSE_AUTHENTICATION
-from app.settings import EQ_SESSION_ID, USER_IK
+from app.settings import EQ_SESSION_ID, ENCRYPTED_USER_ID, USER_IK
 
 logger = get_logger()
 
@@ -39,17 +40,29 @@ def when_user_logged_out(sender_app, user):  # pylint: disable=unused-argument
     if session_store:
         session_store.delete()
     cookie_session.pop(USER_IK, None)
+    cookie_session.pop(ENCRYPTED_USER_ID, None)
 
 
 def _extend_session_expiry(session_store):
     """
-    Extends the expiration time of the session
+    Extends the expiration time of the session. The extended expiration time is only saved
+    once less than EQ_SESSION_EXTENSION_THRESHOLD_PERCENTAGE of the session timeout remains
+    before the saved expiration time
     :param session_store:
     """
     session_timeout = cookie_session.get('expires_in')
     if session_timeout:
-        session_store.expiration_time = datetime.now(tz=tzutc()) + timedelta(seconds=session_timeout)
-        session_store.save()
+        now = datetime.now(tz=tzutc())
+        saved_expiration_time = session_store.expiration_time
+        session_store.expiration_time = now + timedelta(seconds=session_timeout)
+
+        threshold = current_app.config['EQ_SESSION_EXTENSION_THRESHOLD_PERCENTAGE']
+        if saved_expiration_time and saved_expiration_time - now >= timedelta(seconds=session_timeout * threshold / 100):
+            increment('session_expiry_extension_skipped')
+            return
+
+        session_store.save(defer=True)
+        increment('session_expiry_extension_saved')
 
         logger.debug('session expiry extended')
 
@@ -92,6 +105,7 @@ def load_user():
     logger.info('session does not exist')
 
     cookie_session.pop(USER_IK, None)
+    cookie_session.pop(ENCRYPTED_USER_ID, None)
     return None
 
 
@@ -137,6 +151,7 @@ def store_session(metadata):
     # store the user ik and es_session_id in the cookie
     cookie_session[USER_IK] = user_ik
     cookie_session[EQ_SESSION_ID] = eq_session_id
+    store_user_id_in_cookie(user_id)
 
     session_data = _create_session_data_from_metadata(metadata)
     create_session_store(eq_session_id, user_id, user_ik, session_data)
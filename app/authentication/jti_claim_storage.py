@@ -5,7 +5,7 @@ from dateutil.tz import tzutc
 from structlog import get_logger
 
 from app.data_model.app_models import UsedJtiClaim
-from app.storage import data_access
+from app.storage import data_access, executor
 from app.storage.data_access import ItemAlreadyExistsError
 
 logger = get_logger()
@@ -38,20 +38,37 @@ def use_jti_claim(jti_claim, expires):
     :raises TypeError: when jti_claim is not a valid uuid4.
     :raises JtiTokenUsed: when jti_claim has already been used.
     """
+    jti = _get_used_jti_claim(jti_claim, expires)
+
+    try:
+        data_access.put(jti, overwrite=False)
+    except ItemAlreadyExistsError as e:
+        logger.error('jti claim has already been used', jti_claim=jti_claim)
+        raise JtiTokenUsed(jti_claim) from e
+
+
+def use_jti_claim_async(jti_claim, expires):
+    """
+    Use a jti claim without waiting for it to be stored
+    :param jti_claim: jti claim to mark as used.
+    :param expires: when the jti claim expires.
+    :return: a future whose result raises JtiTokenUsed when jti_claim has already been used.
+    :raises ValueError: when jti_claim is None.
+    :raises TypeError: when jti_claim is not a valid uuid4.
+    """
+    _get_used_jti_claim(jti_claim, expires)
+    return executor.submit(use_jti_claim, jti_claim, expires)
+
+
+def _get_used_jti_claim(jti_claim, expires):
     if jti_claim is None:
         raise ValueError
     if not _is_valid(jti_claim):
         logger.info('jti claim is invalid', jti_claim=jti_claim)
         raise TypeError
 
-    try:
-        used_at = datetime.now(tz=tzutc())
-        # Make claim expire a little later than exp to avoid race conditions with out of sync clocks.
-        expires += timedelta(seconds=60)
+    used_at = datetime.now(tz=tzutc())
+    # Make claim expire a little later than exp to avoid race conditions with out of sync clocks.
+    expires += timedelta(seconds=60)
 
-        jti = UsedJtiClaim(jti_claim, used_at, expires)
-
-        data_access.put(jti, overwrite=False)
-    except ItemAlreadyExistsError as e:
-        logger.error('jti claim has already been used', jti_claim=jti_claim)
-        raise JtiTokenUsed(jti_claim) from e
+    return UsedJtiClaim(jti_claim, used_at, expires)
@@ -1,3 +1,5 @@
+from collections.abc import Mapping
+
 from structlog import get_logger
 
 logger = get_logger()
@@ -42,3 +44,91 @@ class Answer:
             answer_dict.get('group_instance', 0),
             answer_dict.get('answer_instance', 0),
         ))
+
+
+class AnswerRecord(Mapping):
+    """
+    Compact record of an answer held by the AnswerStore.
+
+    Records are read like the answer dicts the store previously held, e.g. `answer['value']` or
+    `answer.get('group_instance_id')`, and serialise to the same layout as `vars(Answer)`, but use
+    `__slots__` rather than a dict per answer.
+    """
+    __slots__ = ('answer_id', 'group_instance_id', 'group_instance', 'answer_instance', 'value')
+
+    FIELDS = frozenset(__slots__)
+
+    def __init__(self, answer_id, value, group_instance_id=None, group_instance=0, answer_instance=0):
+        self.answer_id = answer_id
+        self.group_instance_id = group_instance_id
+        self.group_instance = group_instance
+        self.answer_instance = answer_instance
+        self.value = value
+
+    @classmethod
+    def from_dict(cls, answer_dict):
+        return cls(
+            answer_dict['answer_id'],
+            answer_dict.get('value'),
+            answer_dict.get('group_instance_id'),
+            answer_dict.get('group_instance', 0),
+            answer_dict.get('answer_instance', 0),
+        )
+
+    @classmethod
+    def from_answer(cls, answer):
+        return cls(answer.answer_id, answer.value, answer.group_instance_id, answer.group_instance, answer.answer_instance)
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        if isinstance(other, AnswerRecord):
+            return self._as_tuple() == other._as_tuple()  # pylint: disable=protected-access
+
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+
+        return NotImplemented
+
+    def __repr__(self):
+        return '<AnswerRecord {}>'.format(self.to_dict())
+
+    def get(self, key, default=None):
+        if key not in self.FIELDS:
+            return default
+
+        return getattr(self, key)
+
+    def copy(self):
+        return self.__class__(self.answer_id, self.value, self.group_instance_id, self.group_instance, self.answer_instance)
+
+    def to_dict(self):
+        return {
+            'answer_id': self.answer_id,
+            'group_instance_id': self.group_instance_id,
+            'group_instance': self.group_instance,
+            'answer_instance': self.answer_instance,
+            'value': self.value,
+        }
+
+    def _as_tuple(self):
+        return self.answer_id, self.group_instance_id, self.group_instance, self.answer_instance, self.value
+
+    # Allows simplejson, and so `jsonify`, to serialise records as objects
+    _asdict = to_dict
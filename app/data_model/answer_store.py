@@ -4,9 +4,8 @@ from collections import defaultdict
 from datetime import datetime
 from jinja2 import escape
 from structlog import get_logger
-import simplejson as json
 
-from app.data_model.answer import Answer
+from app.data_model.answer import Answer, AnswerRecord
 
 logger = get_logger()
 
@@ -19,11 +18,22 @@ class AnswerStore:
 
     EQ_MAX_NUM_REPEATS = 25
 
+    # Answer attributes which are indexed in addition to `answer_id`, most selective first
+    INDEXED_KEYS = ('group_instance_id', 'group_instance', 'answer_instance')
+
     def __init__(self, existing_answers=None):
         if isinstance(existing_answers, list):
-            self.answer_map = self._build_map(existing_answers or [])
+            self.answer_map = self._build_map(existing_answers)
+        elif existing_answers:
+            self.answer_map = self._build_map(itertools.chain.from_iterable(existing_answers.values()))
         else:
-            self.answer_map = existing_answers or defaultdict(list)
+            self.answer_map = defaultdict(list)
+
+        # Incremented by every mutation that changes the answers held, see `get_hash`
+        self.version = 0
+        # The answer_id changed by each increment of `version`, or None if any answer may have changed
+        self._changed_answer_ids = []
+        self._reset_indexes()
 
     def __iter__(self):
         return iter((answer for answers in self.answer_map.values() for answer in answers))
@@ -32,6 +42,9 @@ class AnswerStore:
         return sum(len(answers) for answers in self.answer_map.values())
 
     def __eq__(self, other):
+        if not isinstance(other, AnswerStore):
+            return NotImplemented
+
         return self.answer_map == other.answer_map
 
     @staticmethod
@@ -39,7 +52,9 @@ class AnswerStore:
         answer_map = defaultdict(list)
 
         for answer in answers:
-            answer_map[answer['answer_id']].append(answer)
+            if not isinstance(answer, AnswerRecord):
+                answer = AnswerRecord.from_dict(answer)
+            answer_map[answer.answer_id].append(answer)
 
         return answer_map
 
@@ -48,11 +63,86 @@ class AnswerStore:
         if not isinstance(answer, Answer):
             raise TypeError('Method only supports Answer argument type')
 
+    @staticmethod
+    def _get_key(answer):
+        """
+        The key that uniquely identifies an `Answer` or `AnswerRecord`, see `Answer.matches`
+        """
+        return answer.answer_id, answer.group_instance_id, answer.group_instance, answer.answer_instance
+
+    def _reset_indexes(self):
+        """
+        Drop the lookup indexes, they are rebuilt from `answer_map` when next needed.
+        """
+        self._answers_by_key = None
+        self._indexes = None
+
+    def _ensure_indexes(self):
+        """
+        Build the lookup indexes over the answers in `answer_map`, if not already built.
+
+        `_answers_by_key` maps the key of each answer to the answer itself, and `_indexes` holds,
+        for each of `INDEXED_KEYS`, a mapping of value -> answer_id -> answers with that value.
+        """
+        if self._indexes is not None:
+            return
+
+        self._answers_by_key = {}
+        self._indexes = {key: {} for key in self.INDEXED_KEYS}
+
+        for answer in self:
+            self._index_answer(answer)
+
+    def _index_answer(self, answer):
+        if self._indexes is None:
+            return
+
+        self._answers_by_key.setdefault(self._get_key(answer), answer)
+
+        for key, index in self._indexes.items():
+            index.setdefault(getattr(answer, key), {}).setdefault(answer.answer_id, []).append(answer)
+
+    def _unindex_answer(self, answer):
+        if self._indexes is None:
+            return
+
+        answer_key = self._get_key(answer)
+
+        if self._answers_by_key.get(answer_key) is answer:
+            del self._answers_by_key[answer_key]
+
+            # Legacy data may hold more than one answer with the same key
+            duplicate = next((existing for existing in self.answer_map.get(answer.answer_id, [])
+                              if existing is not answer and self._get_key(existing) == answer_key), None)
+            if duplicate is not None:
+                self._answers_by_key[answer_key] = duplicate
+
+        for key, index in self._indexes.items():
+            answers_by_id = index[getattr(answer, key)]
+            _remove_identical(answers_by_id[answer.answer_id], answer)
+
+            if not answers_by_id[answer.answer_id]:
+                del answers_by_id[answer.answer_id]
+            if not answers_by_id:
+                del index[getattr(answer, key)]
+
+    def _remove_stored_answer(self, answer):
+        """
+        Remove an answer held by this store, matched by identity rather than equality.
+        """
+        _remove_identical(self.answer_map[answer.answer_id], answer)
+        self._unindex_answer(answer)
+        self._record_change(answer.answer_id)
+
+    def _record_change(self, answer_id):
+        self._changed_answer_ids.append(answer_id)
+        self.version += 1
+
     def copy(self):
         """
         Create a new instance of answer_store with the same values.
         """
-        return self.__class__(self.answer_map.copy())
+        return self.__class__(list(self))
 
     def add_or_update(self, answer):
         """
@@ -61,13 +151,17 @@ class AnswerStore:
         :param answer: An answer object.
         """
         self._validate(answer)
-        position = self.find(answer)
-
-        if position is None:
-            answer_to_add = vars(answer).copy()
-            self.answer_map[answer_to_add['answer_id']].append(answer_to_add)
-        else:
-            self.answer_map[answer.answer_id][position]['value'] = answer.value
+        self._ensure_indexes()
+        existing = self._answers_by_key.get(self._get_key(answer))
+
+        if existing is None:
+            answer_to_add = AnswerRecord.from_answer(answer)
+            self.answer_map[answer_to_add.answer_id].append(answer_to_add)
+            self._index_answer(answer_to_add)
+            self._record_change(answer_to_add.answer_id)
+        elif existing.value != answer.value:
+            existing.value = answer.value
+            self._record_change(existing.answer_id)
 
     def find(self, answer):
         """
@@ -77,11 +171,11 @@ class AnswerStore:
         :return: The position the answer exists at, None if it doesn't exist
         """
         self._validate(answer)
+        self._ensure_indexes()
+        existing = self._answers_by_key.get(self._get_key(answer))
 
-        if answer.answer_id in self.answer_map:
-            for index, existing in enumerate(self.answer_map[answer.answer_id]):
-                if answer.matches_dict(existing):
-                    return index
+        if existing is not None:
+            return next(index for index, stored in enumerate(self.answer_map[answer.answer_id]) if stored is existing)
 
         return None
 
@@ -102,7 +196,15 @@ class AnswerStore:
 
         :return: Return a list of answer values
         """
-        return [answer['value'] for answer in self]
+        return [answer.value for answer in self]
+
+    def first(self):
+        """
+        Return the first answer in the answer store.
+
+        :return: The first answer, or None if there are no answers
+        """
+        return next(iter(self), None)
 
     def escaped(self):
         """
@@ -110,58 +212,68 @@ class AnswerStore:
 
         :return: Return a new AnswerStore object with escaped answers for chaining
         """
-        escaped = []
-        for answer in self:
-            answer = answer.copy()
-            if isinstance(answer['value'], str):
-                answer['value'] = escape(answer['value'])
-            escaped.append(answer)
-        return self.__class__(existing_answers=escaped)
+        return self.__class__(existing_answers=_escape_answers(self))
 
     def filter(self, answer_ids=None, group_instance=None, group_instance_id=None, answer_instance=None, limit=None):
         """
         Find all answers in the answer store for a given set of filter parameter matches.
-        If no filter parameters are passed it returns a copy of the instance.
+        If no filter parameters are passed it returns a view of all answers.
 
         :param answer_ids: The answer ids to filter results by
         :param answer_instance: The answer instance to filter results by
         :param group_instance_id: The group instance ID to filter results by
         :param group_instance: The group instance to filter results by
         :param limit: True | False Limit the number of answers returned
-        :return: Return a new AnswerStore object with filtered answers for chaining
+        :return: Return an AnswerStoreView over the filtered answers for chaining
         """
-        filtered = []
+        return AnswerStoreView(self, [{
+            'answer_ids': answer_ids,
+            'group_instance': group_instance,
+            'group_instance_id': group_instance_id,
+            'answer_instance': answer_instance,
+            'limit': limit,
+        }])
 
+    def _iter_filtered(self, answer_ids=None, group_instance=None, group_instance_id=None, answer_instance=None, limit=None):
+        """
+        Generate the answers matching the filter parameters, see `filter`, using the indexes where possible.
+        """
         filter_vars = {
-            'answer_id': answer_ids,
-            'answer_instance': answer_instance,
             'group_instance_id': group_instance_id,
             'group_instance': group_instance,
+            'answer_instance': answer_instance,
         }
+        filter_vars = {key: value for key, value in filter_vars.items() if value is not None}
+
+        if answer_ids is not None and not answer_ids:
+            return
+
+        index_key = next((key for key in self.INDEXED_KEYS
+                          if key in filter_vars and not isinstance(filter_vars[key], list)), None)
+
+        if index_key:
+            self._ensure_indexes()
+            answers_by_id = self._indexes[index_key].get(filter_vars.pop(index_key), {})
+        else:
+            answers_by_id = self.answer_map
 
         if answer_ids:
-            answers = itertools.chain.from_iterable(self.answer_map.get(answer_id, []) for answer_id in answer_ids)
+            answers = itertools.chain.from_iterable(answers_by_id.get(answer_id, []) for answer_id in answer_ids)
         else:
-            answers = self
+            # Iterate in `answer_map` order, so results are ordered the same whichever index is used
+            answers = itertools.chain.from_iterable(answers_by_id.get(answer_id, []) for answer_id in self.answer_map)
 
-        for answer in answers:
-            matches = all(
-                answer[key] in value if isinstance(value, list) else answer[key] == value
-                for key, value in filter_vars.items()
-                if value is not None
-            )
-            if matches:
-                filtered.append(answer)
-                if limit and len(filtered) == self.EQ_MAX_NUM_REPEATS:
-                    break
-
-        return self.__class__(existing_answers=filtered)
+        yield from _filter_answers(answers, limit=limit, **filter_vars)
 
     def clear(self):
         """
         Clears answers *in place*
         """
+        if self.answer_map:
+            self._record_change(None)
+
         self.answer_map.clear()
+        self._reset_indexes()
 
     def remove(self, answer_ids=None, group_instance=None, answer_instance=None):
         """
@@ -171,8 +283,8 @@ class AnswerStore:
         :param answer_instance: The answer instance to filter results to remove
         :param group_instance: The group instance to filter results to remove
         """
-        for answer in self.filter(answer_ids, group_instance=group_instance, answer_instance=answer_instance):
-            self.answer_map[answer['answer_id']].remove(answer)
+        for answer in list(self.filter(answer_ids, group_instance=group_instance, answer_instance=answer_instance)):
+            self._remove_stored_answer(answer)
 
     def remove_answer(self, answer):
         """
@@ -180,17 +292,52 @@ class AnswerStore:
 
         :param answer: The answer ids to filter results to remove
         """
+        stored_answer = next((stored for stored in self.answer_map[answer['answer_id']] if stored == answer), None)
+
+        if stored_answer is not None:
+            self._remove_stored_answer(stored_answer)
+
+    def replace_answers(self, answer_id, answers):
+        """
+        Replaces all the answers with `answer_id` *in place*, as when applying a saved change.
 
-        if answer in self.answer_map[answer['answer_id']]:
-            self.answer_map[answer['answer_id']].remove(answer)
+        :param answer_id: The answer id of the answers to replace
+        :param answers: The answers, or dicts of answers, to replace them with, which all have `answer_id`
+        """
+        answer_records = [answer if isinstance(answer, AnswerRecord) else AnswerRecord.from_dict(answer)
+                          for answer in answers]
+
+        if answer_records:
+            self.answer_map[answer_id] = answer_records
+        else:
+            self.answer_map.pop(answer_id, None)
+
+        self._reset_indexes()
+        self._record_change(answer_id)
 
     def get_hash(self):
         """
-        Gets unique hash from answers contained within this AnswerStore
+        Gets a value which changes whenever the answers contained within this AnswerStore change.
+        Updating an answer to the value it already has does not change it.
+
+        :return: Return the current version of the answers
+        """
+        return self.version
+
+    def get_changed_answer_ids(self, since_hash):
+        """
+        Gets the ids of the answers changed since `get_hash` returned `since_hash`.
 
-        :return: Return a unique hash value
+        :return: A set of answer ids, or None if the changes are not known, e.g. the store was cleared
         """
-        return hash(json.dumps(self.answer_map, sort_keys=True))
+        if since_hash is None or not 0 <= since_hash <= self.version:
+            return None
+
+        changed_answer_ids = set(self._changed_answer_ids[since_hash:])
+        if None in changed_answer_ids:
+            return None
+
+        return changed_answer_ids
 
     def upgrade(self, current_version, schema):
         """
@@ -208,6 +355,116 @@ class AnswerStore:
             logger.info('Upgrading answer store version', current_version=current_version, new_version=upgrade_to_version, transform=transform.__name__)
             transform(self, schema)
 
+            # Transforms update answers in place, which may change indexed values
+            self._reset_indexes()
+            self._record_change(None)
+
+
+class AnswerStoreView:
+    """
+    A lazily filtered view over the answers in an AnswerStore, as returned by `AnswerStore.filter`.
+
+    The filters are applied each time the view is read, so it reflects the answer store at that
+    time, and the matching answers are not copied. Use `copy` to take an AnswerStore of them.
+    """
+
+    def __init__(self, answer_store, filters):
+        self._answer_store = answer_store
+        self._filters = filters
+
+    def __iter__(self):
+        first_filter, *other_filters = self._filters
+        answers = self._answer_store._iter_filtered(**first_filter)  # pylint: disable=protected-access
+
+        for answer_filter in other_filters:
+            answers = _filter_answers(answers, **answer_filter)
+
+        return answers
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __bool__(self):
+        return self.first() is not None
+
+    def __eq__(self, other):
+        if not isinstance(other, (AnswerStore, AnswerStoreView)):
+            return NotImplemented
+
+        return self.answer_map == other.answer_map
+
+    @property
+    def answer_map(self):
+        return self.copy().answer_map
+
+    def copy(self):
+        """
+        Create a new answer store holding the answers in this view.
+        """
+        return AnswerStore(list(self))
+
+    def count(self):
+        return len(self)
+
+    def values(self):
+        return [answer.value for answer in self]
+
+    def first(self):
+        return next(iter(self), None)
+
+    def escaped(self):
+        return AnswerStore(existing_answers=_escape_answers(self))
+
+    def filter(self, answer_ids=None, group_instance=None, group_instance_id=None, answer_instance=None, limit=None):
+        """
+        Further filter the answers in this view, see `AnswerStore.filter`.
+        """
+        return self.__class__(self._answer_store, self._filters + [{
+            'answer_ids': answer_ids,
+            'group_instance': group_instance,
+            'group_instance_id': group_instance_id,
+            'answer_instance': answer_instance,
+            'limit': limit,
+        }])
+
+
+def _filter_answers(answers, answer_ids=None, limit=None, **filter_vars):
+    """ Generate the answers matching `answer_ids` and the given answer attribute values """
+    filter_vars = {key: value for key, value in filter_vars.items() if value is not None}
+    matched = 0
+
+    for answer in answers:
+        if answer_ids is not None and answer.answer_id not in answer_ids:
+            continue
+
+        matches = all(
+            getattr(answer, key) in value if isinstance(value, list) else getattr(answer, key) == value
+            for key, value in filter_vars.items()
+        )
+        if matches:
+            yield answer
+            matched += 1
+            if limit and matched == AnswerStore.EQ_MAX_NUM_REPEATS:
+                return
+
+
+def _escape_answers(answers):
+    escaped = []
+    for answer in answers:
+        answer = answer.copy()
+        if isinstance(answer.value, str):
+            answer.value = escape(answer.value)
+        escaped.append(answer)
+    return escaped
+
+
+def _remove_identical(answers, answer):
+    """ Remove `answer` itself from a list of answers, rather than the first answer equal to it """
+    for index, existing in enumerate(answers):
+        if existing is answer:
+            del answers[index]
+            return
+
 
 def upgrade_to_1_update_date_formats(answer_store, schema):
     """ Updates the date format """
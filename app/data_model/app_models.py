@@ -5,10 +5,25 @@ from marshmallow import Schema, fields, post_load, pre_dump
 
 
 class QuestionnaireState:
-    def __init__(self, user_id, state_data, version):
+    def __init__(self, user_id, state_data, version, revision=None):
         self.user_id = user_id
         self.state_data = state_data
         self.version = version
+        # Changed on every write, so a copy of the state can be checked against the stored state
+        self.revision = revision
+        self.created_at = datetime.now(tz=tzutc())
+        self.updated_at = datetime.now(tz=tzutc())
+
+
+class QuestionnaireStateDelta:
+    def __init__(self, user_id, sequence, state_data, version, base_revision):
+        self.user_id = user_id
+        # Deltas are applied in order of sequence
+        self.sequence = sequence
+        self.state_data = state_data
+        self.version = version
+        # The revision of the questionnaire state the delta was made to
+        self.base_revision = base_revision
         self.created_at = datetime.now(tz=tzutc())
         self.updated_at = datetime.now(tz=tzutc())
 
@@ -56,6 +71,18 @@ class Timestamp(fields.Field):
             return datetime.utcfromtimestamp(value).replace(tzinfo=tzutc())
 
 
+class EncryptedData(fields.Field):
+    """
+    Encrypted data, either a compact JWE string or the bytes of a storage envelope.
+    DynamoDB returns binary attributes wrapped in a `Binary`.
+    """
+    def _serialize(self, value, attr, obj):
+        return value
+
+    def _deserialize(self, value, attr, data):
+        return getattr(value, 'value', value)
+
+
 class DateTimeSchemaMixin:
     created_at = fields.DateTime()
     updated_at = fields.DateTime()
@@ -68,8 +95,9 @@ class DateTimeSchemaMixin:
 
 class QuestionnaireStateSchema(Schema, DateTimeSchemaMixin):
     user_id = fields.Str()
-    state_data = fields.Str()
+    state_data = EncryptedData()
     version = fields.Integer()
+    revision = fields.Str(allow_none=True)
 
     @post_load
     def make_model(self, data):
@@ -81,10 +109,27 @@ class QuestionnaireStateSchema(Schema, DateTimeSchemaMixin):
         return model
 
 
+class QuestionnaireStateDeltaSchema(Schema, DateTimeSchemaMixin):
+    user_id = fields.Str()
+    sequence = fields.Integer()
+    state_data = EncryptedData()
+    version = fields.Integer()
+    base_revision = fields.Str()
+
+    @post_load
+    def make_model(self, data):
+        created_at = data.pop('created_at', None)
+        updated_at = data.pop('updated_at', None)
+        model = QuestionnaireStateDelta(**data)
+        model.created_at = created_at
+        model.updated_at = updated_at
+        return model
+
+
 class EQSessionSchema(Schema, DateTimeSchemaMixin):
     eq_session_id = fields.Str()
     user_id = fields.Str()
-    session_data = fields.Str()
+    session_data = EncryptedData()
     expires_at = Timestamp(allow_none=True)  # To cater in flight data (Should never actually be None)
 
     @post_load
@@ -14,21 +14,60 @@ class QuestionnaireState(db.Model):
     __tablename__ = 'questionnaire_state'
     user_id = db.Column('userid', db.String, primary_key=True)
     state = db.Column('questionnaire_data', db.String)
+    state_binary = db.Column('questionnaire_data_binary', db.LargeBinary)
     version = db.Column('version', db.Integer)
+    revision = db.Column('revision', db.String)
     created_at = db.Column('created_at', db.DateTime, default=datetime.datetime.utcnow)
     updated_at = db.Column('updated_at', db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
-    def __init__(self, user_id, state, version):
+    def __init__(self, user_id, state, version, revision=None):
         self.user_id = user_id
+        self.version = version
+        self.revision = revision
+
+        # Storage envelopes are bytes, which are kept apart from JWE strings
+        if isinstance(state, bytes):
+            self.state = None
+            self.state_binary = state
+        else:
+            self.state = state
+            self.state_binary = None
+
+    def to_app_model(self):
+        state = self.state_binary if self.state_binary is not None else self.state
+        model = app_models.QuestionnaireState(self.user_id, state, self.version, self.revision)
+        model.created_at = self.created_at
+        model.updated_at = self.updated_at
+        return model
+
+    @classmethod
+    def from_app_model(cls, model):
+        return cls(model.user_id, model.state_data, model.version, model.revision)
+
+
+class QuestionnaireStateDelta(db.Model):
+    __tablename__ = 'questionnaire_state_delta'
+    user_id = db.Column('userid', db.String, primary_key=True)
+    sequence = db.Column('sequence', db.Integer, primary_key=True, autoincrement=False)
+    state = db.Column('questionnaire_data_binary', db.LargeBinary)
+    version = db.Column('version', db.Integer)
+    base_revision = db.Column('base_revision', db.String)
+    created_at = db.Column('created_at', db.DateTime, default=datetime.datetime.utcnow)
+    updated_at = db.Column('updated_at', db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    def __init__(self, user_id, sequence, state, version, base_revision):
+        self.user_id = user_id
+        self.sequence = sequence
         self.state = state
         self.version = version
+        self.base_revision = base_revision
 
     def to_app_model(self):
-        model = app_models.QuestionnaireState(self.user_id, self.state, self.version)
+        model = app_models.QuestionnaireStateDelta(self.user_id, self.sequence, self.state, self.version, self.base_revision)
         model.created_at = self.created_at
         model.updated_at = self.updated_at
         return model
 
     @classmethod
     def from_app_model(cls, model):
-        return cls(model.user_id, model.state_data, model.version)
+        return cls(model.user_id, model.sequence, model.state_data, model.version, model.base_revision)
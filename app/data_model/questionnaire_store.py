@@ -1,8 +1,10 @@
+from copy import copy
 from types import MappingProxyType
 import simplejson as json
 
 from app.data_model.answer_store import AnswerStore
 from app.questionnaire.location import Location
+from app.questionnaire.routing_path import GroupCheckpoint, RoutingPath
 
 
 class QuestionnaireStore:
@@ -12,11 +14,20 @@ class QuestionnaireStore:
     2 - Add group_instance_id to all answers
     3 - Compress state using snappy before encryption. Also removes base64 encoding and
         unnecessary json wrapper around encrypted data.
+    4 - Encrypt state into a storage envelope of bytes rather than a JWE string.
+    5 - Compress state using zlib with a preset dictionary rather than snappy.
+
+    With `deltas_before_compaction` set, changes to answers and completed blocks are saved as deltas to
+    the state last saved in full, which is saved in full again once it has that many deltas.
     """
-    LATEST_VERSION = 3
+    LATEST_VERSION = 5
 
-    def __init__(self, storage, version=None):
+    def __init__(self, storage, version=None, deltas_before_compaction=0):
         self._storage = storage
+        self._deltas_before_compaction = deltas_before_compaction
+        # Whether the state was saved in full for deltas to be saved to, and how many have been
+        self._has_deltas = False
+        self._delta_count = 0
         if version is None:
             version = self.get_latest_version_number()
         self.version = version
@@ -26,13 +37,23 @@ class QuestionnaireStore:
         self.collection_metadata = {}
         self.answer_store = AnswerStore()
         self.completed_blocks = []
+        self._routing_path = None
+        self._routing_path_answer_store = None
+        self._routing_path_answer_store_version = None
+        self._routing_path_schema_fingerprint = None
+        self._save_routing_path = False
 
         raw_data, version = self._storage.get_user_data()
         if raw_data:
             self._deserialise(raw_data)
+            if self._has_deltas:
+                for delta in self._storage.get_deltas():
+                    self._apply_delta(delta)
         if version is not None:
             self.version = version
 
+        self._saved_state = self._get_saved_state()
+
     def get_latest_version_number(self):
         return self.LATEST_VERSION
 
@@ -43,6 +64,7 @@ class QuestionnaireStore:
         """
         self._metadata = to_set
         self.metadata = MappingProxyType(self._metadata)
+        self._routing_path = None
 
     def ensure_latest_version(self, schema):
         """ If the code has been updated, the data being loaded may need
@@ -54,6 +76,60 @@ class QuestionnaireStore:
 
         return self
 
+    def get_routing_path(self, schema):
+        """
+        Get the stored routing path, if it was built from this answer store and schema.
+
+        :return: A tuple of the RoutingPath and the answer store version it was built from,
+                 or (None, None) if there is no routing path for the answer store and schema
+        """
+        if self._routing_path is not None and self._routing_path_answer_store is self.answer_store and \
+                self._routing_path_schema_fingerprint == schema.fingerprint:
+            return self._routing_path, self._routing_path_answer_store_version
+
+        return None, None
+
+    def set_routing_path(self, routing_path, answer_store_version, schema):
+        """
+        Store the routing path built from the answer store at `answer_store_version`. The path is saved
+        with the questionnaire state when that is still the version of the answer store, unless the
+        schema's routing depends on today's date, as the path may be different when it is loaded.
+        """
+        self._routing_path = routing_path
+        self._routing_path_answer_store = self.answer_store
+        self._routing_path_answer_store_version = answer_store_version
+        self._routing_path_schema_fingerprint = schema.fingerprint
+        self._save_routing_path = not schema.routing_uses_current_date
+
+    def has_changed(self):
+        """
+        Whether anything which is saved has changed since the state was loaded or last saved.
+        """
+        return self._get_saved_state() != self._saved_state
+
+    def _get_saved_state(self):
+        """
+        A copy of what is saved, cheap to compare. The answer store itself is only compared by value
+        if it has been replaced, otherwise its version tells whether the answers have changed.
+        """
+        return {
+            'version': self.version,
+            'metadata': copy(self._metadata),
+            'answer_store': self.answer_store,
+            'answer_store_version': self.answer_store.get_hash(),
+            'completed_blocks': copy(self.completed_blocks),
+            'collection_metadata': copy(self.collection_metadata),
+            'routing_path': self._get_routing_path_to_save(),
+        }
+
+    def _get_routing_path_to_save(self):
+        if self._routing_path is not None and self._save_routing_path and \
+                self._routing_path_answer_store is self.answer_store and \
+                self._routing_path_answer_store_version == self.answer_store.get_hash():
+            return self._routing_path
+
+        return None
+
     def _deserialise(self, data):
         json_data = json.loads(data, use_decimal=True)
         completed_blocks = [Location.from_dict(location_dict=completed_block) for completed_block in
@@ -62,6 +138,71 @@ class QuestionnaireStore:
         self.answer_store = AnswerStore(json_data.get('ANSWERS'))
         self.completed_blocks = completed_blocks
         self.collection_metadata = json_data.get('COLLECTION_METADATA', {})
+        self._has_deltas = json_data.get('HAS_DELTAS', False)
+
+        if 'ROUTING_PATH' in json_data:
+            group_checkpoints = json_data.get('ROUTING_PATH_GROUP_CHECKPOINTS')
+            if group_checkpoints is not None:
+                group_checkpoints = [GroupCheckpoint.from_dict(checkpoint) for checkpoint in group_checkpoints]
+
+            self._routing_path = RoutingPath([Location.from_dict(location_dict=location) for location in json_data['ROUTING_PATH']],
+                                             group_checkpoints)
+            self._routing_path_answer_store = self.answer_store
+            self._routing_path_answer_store_version = self.answer_store.get_hash()
+            # The path is only used with the schema it was built from, paths saved without one are rebuilt
+            self._routing_path_schema_fingerprint = json_data.get('ROUTING_PATH_SCHEMA')
+            self._save_routing_path = True
+
+    def _apply_delta(self, data):
+        json_data = json.loads(data, use_decimal=True)
+
+        # Answers are replaced one answer id at a time, so the routing path is rebuilt from the first change
+        for answer_id, answers in json_data.get('ANSWERS', {}).items():
+            self.answer_store.replace_answers(answer_id, answers)
+
+        for completed_block in json_data.get('COMPLETED_BLOCKS_REMOVED', []):
+            location = Location.from_dict(location_dict=completed_block)
+            if location in self.completed_blocks:
+                self.completed_blocks.remove(location)
+
+        self.completed_blocks.extend(Location.from_dict(location_dict=completed_block)
+                                     for completed_block in json_data.get('COMPLETED_BLOCKS_ADDED', []))
+        self._delta_count += 1
+
+    def _get_delta(self):
+        """
+        The changes to the answers and completed blocks since the state was loaded or last saved,
+        or None if the state must be saved in full
+        """
+        saved_state = self._saved_state
+        if not self._has_deltas or self._delta_count >= self._deltas_before_compaction:
+            return None
+
+        if (saved_state['version'], saved_state['metadata'], saved_state['collection_metadata']) != \
+                (self.version, self._metadata, self.collection_metadata):
+            return None
+
+        if saved_state['answer_store'] is not self.answer_store:
+            return None
+
+        changed_answer_ids = self.answer_store.get_changed_answer_ids(saved_state['answer_store_version'])
+        if changed_answer_ids is None:
+            return None
+
+        delta = {}
+        if changed_answer_ids:
+            delta['ANSWERS'] = {answer_id: self.answer_store.answer_map.get(answer_id, [])
+                                for answer_id in sorted(changed_answer_ids)}
+
+        removed_blocks = [location for location in saved_state['completed_blocks'] if location not in self.completed_blocks]
+        if removed_blocks:
+            delta['COMPLETED_BLOCKS_REMOVED'] = removed_blocks
+
+        added_blocks = [location for location in self.completed_blocks if location not in saved_state['completed_blocks']]
+        if added_blocks:
+            delta['COMPLETED_BLOCKS_ADDED'] = added_blocks
+
+        return delta
 
     def _serialise(self):
         data = {
@@ -70,6 +211,17 @@ class QuestionnaireStore:
             'COMPLETED_BLOCKS': self.completed_blocks,
             'COLLECTION_METADATA': self.collection_metadata,
         }
+
+        if self._deltas_before_compaction:
+            data['HAS_DELTAS'] = True
+
+        routing_path = self._get_routing_path_to_save()
+        if routing_path is not None:
+            data['ROUTING_PATH'] = list(routing_path)
+            data['ROUTING_PATH_SCHEMA'] = self._routing_path_schema_fingerprint
+            if routing_path.group_checkpoints is not None:
+                data['ROUTING_PATH_GROUP_CHECKPOINTS'] = routing_path.group_checkpoints
+
         return json.dumps(data, default=self._encode_questionnaire_store)
 
     def delete(self):
@@ -78,10 +230,38 @@ class QuestionnaireStore:
         self.collection_metadata = {}
         self.answer_store.clear()
         self.completed_blocks = []
+        self._routing_path = None
+        self._has_deltas = False
+        self._delta_count = 0
 
     def add_or_update(self):
-        data = self._serialise()
-        self._storage.add_or_update(data=data, version=self.version)
+        """
+        Save the state, unless nothing has changed since it was loaded or last saved. A change only to
+        the routing path is not saved as a delta, the routing path is rebuilt from the saved deltas.
+        """
+        if not self.has_changed():
+            return
+
+        delta = self._get_delta()
+        if delta is None or not self._add_delta(delta):
+            self._storage.add_or_update(data=self._serialise(), version=self.version)
+            self._has_deltas = bool(self._deltas_before_compaction)
+            self._delta_count = 0
+
+        self._saved_state = self._get_saved_state()
+
+    def _add_delta(self, delta):
+        """
+        :return: False if the delta could not be saved, so the state must be saved in full
+        """
+        if not delta:
+            return True
+
+        if not self._storage.add_delta(json.dumps(delta, default=self._encode_questionnaire_store), self.version):
+            return False
+
+        self._delta_count += 1
+        return True
 
     def remove_completed_blocks(self, location=None, group_id=None, block_id=None):
         """Removes completed blocks from store either by specific location
@@ -51,15 +51,19 @@ class SessionStore:
 
         return self
 
-    def save(self):
+    def save(self, defer=False):
         """
         save session
+        :param defer: save the session with the next write in this request rather than now
         """
         if self._eq_session:
             self._eq_session.session_data = \
-                StorageEncryption(self.user_id, self.user_ik, self.pepper).encrypt_data(vars(self.session_data))
+                StorageEncryption(self.user_id, self.user_ik, self.pepper).encrypt_data_as_envelope(vars(self.session_data))
 
-            data_access.put(self._eq_session)
+            if defer:
+                data_access.defer_put(self._eq_session)
+            else:
+                data_access.put(self._eq_session)
 
         return self
 
@@ -1,15 +1,19 @@
 from datetime import datetime, timedelta
 
+from cryptography.exceptions import InvalidTag
 from dateutil.tz import tzutc
-from flask import g, current_app, session as cookie_session
+from flask import g, current_app, request, session as cookie_session
 from structlog import get_logger
 
 from app.data_model.questionnaire_store import QuestionnaireStore
 from app.questionnaire.completeness import Completeness
-from app.settings import EQ_SESSION_ID, USER_IK
+from app.settings import EQ_SESSION_ID, ENCRYPTED_USER_ID, USER_IK
 
 logger = get_logger()
 
+# The blueprints whose requests load the user's questionnaire state
+QUESTIONNAIRE_STATE_BLUEPRINTS = frozenset(['questionnaire', 'dump', 'feedback'])
+
 
 def get_questionnaire_store(user_id, user_ik):
     from app.storage.encrypted_questionnaire_storage import EncryptedQuestionnaireStorage
@@ -20,7 +24,8 @@ def get_questionnaire_store(user_id, user_ik):
     if store is None:
         pepper = current_app.eq['secret_store'].get_secret_by_name('EQ_SERVER_SIDE_STORAGE_ENCRYPTION_USER_PEPPER')
         storage = EncryptedQuestionnaireStorage(user_id, user_ik, pepper)
-        store = g._questionnaire_store = QuestionnaireStore(storage)
+        store = g._questionnaire_store = QuestionnaireStore(
+            storage, deltas_before_compaction=current_app.config['EQ_QUESTIONNAIRE_STATE_DELTAS_BEFORE_COMPACTION'])
 
     if store.metadata:  # When creating the questionnaire storage, there is no metadata for upgrading
         schema = load_schema_from_metadata(store.metadata)
@@ -40,11 +45,58 @@ def get_session_store():
 
     if store is None:
         pepper = current_app.eq['secret_store'].get_secret_by_name('EQ_SERVER_SIDE_STORAGE_ENCRYPTION_USER_PEPPER')
+        _prefetch_session_and_questionnaire_state(pepper)
         store = g._session_store = SessionStore(cookie_session[USER_IK], pepper, cookie_session[EQ_SESSION_ID])
 
     return store
 
 
+def _prefetch_session_and_questionnaire_state(pepper):
+    """
+    Requests to the questionnaire need the user's questionnaire state as well as their session, so
+    read both at once, unless the state is already in the decrypted state cache. Other requests,
+    and sessions without the user id in the cookie, read the session on its own.
+    """
+    from app.data_model.app_models import EQSession, QuestionnaireState
+    from app.storage import data_access
+    from app.storage.questionnaire_state_cache import state_cache
+
+    if request.blueprint not in QUESTIONNAIRE_STATE_BLUEPRINTS:
+        return
+
+    user_id = _get_user_id_from_cookie(pepper)
+    if user_id and user_id not in state_cache:
+        data_access.prefetch([(EQSession, cookie_session[EQ_SESSION_ID]), (QuestionnaireState, user_id)])
+
+
+def store_user_id_in_cookie(user_id):
+    """
+    Keep the user id in the cookie so the session and questionnaire state can be read together.
+    It is encrypted with the session id, user ik and pepper, so only the server can read it.
+    """
+    pepper = current_app.eq['secret_store'].get_secret_by_name('EQ_SERVER_SIDE_STORAGE_ENCRYPTION_USER_PEPPER')
+    encrypter = _get_cookie_encrypter(pepper)
+    cookie_session[ENCRYPTED_USER_ID] = encrypter.encrypt_data_as_envelope(user_id)
+
+
+def _get_user_id_from_cookie(pepper):
+    encrypted_user_id = cookie_session.get(ENCRYPTED_USER_ID)
+    if not encrypted_user_id:
+        return None
+
+    try:
+        return _get_cookie_encrypter(pepper).decrypt_data(encrypted_user_id).decode('utf-8')
+    except (InvalidTag, ValueError):
+        logger.warning('could not decrypt user id from cookie')
+        return None
+
+
+def _get_cookie_encrypter(pepper):
+    from app.storage.storage_encryption import StorageEncryption
+
+    return StorageEncryption(cookie_session[EQ_SESSION_ID], cookie_session[USER_IK], pepper)
+
+
 def get_session_timeout_in_seconds(schema):
     """
     Gets the session timeout in seconds from the schema/env variable.
@@ -66,8 +118,9 @@ def create_session_store(eq_session_id, user_id, user_ik, session_data):
     session_timeout_in_seconds = get_session_timeout_in_seconds(g.schema)
     expires_at = datetime.now(tz=tzutc()) + timedelta(seconds=session_timeout_in_seconds)
 
+    # The session is saved with the questionnaire state which is always saved with it
     # pylint: disable=W0212
-    g._session_store = SessionStore(user_ik, pepper).create(eq_session_id, user_id, session_data, expires_at).save()
+    g._session_store = SessionStore(user_ik, pepper).create(eq_session_id, user_id, session_data, expires_at).save(defer=True)
 
 
 def get_metadata(user):
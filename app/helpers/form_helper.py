@@ -116,11 +116,20 @@ def post_form_for_location(schema, block_json, location, answer_store, metadata,
 
 
 def disable_mandatory_answers(block_json):
-    for question_json in block_json.get('questions', []):
-        for answer_json in question_json.get('answers', []):
-            if 'mandatory' in answer_json and answer_json['mandatory'] is True:
-                answer_json['mandatory'] = False
-    return block_json
+    """ returns a copy of the block with mandatory answers made optional. The rendered block shares
+    any parts without templates with the schema, so it is not changed in place """
+    if 'questions' not in block_json:
+        return block_json
+
+    questions = []
+    for question_json in block_json['questions']:
+        if 'answers' in question_json:
+            answers = [dict(answer_json, mandatory=False) if answer_json.get('mandatory') is True else answer_json
+                       for answer_json in question_json['answers']]
+            question_json = dict(question_json, answers=answers)
+        questions.append(question_json)
+
+    return dict(block_json, questions=questions)
 
 
 def clear_detail_answer_field(data, questions_for_block):
@@ -4,7 +4,7 @@ from flask import g
 from flask_login import current_user, login_required
 from werkzeug.local import LocalProxy
 
-from app.globals import get_answer_store, get_metadata, get_completed_blocks
+from app.globals import get_answer_store, get_metadata, get_completed_blocks, get_questionnaire_store
 from app.questionnaire.path_finder import PathFinder
 
 
@@ -16,7 +16,8 @@ def get_path_finder():
         metadata = get_metadata(current_user)
         answer_store = get_answer_store(current_user)
         completed_blocks = get_completed_blocks(current_user)
-        finder = PathFinder(g.schema, answer_store, metadata, completed_blocks)
+        questionnaire_store = get_questionnaire_store(current_user.user_id, current_user.user_ik)
+        finder = PathFinder(g.schema, answer_store, metadata, completed_blocks, questionnaire_store)
         g.path_finder = finder
 
     return finder
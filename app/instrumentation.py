@@ -0,0 +1,21 @@
+from collections import Counter
+from threading import Lock
+
+# Counts of events in this process, reported by /status so that load tests can see them
+_counters = Counter()
+_lock = Lock()
+
+
+def increment(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def get_counters():
+    with _lock:
+        return dict(_counters)
+
+
+def reset_counters():
+    with _lock:
+        _counters.clear()
@@ -17,6 +17,13 @@ class AnswerStoreUpdater:
         self._answer_store = self._questionnaire_store.answer_store
 
     def save_answers(self, form):
+        self.update_answers(form)
+        self._questionnaire_store.add_or_update()
+
+    def update_answers(self, form):
+        """
+        Update the answers and completed blocks from the form without saving the questionnaire store
+        """
         if isinstance(form, QuestionnaireForm):
             self._update_questionnaire_store_with_form_data(form.data)
         else:
@@ -25,8 +32,6 @@ class AnswerStoreUpdater:
         if self._current_location not in self._questionnaire_store.completed_blocks:
             self._questionnaire_store.completed_blocks.append(self._current_location)
 
-        self._questionnaire_store.add_or_update()
-
     def _update_questionnaire_store_with_answer_data(self, answers):
         survey_answer_ids = self._schema.get_answer_ids_for_block(self._current_location.block_id)
 
@@ -3,7 +3,7 @@ from structlog import get_logger
 
 from app.helpers.schema_helpers import get_group_instance_id
 from app.questionnaire.location import Location
-from app.questionnaire.routing_path import RoutingPath
+from app.questionnaire.routing_path import GroupCheckpoint, RoutingPath
 from app.questionnaire.rules import (
     evaluate_goto,
     evaluate_skip_conditions,
@@ -16,20 +16,27 @@ logger = get_logger()
 
 class PathFinder:
 
-    def __init__(self, schema, answer_store, metadata, completed_blocks):
+    def __init__(self, schema, answer_store, metadata, completed_blocks, questionnaire_store=None):
         self.answer_store = answer_store
         self.metadata = metadata
         self.schema = schema
         self.completed_blocks = completed_blocks
+        self.questionnaire_store = questionnaire_store
         self._answer_store_hash = self.answer_store.get_hash()
         self._full_routing_path = None
 
     @staticmethod
-    def _block_index_for_location(blocks, location):
-        return next((index for (index, b) in enumerate(blocks) if b['block']['id'] == location.block_id
-                     and b['group_id'] == location.group_id
-                     and b['group_instance'] == location.group_instance),
-                    None)
+    def _block_index_for_location(block_indexes, location):
+        return block_indexes.get((location.group_id, location.group_instance, location.block_id))
+
+    @staticmethod
+    def _index_blocks(block_indexes, group_blocks, start_index):
+        """
+        Add the position of each block in `group_blocks` to `block_indexes`, keyed on
+        (group_id, group_instance, block_id). The first occurrence of a key is kept.
+        """
+        for index, block in enumerate(group_blocks, start_index):
+            block_indexes.setdefault((block['group_id'], block['group_instance'], block['block']['id']), index)
 
     @staticmethod
     def _build_blocks_for_group(group, instance_idx):
@@ -41,57 +48,88 @@ class PathFinder:
                 'block': block,
             }
 
-    def build_path(self):
+    def build_path(self, previous_path=None, first_group_index=0):
         """
         Visits all the blocks from a location forwards and returns path
         taken given a list of answers.
 
-        :param blocks: A list containing all block content in the survey
-        :param this_location: The location to visit, represented as a dict
-        :return: A list of locations followed through the survey
+        :param previous_path: A RoutingPath with group checkpoints, built from answers which differ
+                              only in answers read by the routing of groups from `first_group_index` onwards
+        :param first_group_index: The position of the first group to visit, earlier groups are taken from `previous_path`
+        :return: A RoutingPath of the locations followed through the survey
         """
-        this_location = None
-
         blocks = []
-        path = []
-        block_index = 0
+        block_indexes = {}
+        group_checkpoints = []
         first_groups = self._get_first_group_in_section()
+        groups = list(self.schema.groups)
+
+        if first_group_index:
+            group_checkpoints = previous_path.group_checkpoints[:first_group_index]
+            self._add_blocks(blocks, block_indexes, groups, group_checkpoints)
+
+            checkpoint = previous_path.group_checkpoints[first_group_index]
+            path = list(previous_path[:checkpoint.path_length])
+            block_index = checkpoint.block_index
+            this_location = checkpoint.location
+        else:
+            path = []
+            block_index = 0
+            this_location = None
+
+        for group in groups[first_group_index:]:
+            checkpoint = GroupCheckpoint(len(path), block_index, this_location)
+            group_checkpoints.append(checkpoint)
 
-        for group in self.schema.groups:
             first_block_in_group = self.schema.get_first_block_id_for_group(group['id'])
             if not this_location:
                 this_location = Location(group['id'], 0, first_block_in_group)
 
-            no_of_repeats = get_number_of_repeats(group, self.schema, path, self.answer_store)
+            checkpoint.group_instances = self._get_group_instances(group, first_block_in_group, path)
+            self._add_blocks(blocks, block_indexes, [group], [checkpoint])
 
-            first_group_instance_index = None
-            for group_instance in range(0, no_of_repeats):
+            all_blocks_skipped = not (checkpoint.group_instances and group['blocks'])
 
-                if 'skip_conditions' in group:
-                    group_instance_id = get_group_instance_id(self.schema, self.answer_store, Location(group['id'], group_instance, first_block_in_group))
+            if not all_blocks_skipped:
+                if group['id'] in first_groups:
+                    # the first instance of a block in this group that has not been skipped
+                    this_location = Location(group['id'], checkpoint.group_instances[0], first_block_in_group)
 
-                    if evaluate_skip_conditions(group['skip_conditions'], self.schema, self.metadata,
-                                                self.answer_store, group_instance, group_instance_id,
-                                                routing_path=path):
-                        continue
+                if blocks:
+                    path, block_index = self._build_path_within_group(blocks, block_indexes, block_index, this_location, path)
 
-                group_blocks = list(self._build_blocks_for_group(group, group_instance))
-                blocks += group_blocks
+        return RoutingPath(path, group_checkpoints)
 
-                if group_blocks and first_group_instance_index is None:
-                    # get the group instance of the first instance of a block in this group that has not been skipped
-                    first_group_instance_index = group_blocks[0]['group_instance']
+    def _get_group_instances(self, group, first_block_in_group, path):
+        """
+        Get the instances of the group which are not skipped
+        """
+        no_of_repeats = get_number_of_repeats(group, self.schema, path, self.answer_store)
 
-            all_blocks_skipped = first_group_instance_index is None
+        group_instances = []
+        for group_instance in range(0, no_of_repeats):
 
-            if not all_blocks_skipped:
-                if group['id'] in first_groups:
-                    this_location = Location(group['id'], first_group_instance_index, first_block_in_group)
+            if 'skip_conditions' in group:
+                group_instance_id = get_group_instance_id(self.schema, self.answer_store, Location(group['id'], group_instance, first_block_in_group))
 
-                if blocks:
-                    path, block_index = self._build_path_within_group(blocks, block_index, this_location, path)
+                if evaluate_skip_conditions(group['skip_conditions'], self.schema, self.metadata,
+                                            self.answer_store, group_instance, group_instance_id,
+                                            routing_path=path):
+                    continue
+
+            group_instances.append(group_instance)
 
-        return RoutingPath(path)
+        return group_instances
+
+    def _add_blocks(self, blocks, block_indexes, groups, group_checkpoints):
+        """
+        Add the blocks for the group instances recorded in `group_checkpoints` to `blocks` and `block_indexes`
+        """
+        for group, checkpoint in zip(groups, group_checkpoints):
+            for group_instance in checkpoint.group_instances:
+                group_blocks = list(self._build_blocks_for_group(group, group_instance))
+                self._index_blocks(block_indexes, group_blocks, len(blocks))
+                blocks += group_blocks
 
     def _get_first_group_in_section(self):
         return [
@@ -99,12 +137,12 @@ class PathFinder:
             for section in self.schema.sections
         ]
 
-    def _build_path_within_group(self, blocks, block_index, this_location, path):
+    def _build_path_within_group(self, blocks, block_indexes, block_index, this_location, path):
         # Keep going unless we've hit the last block
         # for block_identifier in blocks:
         while block_index < len(blocks):
             prev_block_index = block_index
-            block_index = PathFinder._block_index_for_location(blocks, this_location)
+            block_index = PathFinder._block_index_for_location(block_indexes, this_location)
             if block_index is None:
                 return path, prev_block_index
 
@@ -127,7 +165,7 @@ class PathFinder:
 
             # If routing rules exist then a rule must match (i.e. default goto)
             if 'routing_rules' in block and block['routing_rules']:
-                this_location = self._evaluate_routing_rules(this_location, blocks, block, block_index, path)
+                this_location = self._evaluate_routing_rules(this_location, block_indexes, block, block_index, path)
 
                 if this_location:
                     continue
@@ -143,7 +181,7 @@ class PathFinder:
 
             return path, block_index
 
-    def _evaluate_routing_rules(self, this_location, blocks, block, block_index, path):
+    def _evaluate_routing_rules(self, this_location, block_indexes, block, block_index, path):
         for rule in filter(is_goto_rule, block['routing_rules']):
             group_instance_id = get_group_instance_id(self.schema, self.answer_store, this_location)
             should_goto = evaluate_goto(rule['goto'],
@@ -155,9 +193,9 @@ class PathFinder:
                                         routing_path=path)
 
             if should_goto:
-                return self._follow_routing_rule(this_location, rule, blocks, block_index, path)
+                return self._follow_routing_rule(this_location, rule, block_indexes, block_index, path)
 
-    def _follow_routing_rule(self, this_location, rule, blocks, block_index, path):
+    def _follow_routing_rule(self, this_location, rule, block_indexes, block_index, path):
         next_location = copy.copy(this_location)
 
         if 'group' in rule['goto']:
@@ -166,7 +204,7 @@ class PathFinder:
         else:
             next_location.block_id = rule['goto']['block']
 
-        next_block_index = PathFinder._block_index_for_location(blocks, next_location)
+        next_block_index = PathFinder._block_index_for_location(block_indexes, next_location)
         next_precedes_current = next_block_index is not None and next_block_index < block_index
 
         if next_precedes_current:
@@ -203,16 +241,43 @@ class PathFinder:
         Returns a list of the block ids visited based on answers provided
         :return: List of block location dicts
         """
+        if self._full_routing_path is None and self.questionnaire_store:
+            # Start from the routing path saved with the questionnaire state
+            self._full_routing_path, self._answer_store_hash = self.questionnaire_store.get_routing_path(self.schema)
+
         latest_answer_store_hash = self.answer_store.get_hash()
         if self._full_routing_path and \
                 self._answer_store_hash == latest_answer_store_hash:
             return self._full_routing_path
 
+        previous_path = self._full_routing_path
+        first_group_index = self._get_first_group_index_to_rebuild(previous_path, self._answer_store_hash)
         self._answer_store_hash = latest_answer_store_hash
-        self._full_routing_path = self.build_path()
+
+        if first_group_index is not None:
+            self._full_routing_path = self.build_path(previous_path, first_group_index)
+
+        if self.questionnaire_store:
+            self.questionnaire_store.set_routing_path(self._full_routing_path, latest_answer_store_hash, self.schema)
 
         return self._full_routing_path
 
+    def _get_first_group_index_to_rebuild(self, previous_path, previous_answer_store_hash):
+        """
+        Find the first group whose routing reads an answer which has changed since `previous_path` was built.
+
+        :return: The group index, 0 if the whole path must be rebuilt, or None if `previous_path` is still valid
+        """
+        if previous_path is None or previous_path.group_checkpoints is None or \
+                len(previous_path.group_checkpoints) != len(self.schema.groups):
+            return 0
+
+        changed_answer_ids = self.answer_store.get_changed_answer_ids(previous_answer_store_hash)
+        if changed_answer_ids is None:
+            return 0
+
+        return self.schema.get_first_group_index_routed_by(changed_answer_ids)
+
     @staticmethod
     def _get_current_location_index(path, current_location):
         if current_location in path:
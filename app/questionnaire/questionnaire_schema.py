@@ -1,20 +1,60 @@
+import hashlib
 from collections import OrderedDict
 
 from flask_babel import force_locale
+import simplejson as json
 
 from app.questionnaire.answer_dependencies import get_answer_dependencies
 from app.questionnaire.group_dependencies import get_group_dependencies
+from app.questionnaire.routing_dependencies import get_routing_dependencies
+from app.questionnaire.rules import compile_when_rules
 from app.validation.error_messages import error_messages
 
 DEFAULT_LANGUAGE_CODE = 'en'
 
 
 class QuestionnaireSchema:  # pylint: disable=too-many-public-methods
-    def __init__(self, questionnaire_json, language_code=DEFAULT_LANGUAGE_CODE):
+    """
+    A parsed questionnaire schema.
+
+    A `lazy` schema only indexes its sections, groups, blocks, questions and answers by id when it is
+    created. Its error messages and dependencies are worked out when they are first used, and the when
+    rules of each section compiled when routing first reaches it, so a large schema can be used before
+    all of it has been parsed.
+    """
+    def __init__(self, questionnaire_json, language_code=DEFAULT_LANGUAGE_CODE, lazy=False):
         self.json = questionnaire_json
         self.language_code = language_code
         self._parse_schema()
 
+        if not lazy:
+            self.materialise()
+
+    def __getstate__(self):
+        # Compiled when rules are functions, which can't be pickled
+        state = self.__dict__.copy()
+        state['_when_rules_evaluators'] = {}
+        state['_sections_with_compiled_when_rules'] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile_when_rules_outside_sections()
+        if state['_materialised']:
+            self._compile_when_rules_up_to_section(len(self._sections_by_id))
+
+    def materialise(self):
+        """ Work out everything a lazy schema leaves until it is used, as a schema which isn't lazy does when it is created """
+        self._materialised = True
+        self._compile_when_rules_up_to_section(len(self._sections_by_id))
+        _ = self.error_messages, self.answer_dependencies, self.routing_dependencies, self._group_indexes
+
+    @property
+    def error_messages(self):
+        if self._error_messages is None:
+            self._error_messages = self._get_error_messages()
+        return self._error_messages
+
     @property
     def sections(self):
         return self._sections_by_id.values()
@@ -37,12 +77,46 @@ class QuestionnaireSchema:  # pylint: disable=too-many-public-methods
 
     @property
     def answer_dependencies(self):
+        if self._answer_dependencies is None:
+            self._answer_dependencies = get_answer_dependencies(self)
         return self._answer_dependencies
 
     @property
     def group_dependencies(self):
+        if self._group_dependencies is None:
+            self._group_dependencies = get_group_dependencies(self)
         return self._group_dependencies.group_dependencies
 
+    @property
+    def routing_dependencies(self):
+        if self._routing_dependencies is None:
+            self._routing_dependencies = get_routing_dependencies(self)
+        return self._routing_dependencies
+
+    @property
+    def fingerprint(self):
+        """ A hash of the schema json, which changes whenever the schema does """
+        if self._fingerprint is None:
+            self._fingerprint = hashlib.sha256(json.dumps(self.json, sort_keys=True).encode('utf-8')).hexdigest()
+        return self._fingerprint
+
+    @property
+    def routing_uses_current_date(self):
+        """ Whether any when rules compare a date with today's, so the routing path can change from one day to the next """
+        if self._routing_uses_current_date is None:
+            self._routing_uses_current_date = any(
+                rule.get('date_comparison', {}).get('value') == 'now'
+                for when_rules in _get_nested_when_rules(self.json)
+                for rule in when_rules
+            )
+        return self._routing_uses_current_date
+
+    @property
+    def _group_indexes(self):
+        if self._group_indexes_by_id is None:
+            self._group_indexes_by_id = {group_id: index for index, group_id in enumerate(self._groups_by_id)}
+        return self._group_indexes_by_id
+
     def get_section(self, section_id):
         return self._sections_by_id.get(section_id)
 
@@ -124,6 +198,37 @@ class QuestionnaireSchema:  # pylint: disable=too-many-public-methods
             if block['type'] in ('Summary', 'Confirmation')
         ]
 
+    def get_first_group_index_routed_by(self, answer_ids):
+        """
+        Get the position in `groups` of the first group whose routing reads any of the answers.
+
+        :return: The group index, or None if no routing reads the answers
+        """
+        return min((self._group_indexes[group_id]
+                    for answer_id in answer_ids
+                    for group_id in self.routing_dependencies.answer_dependencies.get(answer_id, ())),
+                   default=None)
+
+    def get_when_rules_evaluator(self, when_rules):
+        """
+        Get the function which evaluates `when_rules`, see `compile_when_rules`. When rules in
+        the schema json are compiled when the schema is loaded, or for a lazy schema section by
+        section until the section they are in, and any others when they are requested.
+        """
+        compiled = self._when_rules_evaluators.get(id(when_rules))
+        if compiled is not None and compiled[0] is when_rules:
+            return compiled[1]
+
+        # Routing goes through the sections in order, so the next section to be compiled is usually the one needed
+        while self._sections_with_compiled_when_rules < len(self._sections_by_id):
+            self._compile_when_rules_up_to_section(self._sections_with_compiled_when_rules + 1)
+
+            compiled = self._when_rules_evaluators.get(id(when_rules))
+            if compiled is not None and compiled[0] is when_rules:
+                return compiled[1]
+
+        return compile_when_rules(when_rules, self)
+
     def get_group_dependencies(self, group_id):
         return self.group_dependencies.get(group_id)
 
@@ -222,9 +327,35 @@ class QuestionnaireSchema:  # pylint: disable=too-many-public-methods
         self._blocks_by_id = get_nested_schema_objects(self._groups_by_id, 'blocks')
         self._questions_by_id = get_nested_schema_objects(self._blocks_by_id, 'questions')
         self._answers_by_id = get_nested_schema_objects(self._questions_by_id, 'answers')
-        self.error_messages = self._get_error_messages()
-        self._answer_dependencies = get_answer_dependencies(self)
-        self._group_dependencies = get_group_dependencies(self)
+        self._error_messages = None
+        self._answer_dependencies = None
+        self._group_dependencies = None
+        self._routing_dependencies = None
+        self._group_indexes_by_id = None
+        self._fingerprint = None
+        self._routing_uses_current_date = None
+        self._when_rules_evaluators = {}
+        self._sections_with_compiled_when_rules = 0
+        self._materialised = False
+        self._compile_when_rules_outside_sections()
+
+    def _compile_when_rules_outside_sections(self):
+        for key, value in self.json.items():
+            if key != 'sections':
+                self._compile_when_rules(value)
+
+    def _compile_when_rules_up_to_section(self, section_count):
+        """ Compile the when rules in each section before the `section_count`th, which haven't already been compiled """
+        sections = list(self._sections_by_id.values())
+        while self._sections_with_compiled_when_rules < section_count:
+            self._compile_when_rules(sections[self._sections_with_compiled_when_rules])
+            self._sections_with_compiled_when_rules += 1
+
+    def _compile_when_rules(self, json_object):
+        self._when_rules_evaluators.update(
+            (id(when_rules), (when_rules, compile_when_rules(when_rules, self)))
+            for when_rules in _get_nested_when_rules(json_object)
+        )
 
     def _get_sections_by_id(self):
         return OrderedDict(
@@ -262,6 +393,19 @@ class QuestionnaireSchema:  # pylint: disable=too-many-public-methods
         return block['id']
 
 
+def _get_nested_when_rules(json_object):
+    """ Find every list of when rules in the schema json, e.g. in skip conditions, routing rules and titles """
+    if isinstance(json_object, dict):
+        for key, value in json_object.items():
+            if key == 'when' and isinstance(value, list):
+                yield value
+            else:
+                yield from _get_nested_when_rules(value)
+    elif isinstance(json_object, list):
+        for item in json_object:
+            yield from _get_nested_when_rules(item)
+
+
 def get_nested_schema_objects(parent_object, list_key):
     """
     Generic method to extract a flattened list of child objects from a parent
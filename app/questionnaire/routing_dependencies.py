@@ -0,0 +1,74 @@
+from app.questionnaire.answer_dependencies import AnswerDependencies
+
+
+def get_routing_dependencies(schema):
+    """gets the ids of the groups whose routing reads each answer, by walking the group and block
+    skip conditions, repeat rules and routing rules. Routing within a group may also read the answers
+    used to find group instance ids, so those answers are included for every group with rules.
+
+    Answers which no rules read have no dependencies
+    """
+    dependencies = AnswerDependencies()
+
+    for group in schema.groups:
+        answer_ids = set(_get_group_rule_answer_ids(group))
+
+        for block in group['blocks']:
+            answer_ids.update(_get_block_rule_answer_ids(block))
+
+        if answer_ids:
+            answer_ids.update(_get_group_instance_id_answer_ids(schema, group))
+
+        for answer_id in answer_ids:
+            dependencies.add(answer_id, group['id'])
+
+    return dependencies
+
+
+def _get_group_rule_answer_ids(group):
+    for skip_condition in group.get('skip_conditions', []):
+        yield from _get_when_answer_ids(skip_condition.get('when', []))
+
+    for routing_rule in group.get('routing_rules', []):
+        repeat_rule = routing_rule.get('repeat')
+        if repeat_rule:
+            if 'answer_id' in repeat_rule:
+                yield repeat_rule['answer_id']
+            yield from repeat_rule.get('answer_ids', [])
+            yield from _get_when_answer_ids(repeat_rule.get('when', []))
+
+
+def _get_block_rule_answer_ids(block):
+    for skip_condition in block.get('skip_conditions', []):
+        yield from _get_when_answer_ids(skip_condition.get('when', []))
+
+    for routing_rule in block.get('routing_rules', []):
+        if 'goto' in routing_rule:
+            yield from _get_when_answer_ids(routing_rule['goto'].get('when', []))
+
+
+def _get_when_answer_ids(when_rules):
+    for when_rule in when_rules:
+        if 'id' in when_rule:
+            yield when_rule['id']
+        if 'comparison_id' in when_rule:
+            yield when_rule['comparison_id']
+        if 'id' in when_rule.get('date_comparison', {}):
+            yield when_rule['date_comparison']['id']
+        yield from when_rule.get('answer_ids', [])
+
+
+def _get_group_instance_id_answer_ids(schema, group):
+    """ the answers `get_group_instance_id` may read for a location in the group """
+    driver_ids = list(schema.get_group_dependencies(group['id']) or [])
+
+    block_ids = [block['id'] for block in group['blocks']]
+    drivers = schema.get_group_dependencies_group_drivers() + schema.get_group_dependencies_block_drivers()
+    if group['id'] in drivers or any(block_id in drivers for block_id in block_ids):
+        driver_ids.append(group['id'])
+
+    for driver_id in driver_ids:
+        if schema.get_group(driver_id):
+            yield from schema.get_answer_ids_for_group(driver_id)
+        else:
+            yield from schema.get_answer_ids_for_block(driver_id)
@@ -1,9 +1,16 @@
+from app.questionnaire.location import Location
+
+
 class RoutingPath:
     """Holds a list of locations and optimizes for `in` comparisons
+
+    `group_checkpoints` optionally holds a GroupCheckpoint for each group in the schema, as recorded by
+    the PathFinder which built the path, so the path can be rebuilt from any group onwards
     """
-    def __init__(self, path):
+    def __init__(self, path, group_checkpoints=None):
         self._values = tuple(path)
         self._set = frozenset(path)
+        self.group_checkpoints = group_checkpoints
 
     def __len__(self):
         return len(self._values)
@@ -32,3 +39,28 @@ class RoutingPath:
 
     def index(self, *args):
         return self._values.index(*args)
+
+
+class GroupCheckpoint:
+    """The state of the PathFinder when it started building the path for a group,
+    and the group instances which were not skipped
+    """
+    def __init__(self, path_length, block_index, location, group_instances=None):
+        self.path_length = path_length
+        self.block_index = block_index
+        self.location = location
+        self.group_instances = group_instances or []
+
+    def __eq__(self, other):
+        return isinstance(other, GroupCheckpoint) and self.__dict__ == other.__dict__
+
+    @classmethod
+    def from_dict(cls, checkpoint_dict):
+        location = checkpoint_dict['location']
+        return cls(checkpoint_dict['path_length'],
+                   checkpoint_dict['block_index'],
+                   Location.from_dict(location_dict=location) if location else None,
+                   checkpoint_dict['group_instances'])
+
+    def to_dict(self):
+        return vars(self)
@@ -1,6 +1,8 @@
 import logging
 import re
 from datetime import datetime
+from functools import partial
+
 from dateutil.relativedelta import relativedelta
 
 from app.questionnaire.location import Location
@@ -55,6 +57,56 @@ def evaluate_date_rule(when, answer_store, schema, group_instance, metadata, ans
     return evaluate_condition(condition, answer_value, match_value)
 
 
+def _contains_any(answer_value, match_value):
+    if isinstance(answer_value, list):
+        return isinstance(match_value, list) and bool(set(answer_value) & set(match_value))
+
+    return answer_value in match_value
+
+
+def _not_contains_any(answer_value, match_value):
+    if isinstance(answer_value, list):
+        return isinstance(match_value, list) and set(answer_value).isdisjoint(set(match_value))
+
+    return answer_value not in match_value
+
+
+COMPARISON_OPERATORS = {
+    'equals': lambda answer_value, match_value: answer_value == match_value,
+    'not equals': lambda answer_value, match_value: answer_value != match_value,
+    'contains':
+        lambda answer_value, match_value: isinstance(answer_value, list)
+        and match_value in answer_value,
+    'contains all':
+        lambda answer_value, match_value: isinstance(answer_value, list)
+        and isinstance(match_value, list)
+        and set(answer_value) >= set(match_value),
+    'contains any': _contains_any,
+    'not contains any': _not_contains_any,
+    'not contains all':
+        lambda answer_value, match_value: isinstance(answer_value, list)
+        and isinstance(match_value, list)
+        and not set(match_value) <= set(answer_value),
+    'not contains':
+        lambda answer_value, match_value: isinstance(answer_value, list)
+        and match_value not in answer_value,
+    'set': lambda answer_value, _: answer_value is not None and answer_value != [],
+    'not set': lambda answer_value, _: answer_value is None or answer_value == [],
+    'greater than':
+        lambda answer_value, match_value: answer_value is not None and match_value is not None
+        and answer_value > match_value,
+    'greater than or equal to':
+        lambda answer_value, match_value: answer_value is not None and match_value is not None
+        and answer_value >= match_value,
+    'less than':
+        lambda answer_value, match_value: answer_value is not None and match_value is not None
+        and answer_value < match_value,
+    'less than or equal to':
+        lambda answer_value, match_value: answer_value is not None and match_value is not None
+        and answer_value <= match_value,
+}
+
+
 def evaluate_condition(condition, answer_value, match_value):
     """
     :param condition: string representation of comparison operator
@@ -62,50 +114,7 @@ def evaluate_condition(condition, answer_value, match_value):
     :param match_value: the right hand operand in the comparison
     :return: boolean value of comparing lhs and rhs using the specified operator
     """
-    answer_and_match = answer_value is not None and match_value is not None
-
-    comparison_operators = {
-        'equals': lambda answer_value, match_value: answer_value == match_value,
-        'not equals': lambda answer_value, match_value: answer_value != match_value,
-        'contains':
-            lambda answer_value, match_value: isinstance(answer_value, list)
-            and match_value in answer_value,
-        'contains all':
-            lambda answer_value, match_value: isinstance(answer_value, list)
-            and isinstance(match_value, list)
-            and set(answer_value) >= set(match_value),
-        'contains any':
-            lambda answer_value, match_value: answer_and_match
-            and isinstance(match_value, list)
-            and bool(set(answer_value) & set(match_value)) if isinstance(answer_value, list) else answer_value in match_value,
-        'not contains any':
-            lambda answer_value, match_value: answer_and_match
-            and isinstance(match_value, list)
-            and set(answer_value).isdisjoint(set(match_value)) if isinstance(answer_value, list) else answer_value not in match_value,
-        'not contains all':
-            lambda answer_value, match_value: isinstance(answer_value, list)
-            and isinstance(match_value, list)
-            and not set(match_value) <= set(answer_value),
-        'not contains':
-            lambda answer_value, match_value: isinstance(answer_value, list)
-            and match_value not in answer_value,
-        'set': lambda answer_value, _: answer_value is not None and answer_value != [],
-        'not set': lambda answer_value, _: answer_value is None or answer_value == [],
-        'greater than':
-            lambda answer_value, match_value: answer_and_match
-            and answer_value > match_value,
-        'greater than or equal to':
-            lambda answer_value, match_value: answer_and_match
-            and answer_value >= match_value,
-        'less than':
-            lambda answer_value, match_value: answer_and_match
-            and answer_value < match_value,
-        'less than or equal to':
-            lambda answer_value, match_value: answer_and_match
-            and answer_value <= match_value,
-    }
-
-    match_function = comparison_operators[condition]
+    match_function = COMPARISON_OPERATORS[condition]
     return match_function(answer_value, match_value)
 
 
@@ -233,14 +242,7 @@ def _get_answers_on_path(answers, schema, routing_path) -> AnswerStore:
     """
     Get any answers that are on the routing path and return an answer store.
     """
-    answers_to_remove = [answer for answer in answers if not _is_answer_on_path(schema, answer, routing_path)]
-
-    answers_on_path = answers.copy()
-
-    for answer in answers_to_remove:
-        answers_on_path.remove_answer(answer)
-
-    return answers_on_path
+    return AnswerStore([answer for answer in answers if _is_answer_on_path(schema, answer, routing_path)])
 
 
 def _is_answer_on_path(schema, answer, routing_path):
@@ -252,25 +254,14 @@ def _is_answer_on_path(schema, answer, routing_path):
 
 
 def _get_answer_value(filtered_answers):
-    return int(filtered_answers.values()[0] if len(filtered_answers) == 1 and filtered_answers.values()[0] else 0)
+    values = filtered_answers.values()
+    return int(values[0] if len(values) == 1 and values[0] else 0)
 
 
 def _get_answer_count_minus_one(filtered_answers):
     return min(max(len(filtered_answers) - 1, 0), MAX_REPEATS - 1)
 
 
-def _get_comparison_id_value(when_rule, answer_store, schema, group_instance, group_instance_id):
-    """
-        Gets the value of an answer specified as an operand in a comparator ( i.e right hand argument ,
-        or rhs in if lhs>rhs ) In a when clause
-        If the comparison answer is not in a repeating group, we may have the wrong group_instance
-        If it has a group_instance_id, we should match the group_instance_id to the current one.
-    """
-    answer_id = when_rule['comparison_id']
-
-    return get_answer_store_value(answer_id, answer_store, schema, group_instance=group_instance, group_instance_id=group_instance_id)
-
-
 def evaluate_skip_conditions(skip_conditions, schema, metadata, answer_store, group_instance=0, group_instance_id=None, routing_path=None):
     """
     Determine whether a skip condition will be satisfied based on a given answer
@@ -295,24 +286,6 @@ def evaluate_skip_conditions(skip_conditions, schema, metadata, answer_store, gr
     return False
 
 
-def _get_when_rule_value(when_rule, group_instance, answer_store, schema, metadata, group_instance_id=None, routing_path=None):
-    """
-    Get the value from a when rule.
-    :raises: Exception if none of `id`, `meta`, or `answer_count` are provided.
-    :return: The value to use in a when rule
-    """
-    if 'id' in when_rule:
-        value = get_answer_store_value(when_rule['id'], answer_store, schema, group_instance, group_instance_id, routing_path=routing_path)
-    elif 'meta' in when_rule:
-        value = get_metadata_value(metadata, when_rule['meta'])
-    elif when_rule['type'] == 'answer_count':
-        value = answer_store.filter(answer_ids=when_rule['answer_ids']).count()
-    else:
-        raise Exception('The when rule is invalid')
-
-    return value
-
-
 def evaluate_when_rules(when_rules, schema, metadata, answer_store, group_instance, group_instance_id=None, routing_path=None):
     """
     Whether the skip condition has been met.
@@ -326,25 +299,156 @@ def evaluate_when_rules(when_rules, schema, metadata, answer_store, group_instan
     :param routing_path: The routing path to use when filtering answer_store
     :return: True if the when condition has been met otherwise False
     """
-    for when_rule in when_rules:
-        if 'id' in when_rule:
-            if group_instance > 0 and not schema.answer_is_in_repeating_group(when_rule['id']):
-                group_instance = 0
+    evaluate = schema.get_when_rules_evaluator(when_rules)
 
-        value = _get_when_rule_value(when_rule, group_instance, answer_store, schema, metadata, group_instance_id, routing_path=routing_path)
+    return evaluate(metadata, answer_store, group_instance, group_instance_id, routing_path)
 
-        if 'date_comparison' in when_rule:
-            if not evaluate_date_rule(when_rule, answer_store, schema, group_instance, metadata, value):
-                return False
-        elif 'comparison_id' in when_rule:
-            comparison_id_value = _get_comparison_id_value(when_rule, answer_store, schema, group_instance, group_instance_id)
-            if not evaluate_comparison_rule(when_rule, value, comparison_id_value):
+
+def compile_when_rules(when_rules, schema):
+    """
+    Compile when rules into a function which evaluates them. Everything which does not depend on the
+    answers or metadata, such as the comparison operator, how the value is found, date offsets and whether
+    the answer is in a repeating group, is resolved once here rather than on every evaluation.
+
+    :param when_rules: when rules to compile
+    :param schema: survey schema
+    :return: A function taking (metadata, answer_store, group_instance, group_instance_id=None, routing_path=None)
+             which returns True if the when condition has been met otherwise False
+    """
+    compiled_rules = [(_compile_group_instance(when_rule, schema), _compile_when_rule(when_rule, schema))
+                      for when_rule in when_rules]
+
+    def evaluate(metadata, answer_store, group_instance, group_instance_id=None, routing_path=None):
+        for get_group_instance, evaluate_rule_for_group_instance in compiled_rules:
+            group_instance = get_group_instance(group_instance)
+
+            if not evaluate_rule_for_group_instance(metadata, answer_store, group_instance, group_instance_id, routing_path):
                 return False
-        else:
-            if not evaluate_rule(when_rule, value):
+
+        return True
+
+    return evaluate
+
+
+def _compile_group_instance(when_rule, schema):
+    """
+    Compile a function giving the group instance to evaluate a when rule for. Rules on answers outside
+    a repeating group always use group instance 0, and that group instance is kept for the following rules.
+    """
+    if 'id' not in when_rule:
+        return lambda group_instance: group_instance
+
+    answer_id = when_rule['id']
+
+    if schema.get_answer(answer_id) is None:
+        # Not resolvable from the schema json, so ask the schema when the rule is evaluated
+        return lambda group_instance: 0 if group_instance > 0 and not schema.answer_is_in_repeating_group(answer_id) \
+            else group_instance
+
+    if schema.answer_is_in_repeating_group(answer_id):
+        return lambda group_instance: group_instance
+
+    return lambda group_instance: 0 if group_instance > 0 else group_instance
+
+
+def _compile_when_rule(when_rule, schema):
+    get_value = _compile_when_rule_value(when_rule, schema)
+    condition = when_rule.get('condition')
+    compare = COMPARISON_OPERATORS.get(condition) or partial(evaluate_condition, condition)
+
+    if 'date_comparison' in when_rule:
+        get_match_value = _compile_date_match_value(when_rule['date_comparison'], schema)
+
+        def evaluate_date(metadata, answer_store, group_instance, group_instance_id, routing_path):
+            answer_value = convert_to_datetime(get_value(metadata, answer_store, group_instance, group_instance_id, routing_path))
+            match_value = get_match_value(metadata, answer_store, group_instance)
+
+            if not answer_value or not match_value or not condition:
                 return False
 
-    return True
+            return compare(answer_value, match_value)
+
+        return evaluate_date
+
+    if 'comparison_id' in when_rule:
+        comparison_id = when_rule['comparison_id']
+
+        def evaluate_comparison(metadata, answer_store, group_instance, group_instance_id, routing_path):
+            answer_value = get_value(metadata, answer_store, group_instance, group_instance_id, routing_path)
+            comparison_value = get_answer_store_value(comparison_id, answer_store, schema, group_instance=group_instance,
+                                                      group_instance_id=group_instance_id)
+
+            return compare(answer_value, comparison_value)
+
+        return evaluate_comparison
+
+    match_value = when_rule.get('value', when_rule.get('values'))
+
+    def evaluate(metadata, answer_store, group_instance, group_instance_id, routing_path):
+        return compare(get_value(metadata, answer_store, group_instance, group_instance_id, routing_path), match_value)
+
+    return evaluate
+
+
+def _compile_when_rule_value(when_rule, schema):
+    """
+    Compile a function getting the value from a when rule.
+    The function raises an Exception if none of `id`, `meta`, or `answer_count` are provided.
+    """
+    if 'id' in when_rule:
+        answer_id = when_rule['id']
+
+        def get_answer_value(_metadata, answer_store, group_instance, group_instance_id, routing_path):
+            return get_answer_store_value(answer_id, answer_store, schema, group_instance, group_instance_id, routing_path=routing_path)
+
+        return get_answer_value
+
+    if 'meta' in when_rule:
+        key = when_rule['meta']
+        return lambda metadata, *_: get_metadata_value(metadata, key)
+
+    if when_rule.get('type') == 'answer_count':
+        answer_ids = when_rule['answer_ids']
+        return lambda _metadata, answer_store, *_: answer_store.filter(answer_ids=answer_ids).count()
+
+    def invalid_rule(*_):
+        raise Exception('The when rule is invalid')
+
+    return invalid_rule
+
+
+def _compile_date_match_value(date_comparison, schema):
+    """
+    Compile a function with the same result as `get_date_match_value`
+    """
+    offset = None
+    if 'offset_by' in date_comparison:
+        offset_by = date_comparison['offset_by']
+        offset = relativedelta(days=offset_by.get('days', 0),
+                               months=offset_by.get('months', 0),
+                               years=offset_by.get('years', 0))
+
+    def offset_date(match_value):
+        match_value = convert_to_datetime(match_value)
+        return match_value + offset if offset and match_value else match_value
+
+    if 'value' in date_comparison:
+        if date_comparison['value'] == 'now':
+            return lambda *_: offset_date(datetime.utcnow().strftime('%Y-%m-%d'))
+
+        match_value = offset_date(date_comparison['value'])
+        return lambda *_: match_value
+
+    if 'id' in date_comparison:
+        answer_id = date_comparison['id']
+        return lambda _metadata, answer_store, group_instance: offset_date(
+            get_answer_store_value(answer_id, answer_store, schema, group_instance))
+
+    if 'meta' in date_comparison:
+        key = date_comparison['meta']
+        return lambda metadata, *_: offset_date(get_metadata_value(metadata, key))
+
+    return lambda *_: None
 
 
 def get_answer_store_value(answer_id, answer_store, schema, group_instance, group_instance_id=None, routing_path=None):
@@ -356,7 +460,7 @@ def get_answer_store_value(answer_id, answer_store, schema, group_instance, grou
     else:
         answers_on_path = filtered
 
-    if not answers_on_path.count():
+    if not answers_on_path:
         return None
 
     if all([answer.get('group_instance_id') for answer in answers_on_path]) and group_instance_id:
@@ -378,11 +482,13 @@ def get_answer_store_value(answer_id, answer_store, schema, group_instance, grou
                                       group_instance=group_instance,
                                       group_instance_id=group_instance_id)
 
-    if filtered.count() > 1:
+    answer_count = filtered.count()
+
+    if answer_count > 1:
         raise Exception('Multiple answers ({:d}) found evaluating when rule for answer ({})'
-                        .format(filtered.count(), answer_id))
+                        .format(answer_count, answer_id))
 
-    return next(iter(filtered))['value'] if filtered.count() == 1 else None
+    return filtered.first()['value'] if answer_count == 1 else None
 
 
 def get_number_of_repeats(group, schema, routing_path, answer_store):
@@ -52,6 +52,8 @@ EQ_RABBITMQ_QUEUE_NAME = os.getenv('EQ_RABBITMQ_QUEUE_NAME', 'submit_q')
 EQ_RABBITMQ_ENABLED = parse_mode(os.getenv('EQ_RABBITMQ_ENABLED', 'True'))
 EQ_NEW_RELIC_CONFIG_FILE = os.getenv('EQ_NEW_RELIC_CONFIG_FILE', './newrelic.ini')
 EQ_SESSION_TIMEOUT_SECONDS = int(os.getenv('EQ_SESSION_TIMEOUT_SECONDS', str(45 * 60)))
+# the session expiry is only saved when less than this percentage of the session timeout remains
+EQ_SESSION_EXTENSION_THRESHOLD_PERCENTAGE = int(os.getenv('EQ_SESSION_EXTENSION_THRESHOLD_PERCENTAGE', '100'))
 EQ_GTM_ID = os.getenv('EQ_GTM_ID', '')
 EQ_GTM_ENV_ID = os.getenv('EQ_GTM_ENV_ID', '')
 EQ_NEW_RELIC_ENABLED = parse_mode(os.getenv('EQ_NEW_RELIC_ENABLED', 'False'))
@@ -67,6 +69,16 @@ EQ_SERVER_SIDE_STORAGE_DATABASE_DRIVER = os.getenv('EQ_SERVER_SIDE_STORAGE_DATAB
 EQ_SERVER_SIDE_STORAGE_DATABASE_HOST = os.getenv('EQ_SERVER_SIDE_STORAGE_DATABASE_HOST')
 EQ_SERVER_SIDE_STORAGE_DATABASE_PORT = int(os.getenv('EQ_SERVER_SIDE_STORAGE_DATABASE_PORT', '5432'))
 EQ_SERVER_SIDE_STORAGE_DATABASE_NAME = os.getenv('EQ_SERVER_SIDE_STORAGE_DATABASE_NAME', 'digitaleqrds')
+EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_SIZE = int(os.getenv('EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_SIZE', '5'))
+EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_MAX_OVERFLOW = int(os.getenv('EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_MAX_OVERFLOW', '10'))
+EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_TIMEOUT_SECONDS = int(os.getenv('EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_TIMEOUT_SECONDS', '30'))
+EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_RECYCLE_SECONDS = int(os.getenv('EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_RECYCLE_SECONDS', '60'))
+EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_PRE_PING = parse_mode(os.getenv('EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_PRE_PING', 'False'))
+EQ_SERVER_SIDE_STORAGE_DATABASE_GEVENT = parse_mode(os.getenv('EQ_SERVER_SIDE_STORAGE_DATABASE_GEVENT', 'False'))
+EQ_SERVER_SIDE_STORAGE_DATABASE_TRANSACTION_PER_REQUEST = parse_mode(
+    os.getenv('EQ_SERVER_SIDE_STORAGE_DATABASE_TRANSACTION_PER_REQUEST', 'False'))
+EQ_STORAGE_KEY_CACHE_SIZE = int(os.getenv('EQ_STORAGE_KEY_CACHE_SIZE', '1000'))
+EQ_STORAGE_KEY_CACHE_TTL_SECONDS = int(os.getenv('EQ_STORAGE_KEY_CACHE_TTL_SECONDS', '300'))
 EQ_SERVER_SIDE_STORAGE_USER_ID_ITERATIONS = ensure_min(int(os.getenv('EQ_SERVER_SIDE_STORAGE_USER_ID_ITERATIONS', '10000')),
                                                        1000)
 
@@ -77,11 +89,31 @@ EQ_SUBMITTED_RESPONSES_TABLE_NAME = get_env_or_fail('EQ_SUBMITTED_RESPONSES_TABL
 EQ_QUESTIONNAIRE_STATE_TABLE_NAME = get_env_or_fail('EQ_QUESTIONNAIRE_STATE_TABLE_NAME')
 EQ_QUESTIONNAIRE_STATE_DYNAMO_READ = parse_mode(os.getenv('EQ_QUESTIONNAIRE_STATE_DYNAMO_READ', 'False'))
 EQ_QUESTIONNAIRE_STATE_DYNAMO_WRITE = parse_mode(os.getenv('EQ_QUESTIONNAIRE_STATE_DYNAMO_WRITE', 'False'))
+# the questionnaire state cache is disabled unless it is given some bytes
+EQ_QUESTIONNAIRE_STATE_CACHE_MAX_BYTES = int(os.getenv('EQ_QUESTIONNAIRE_STATE_CACHE_MAX_BYTES', '0'))
+EQ_QUESTIONNAIRE_STATE_CACHE_TTL_SECONDS = int(os.getenv('EQ_QUESTIONNAIRE_STATE_CACHE_TTL_SECONDS', '60'))
+EQ_QUESTIONNAIRE_STATE_CACHE_STICKY_SECONDS = float(os.getenv('EQ_QUESTIONNAIRE_STATE_CACHE_STICKY_SECONDS', '0'))
+# questionnaire state is saved in full every time unless it is given a number of deltas to save between
+EQ_QUESTIONNAIRE_STATE_DELTAS_BEFORE_COMPACTION = int(os.getenv('EQ_QUESTIONNAIRE_STATE_DELTAS_BEFORE_COMPACTION', '0'))
+EQ_QUESTIONNAIRE_STATE_DELTA_TABLE_NAME = os.getenv('EQ_QUESTIONNAIRE_STATE_DELTA_TABLE_NAME')
 EQ_SESSION_TABLE_NAME = get_env_or_fail('EQ_SESSION_TABLE_NAME')
 EQ_USED_JTI_CLAIM_TABLE_NAME = get_env_or_fail('EQ_USED_JTI_CLAIM_TABLE_NAME')
 
 EQ_DEV_MODE = parse_mode(os.getenv('EQ_DEV_MODE', 'False'))
 EQ_ENABLE_CACHE = parse_mode(os.getenv('EQ_ENABLE_CACHE', 'True'))
+EQ_TEMPLATE_CACHE_SIZE = int(os.getenv('EQ_TEMPLATE_CACHE_SIZE', '1024'))
+# no schemas are preloaded unless they are named, or all of them are with '*'
+EQ_SCHEMA_PRELOAD = os.getenv('EQ_SCHEMA_PRELOAD', '')
+EQ_SCHEMA_PRELOAD_WORKERS = int(os.getenv('EQ_SCHEMA_PRELOAD_WORKERS', '4'))
+EQ_SCHEMA_SNAPSHOT_FILE = os.getenv('EQ_SCHEMA_SNAPSHOT_FILE')
+EQ_SCHEMA_LAZY_PARSING = parse_mode(os.getenv('EQ_SCHEMA_LAZY_PARSING', 'False'))
+EQ_SCHEMA_CACHE_MAX_BYTES = int(os.getenv('EQ_SCHEMA_CACHE_MAX_BYTES', '50000000'))
+EQ_URL_SCHEMA_CACHE_MAX_BYTES = int(os.getenv('EQ_URL_SCHEMA_CACHE_MAX_BYTES', '10000000'))
+EQ_URL_SCHEMA_CACHE_TTL_SECONDS = int(os.getenv('EQ_URL_SCHEMA_CACHE_TTL_SECONDS', '300'))
+EQ_URL_SCHEMA_CACHE_STALE_SECONDS = int(os.getenv('EQ_URL_SCHEMA_CACHE_STALE_SECONDS', '300'))
+EQ_SURVEY_URL_CONNECT_TIMEOUT_SECONDS = float(os.getenv('EQ_SURVEY_URL_CONNECT_TIMEOUT_SECONDS', '3'))
+EQ_SURVEY_URL_READ_TIMEOUT_SECONDS = float(os.getenv('EQ_SURVEY_URL_READ_TIMEOUT_SECONDS', '10'))
+EQ_SURVEY_URL_MAX_POOL_CONNECTIONS = int(os.getenv('EQ_SURVEY_URL_MAX_POOL_CONNECTIONS', '10'))
 EQ_ENABLE_FLASK_DEBUG_TOOLBAR = parse_mode(os.getenv('EQ_ENABLE_FLASK_DEBUG_TOOLBAR', 'False'))
 EQ_ENABLE_SECURE_SESSION_COOKIE = parse_mode(os.getenv('EQ_ENABLE_SECURE_SESSION_COOKIE', 'True'))
 
@@ -91,4 +123,5 @@ DEFAULT_LOCALE = 'en_GB'
 SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI')
 
 USER_IK = 'user_ik'
+ENCRYPTED_USER_ID = 'encrypted_user_id'
 EQ_SESSION_ID = 'eq-session-id'
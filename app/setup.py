@@ -9,7 +9,7 @@ import boto3
 import sqlalchemy
 import yaml
 from botocore.config import Config
-from flask import Flask, url_for
+from flask import Flask, g, url_for
 from flask_babel import Babel
 from flask_caching import Cache
 from flask_talisman import Talisman
@@ -24,8 +24,12 @@ from app.authentication.authenticator import login_manager
 from app.authentication.cookie_session import SHA256SecureCookieSessionInterface
 from app.authentication.user_id_generator import UserIDGenerator
 from app.publisher import LogPublisher, PubSubPublisher
-from app.data_model.models import QuestionnaireState, db
+from app.data_model.models import QuestionnaireState, QuestionnaireStateDelta, db
 from app.globals import get_session_store
+from app.instrumentation import get_counters
+from app.storage import data_access, executor
+from app.storage.database_pool import get_engine_options, use_gevent_wait_callback
+from app.utilities import schema_snapshot
 from app.keys import KEY_PURPOSE_SUBMISSION
 from app.new_relic import setup_newrelic
 from app.secrets import SecretStore, validate_required_secrets
@@ -93,6 +97,8 @@ def create_app(setting_overrides=None):  # noqa: C901  pylint: disable=too-compl
 
     setup_dynamodb(application)
 
+    check_questionnaire_state_deltas(application.config)
+
     if application.config['EQ_RABBITMQ_ENABLED']:
         application.eq['submitter'] = RabbitMQSubmitter(
             host=application.config['EQ_RABBITMQ_HOST'],
@@ -157,6 +163,24 @@ def create_app(setting_overrides=None):  # noqa: C901  pylint: disable=too-compl
         request_id = str(uuid4())
         logger.new(request_id=request_id)
 
+    @application.after_request
+    def put_deferred_models(response):  # pylint: disable=unused-variable
+        data_access.put_deferred()
+        data_access.commit_request_transaction()
+        return response
+
+    @application.teardown_request
+    def put_remaining_deferred_models(exception):  # pylint: disable=unused-variable
+        # after_request is not run when a request fails part way, but the session writes
+        # deferred before then, such as a new login session, must not be lost
+        if exception is None or not g.get('_deferred_models'):
+            return
+        try:
+            data_access.put_deferred()
+            data_access.commit_request_transaction()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('could not put deferred models')
+
     @application.after_request
     def apply_caching(response):  # pylint: disable=unused-variable
         if 'text/html' in response.content_type:
@@ -171,6 +195,13 @@ def create_app(setting_overrides=None):  # noqa: C901  pylint: disable=too-compl
     def override_url_for():  # pylint: disable=unused-variable
         return dict(url_for=versioned_url_for)
 
+    if application.config['EQ_SCHEMA_SNAPSHOT_FILE']:
+        schema_snapshot.load_snapshot(application.config['EQ_SCHEMA_SNAPSHOT_FILE'])
+
+    if application.config['EQ_SCHEMA_PRELOAD'] and application.config['EQ_ENABLE_CACHE']:
+        from app.utilities.schema import preload_schemas
+        preload_schemas(application)
+
     return application
 
 
@@ -209,9 +240,11 @@ def get_database_uri(application):
 def setup_database(application):
     application.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     application.config['SQLALCHEMY_DATABASE_URI'] = get_database_uri(application)
-    application.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_recycle': 60,
-    }
+    application.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(
+        application.config, application.config['SQLALCHEMY_DATABASE_URI'])
+
+    if application.config['EQ_SERVER_SIDE_STORAGE_DATABASE_GEVENT'] and executor.is_gevent_patched():
+        use_gevent_wait_callback()
 
     with application.app_context():
         db.init_app(application)
@@ -229,6 +262,23 @@ def check_database():
     if 'version' not in table.c:  # pragma: no cover
         raise Exception('Database patch "pr-1347-apply.sql" has not been run')
 
+    if 'questionnaire_data_binary' not in table.c:  # pragma: no cover
+        raise Exception('Database patch "questionnaire-data-binary-apply.sql" has not been run')
+
+    if 'revision' not in table.c:  # pragma: no cover
+        raise Exception('Database patch "questionnaire-state-revision-apply.sql" has not been run')
+
+    if QuestionnaireStateDelta.__tablename__ not in sqlalchemy.inspect(db.engine).get_table_names():  # pragma: no cover
+        raise Exception('Database patch "questionnaire-state-delta-apply.sql" has not been run')
+
+
+def check_questionnaire_state_deltas(config):
+    dynamodb_enabled = config['EQ_QUESTIONNAIRE_STATE_DYNAMO_READ'] or config['EQ_QUESTIONNAIRE_STATE_DYNAMO_WRITE']
+
+    if config['EQ_QUESTIONNAIRE_STATE_DELTAS_BEFORE_COMPACTION'] and dynamodb_enabled and \
+            not config['EQ_QUESTIONNAIRE_STATE_DELTA_TABLE_NAME']:
+        raise Exception('EQ_QUESTIONNAIRE_STATE_DELTA_TABLE_NAME must be set to save questionnaire state deltas to DynamoDB')
+
 
 def setup_dynamodb(application):
     # Number of additional connection attempts
@@ -357,6 +407,7 @@ def add_safe_health_check(application):
         data = {
             'status': 'OK',
             'version': application.config['EQ_APPLICATION_VERSION'],
+            'counters': get_counters(),
         }
         return json.dumps(data)
 
@@ -0,0 +1,73 @@
+"""
+Codecs used to compress questionnaire state before it is encrypted.
+
+State is decompressed with the codec it was saved with, so the codec for each storage version
+can never change. A new codec or dictionary needs a new QuestionnaireStore version.
+"""
+import os
+import zlib
+
+import snappy
+
+from app.utilities.strings import to_bytes
+
+DICTIONARY_DIR = os.path.join(os.path.dirname(__file__), 'compression_dictionaries')
+
+
+class SnappyCodec:
+    name = 'snappy'
+
+    @staticmethod
+    def compress(data):
+        return snappy.compress(to_bytes(data))
+
+    @staticmethod
+    def decompress(data):
+        return snappy.uncompress(data)
+
+
+class ZlibDictionaryCodec:
+    """
+    Deflate with a preset dictionary of the strings common to all questionnaire state, such as
+    answer and location keys and metadata names, so even small states compress well.
+    Dictionaries are built by `scripts/build_compression_dictionary.py`.
+    """
+    def __init__(self, dictionary_name, level=6):
+        self.name = 'zlib-{}'.format(dictionary_name)
+        self._dictionary_path = os.path.join(DICTIONARY_DIR, '{}.bin'.format(dictionary_name))
+        self._dictionary = None
+        self._level = level
+
+    @property
+    def dictionary(self):
+        if self._dictionary is None:
+            with open(self._dictionary_path, 'rb') as dictionary_file:
+                self._dictionary = dictionary_file.read()
+
+        return self._dictionary
+
+    def compress(self, data):
+        compressor = zlib.compressobj(self._level, zdict=self.dictionary)
+        return compressor.compress(to_bytes(data)) + compressor.flush()
+
+    def decompress(self, data):
+        decompressor = zlib.decompressobj(zdict=self.dictionary)
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+# The codec each QuestionnaireStore version was introduced with. State before version 3 was not compressed.
+CODECS = {
+    3: SnappyCodec(),
+    5: ZlibDictionaryCodec('questionnaire_state_1'),
+}
+
+
+def get_codec(version):
+    """
+    Get the codec for state saved with `version`, which is the codec of the latest version up to it
+    """
+    codec_versions = [codec_version for codec_version in CODECS if codec_version <= version]
+    if not codec_versions:
+        raise ValueError('State saved with version {} is not compressed'.format(version))
+
+    return CODECS[max(codec_versions)]
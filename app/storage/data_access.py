@@ -1,11 +1,13 @@
+from collections import OrderedDict, defaultdict
+
 from structlog import get_logger
 
 from botocore.exceptions import ClientError
-from flask import current_app as app
+from flask import current_app as app, g, has_request_context
 from sqlalchemy.exc import IntegrityError
 
 from app.data_model import models, app_models
-from app.storage import dynamo_api
+from app.storage import dynamo_api, executor
 
 logger = get_logger()
 
@@ -24,6 +26,15 @@ TABLE_CONFIG = {
         'schema': app_models.QuestionnaireStateSchema,
         'sql_model': models.QuestionnaireState,
     },
+    app_models.QuestionnaireStateDelta: {
+        'table_name_key': 'EQ_QUESTIONNAIRE_STATE_DELTA_TABLE_NAME',
+        'dynamo_read_key': 'EQ_QUESTIONNAIRE_STATE_DYNAMO_READ',
+        'dynamo_write_key': 'EQ_QUESTIONNAIRE_STATE_DYNAMO_WRITE',
+        'key_field': 'user_id',
+        'range_field': 'sequence',
+        'schema': app_models.QuestionnaireStateDeltaSchema,
+        'sql_model': models.QuestionnaireStateDelta,
+    },
     app_models.EQSession: {
         'table_name_key': 'EQ_SESSION_TABLE_NAME',
         'key_field': 'eq_session_id',
@@ -47,9 +58,11 @@ def get_by_key(model_type, key_value):
     :param model: the type of the app model to fetch
     :param key_value: the value of the model's key
     """
+    prefetched_models = g.get('_prefetched_models', {})
+    if (model_type, key_value) in prefetched_models:
+        return prefetched_models.pop((model_type, key_value))
 
     config = TABLE_CONFIG[model_type]
-    schema = config['schema'](strict=True)
     key_field = config['key_field']
 
     model = None
@@ -60,8 +73,7 @@ def get_by_key(model_type, key_value):
         table_name = get_table_name(config)
         returned_data = dynamo_api.get_item(table_name, key)
         if returned_data:
-            model, _ = schema.load(returned_data)
-            setattr(model, '_use_dynamo', True)
+            model = _load_dynamo_model(config, returned_data)
         else:
             logger.debug(
                 'could not find item in dynamodb',
@@ -69,16 +81,119 @@ def get_by_key(model_type, key_value):
                 key_value=key_value)
 
     if not model:
-        # find in RDS
-        if 'sql_model' in config:
-            returned_data = config['sql_model'].query.filter_by(**key).first()
-            if returned_data:
-                model = returned_data.to_app_model()
-                setattr(model, '_use_dynamo', False)
+        model = _get_sql_model(config, key)
 
     return model
 
 
+def get_by_key_async(model_type, key_value):
+    """Gets a given model by its key without waiting for it, so other work can be done meanwhile
+
+    :param model_type: the type of the app model to fetch
+    :param key_value: the value of the model's key
+    :return: a future of the model, or of None if it was not found
+    """
+    prefetched_models = g.get('_prefetched_models', {})
+    if (model_type, key_value) in prefetched_models:
+        return executor.completed(prefetched_models.pop((model_type, key_value)))
+
+    return executor.submit(get_by_key, model_type, key_value)
+
+
+def get_by_keys(model_keys):
+    """Gets several models by their keys, reading all of those in DynamoDB in one request
+
+    :param model_keys: a list of tuples of the type of an app model and the value of its key
+    :return: a dict of each of `model_keys` to its model, or None if it was not found
+    """
+    keys_by_table = defaultdict(list)
+    for model_type, key_value in model_keys:
+        config = TABLE_CONFIG[model_type]
+        if is_dynamodb_read_enabled(config):
+            keys_by_table[get_table_name(config)].append({config['key_field']: key_value})
+
+    items_by_table = dynamo_api.get_items(keys_by_table) if keys_by_table else {}
+
+    models_by_key = {}
+    for model_type, key_value in model_keys:
+        config = TABLE_CONFIG[model_type]
+        key_field = config['key_field']
+
+        returned_data = next((item for item in items_by_table.get(get_table_name(config), [])
+                              if item[key_field] == key_value), None)
+        if returned_data:
+            models_by_key[(model_type, key_value)] = _load_dynamo_model(config, returned_data)
+        else:
+            models_by_key[(model_type, key_value)] = _get_sql_model(config, {key_field: key_value})
+
+    return models_by_key
+
+
+def prefetch(model_keys):
+    """Gets several models in one request with `get_by_keys`, to be returned by the first `get_by_key`
+    for each of them in this request
+
+    :param model_keys: a list of tuples of the type of an app model and the value of its key
+    """
+    g._prefetched_models = get_by_keys(model_keys)  # pylint: disable=protected-access
+
+
+def get_all_by_key(model_type, key_value):
+    """Gets every model with the given key, for models which also have a range field
+
+    :param model_type: the type of the app models to fetch
+    :param key_value: the value of the models' key
+    :return: a list of the models, in order of their range field
+    """
+    config = TABLE_CONFIG[model_type]
+    key_field = config['key_field']
+
+    if is_dynamodb_read_enabled(config):
+        returned_data = dynamo_api.query_items(get_table_name(config), key_field, key_value)
+        if returned_data:
+            return [_load_dynamo_model(config, item) for item in returned_data]
+
+    if 'sql_model' in config:
+        sql_model = config['sql_model']
+        returned_data = sql_model.query.filter_by(**{key_field: key_value}).order_by(getattr(sql_model, config['range_field'])).all()
+        models_found = [sql_data.to_app_model() for sql_data in returned_data]
+        for model in models_found:
+            setattr(model, '_use_dynamo', False)
+
+        return models_found
+
+    return []
+
+
+def get_attribute_by_key(model_type, key_value, attribute):
+    """Gets one attribute of a given model by its key, without reading the rest of the model
+
+    :param model_type: the type of the app model to fetch
+    :param key_value: the value of the model's key
+    :param attribute: the name of the attribute to fetch
+    :return: the value of the attribute, or None if there is no such model
+    """
+    prefetched_models = g.get('_prefetched_models', {})
+    if (model_type, key_value) in prefetched_models:
+        return getattr(prefetched_models[(model_type, key_value)], attribute, None)
+
+    config = TABLE_CONFIG[model_type]
+    key = {config['key_field']: key_value}
+
+    if is_dynamodb_read_enabled(config):
+        returned_data = dynamo_api.get_item(get_table_name(config), key, attributes=[attribute])
+        if returned_data is not None:
+            return returned_data.get(attribute)
+
+    if 'sql_model' in config:
+        sql_model = config['sql_model']
+        returned_data = sql_model.query.with_entities(getattr(sql_model, attribute)).filter_by(**key).first()
+        if returned_data:
+            return returned_data[0]
+
+    return None
+
+
 def put(model, overwrite=True):
     """Inserts or updates the given app model
 
@@ -86,11 +201,16 @@ def put(model, overwrite=True):
     :param overwrite: if true then the object may overwrite an existing object
         with the same ID. if not a `ItemAlreadyExistsError` will be raised
     """
+    _forget_prefetched(model)
+
+    if _put_with_deferred(model, overwrite):
+        return
+
     config = TABLE_CONFIG[type(model)]
     schema = config['schema'](strict=True)
     key_field = config['key_field']
 
-    if getattr(model, '_use_dynamo', is_dynamodb_write_enabled(config)):
+    if _use_dynamo(model, config):
         item, _ = schema.dump(model)
 
         table_name = get_table_name(config)
@@ -101,20 +221,63 @@ def put(model, overwrite=True):
                 raise ItemAlreadyExistsError() from e
 
             raise
-    else:
-        if 'sql_model' in config:
-            sql_model = config['sql_model'].from_app_model(model)
+    elif 'sql_model' in config:
+        _put_sql_model(model, config, overwrite)
 
-            try:
-                # pylint: disable=maybe-no-member
-                if overwrite:
-                    models.db.session.merge(sql_model)
-                else:
-                    models.db.session.add(sql_model)
 
-                models.db.session.commit()
-            except IntegrityError as e:
-                raise ItemAlreadyExistsError() from e
+def put_async(model, overwrite=True):
+    """Inserts or updates the given app model without waiting for it, so other work can be done meanwhile.
+    Models deferred by `defer_put` are not put with it.
+
+    :param model: the app model to be saved
+    :param overwrite: as for `put`
+    :return: a future of the put, whose result raises `ItemAlreadyExistsError` as `put` would
+    """
+    _forget_prefetched(model)
+    return executor.submit(put, model, overwrite)
+
+
+def put_all(models_to_put):
+    """Inserts or updates several app models, writing all of those in DynamoDB in one request
+    and all of those in the SQL database in one transaction
+
+    :param models_to_put: the app models to be saved, which may overwrite existing objects
+    """
+    items_by_table = defaultdict(list)
+    sql_models = []
+    for model in models_to_put:
+        config = TABLE_CONFIG[type(model)]
+        _forget_prefetched(model)
+        if _use_dynamo(model, config):
+            item, _ = config['schema'](strict=True).dump(model)
+            items_by_table[get_table_name(config)].append(item)
+        elif 'sql_model' in config:
+            sql_models.append(config['sql_model'].from_app_model(model))
+
+    if items_by_table:
+        dynamo_api.put_items(items_by_table)
+
+    if sql_models:
+        for sql_model in sql_models:
+            models.db.session.merge(sql_model)  # pylint: disable=maybe-no-member
+        _commit_sql()
+
+
+def defer_put(model):
+    """Puts the app model with the next `put` in this request, or with `put_deferred`
+    at the end of the request if there is no other put
+
+    :param model: the app model to be saved, which may overwrite an existing object
+    """
+    deferred_models = g.setdefault('_deferred_models', OrderedDict())
+    deferred_models[_get_model_key(model)] = model
+
+
+def put_deferred():
+    """Puts the app models deferred by `defer_put` which have not yet been saved"""
+    deferred_models = g.pop('_deferred_models', None)
+    if deferred_models:
+        put_all(deferred_models.values())
 
 
 def delete(model):
@@ -123,20 +286,146 @@ def delete(model):
     :param model: the app model to be deleted
     """
     config = TABLE_CONFIG[type(model)]
-    key_field = config['key_field']
-    key = {key_field: getattr(model, key_field)}
+    key = _get_item_key(model, config)
 
-    if getattr(model, '_use_dynamo', is_dynamodb_write_enabled(config)):
+    _forget_prefetched(model)
+    g.get('_deferred_models', {}).pop(_get_model_key(model), None)
+
+    if _use_dynamo(model, config):
         table_name = get_table_name(config)
         dynamo_api.delete_item(table_name, key)
     else:
         if 'sql_model' in config:
-            sql_model = config['sql_model'].from_app_model(model)
+            _delete_sql_model(model, config)
+            _commit_sql()
+
+
+def delete_all(models_to_delete):
+    """Deletes several app models, deleting all of those in each DynamoDB table in as few requests as possible
+    and all of those in the SQL database in one transaction
+
+    :param models_to_delete: the app models to be deleted
+    """
+    keys_by_table = defaultdict(list)
+    deleted_sql_models = False
+    for model in models_to_delete:
+        config = TABLE_CONFIG[type(model)]
+        _forget_prefetched(model)
+        g.get('_deferred_models', {}).pop(_get_model_key(model), None)
+        if _use_dynamo(model, config):
+            keys_by_table[get_table_name(config)].append(_get_item_key(model, config))
+        elif 'sql_model' in config:
+            _delete_sql_model(model, config)
+            deleted_sql_models = True
+
+    for table_name, keys in keys_by_table.items():
+        dynamo_api.delete_items(table_name, keys)
+
+    if deleted_sql_models:
+        _commit_sql()
+
+
+def commit_request_transaction():
+    """Commits the SQL writes made in this request, if they are being made in one transaction
+    committed at the end of the request"""
+    if g.pop('_sql_writes_pending', False):
+        models.db.session.commit()  # pylint: disable=maybe-no-member
+
+
+def _put_with_deferred(model, overwrite):
+    """Puts any deferred models, with the model if it may overwrite an existing object
+
+    :return: True if the model has been put
+    """
+    deferred_models = g.pop('_deferred_models', None)
+    if not deferred_models:
+        return False
+
+    deferred_models.pop(_get_model_key(model), None)
+    if overwrite:
+        put_all(list(deferred_models.values()) + [model])
+        return True
+
+    put_all(deferred_models.values())
+    return False
+
+
+def _put_sql_model(model, config, overwrite):
+    sql_model = config['sql_model'].from_app_model(model)
+
+    try:
+        # pylint: disable=maybe-no-member
+        if overwrite:
+            models.db.session.merge(sql_model)
+        elif _is_request_transaction():
+            # A savepoint, so an existing object does not roll back the rest of the request's writes
+            with models.db.session.begin_nested():
+                models.db.session.add(sql_model)
+        else:
+            models.db.session.add(sql_model)
+
+        _commit_sql()
+    except IntegrityError as e:
+        raise ItemAlreadyExistsError() from e
+
+
+def _delete_sql_model(model, config):
+    sql_model = config['sql_model'].from_app_model(model)
+
+    # pylint: disable=maybe-no-member
+    sql_model = models.db.session.merge(sql_model)
+    models.db.session.delete(sql_model)
+
+
+def _is_request_transaction():
+    """ Writes made in a request, rather than by the storage executor, may be committed at the end of it """
+    return app.config['EQ_SERVER_SIDE_STORAGE_DATABASE_TRANSACTION_PER_REQUEST'] and has_request_context()
+
+
+def _commit_sql():
+    """ Commits SQL writes, or flushes them to be committed by `commit_request_transaction` """
+    # pylint: disable=maybe-no-member
+    if _is_request_transaction():
+        models.db.session.flush()
+        g._sql_writes_pending = True  # pylint: disable=protected-access
+    else:
+        models.db.session.commit()
+
+
+def _load_dynamo_model(config, returned_data):
+    model, _ = config['schema'](strict=True).load(returned_data)
+    setattr(model, '_use_dynamo', True)
+    return model
+
+
+def _get_sql_model(config, key):
+    if 'sql_model' in config:
+        returned_data = config['sql_model'].query.filter_by(**key).first()
+        if returned_data:
+            model = returned_data.to_app_model()
+            setattr(model, '_use_dynamo', False)
+            return model
+
+    return None
+
+
+def _use_dynamo(model, config):
+    return getattr(model, '_use_dynamo', is_dynamodb_write_enabled(config))
+
+
+def _forget_prefetched(model):
+    """ A prefetched model is out of date once the model has been written """
+    g.get('_prefetched_models', {}).pop(_get_model_key(model), None)
+
+
+def _get_item_key(model, config):
+    key_fields = [config['key_field']] + ([config['range_field']] if 'range_field' in config else [])
+    return {key_field: getattr(model, key_field) for key_field in key_fields}
+
 
-            # pylint: disable=maybe-no-member
-            sql_model = models.db.session.merge(sql_model)
-            models.db.session.delete(sql_model)
-            models.db.session.commit()
+def _get_model_key(model):
+    """ The key of a deferred or prefetched model, including its range field so models sharing a key are kept apart """
+    return (type(model),) + tuple(_get_item_key(model, TABLE_CONFIG[type(model)]).values())
 
 
 def get_table_name(config):
@@ -0,0 +1,68 @@
+"""
+The connection pool of the SQL database questionnaire state falls back to when it is not in DynamoDB.
+
+Under the gunicorn gevent worker psycopg2 blocks the whole worker while it waits on the database,
+unless it is given a wait callback which yields to other greenlets, as `use_gevent_wait_callback` does.
+"""
+from time import perf_counter
+
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
+
+from app.instrumentation import increment
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    A `QueuePool` which counts checkouts and how long they waited for a connection, reported by /status
+    """
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            increment('database_pool_checkout')
+            increment('database_pool_checkout_wait_ms', (perf_counter() - start) * 1000)
+
+
+def get_engine_options(config, database_uri):
+    """
+    The SQLAlchemy engine options for the database, which only size the pool of databases which are
+    not SQLite, as SQLite is not given a `QueuePool`
+    """
+    engine_options = {
+        'pool_recycle': config['EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_RECYCLE_SECONDS'],
+        'pool_pre_ping': config['EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_PRE_PING'],
+    }
+
+    if make_url(database_uri).get_backend_name() != 'sqlite':
+        engine_options.update({
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': config['EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_SIZE'],
+            'max_overflow': config['EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_MAX_OVERFLOW'],
+            'pool_timeout': config['EQ_SERVER_SIDE_STORAGE_DATABASE_POOL_TIMEOUT_SECONDS'],
+        })
+
+    return engine_options
+
+
+def use_gevent_wait_callback():
+    """
+    Make psycopg2 wait on the database by yielding to other greenlets rather than blocking
+    """
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import extensions, OperationalError
+
+    def gevent_wait_callback(connection, timeout=None):
+        while True:
+            state = connection.poll()
+            if state == extensions.POLL_OK:
+                return
+            if state == extensions.POLL_READ:
+                wait_read(connection.fileno(), timeout=timeout)
+            elif state == extensions.POLL_WRITE:
+                wait_write(connection.fileno(), timeout=timeout)
+            else:
+                raise OperationalError('Bad result from poll: {!r}'.format(state))
+
+    extensions.set_wait_callback(gevent_wait_callback)
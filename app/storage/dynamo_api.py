@@ -1,8 +1,21 @@
+from time import sleep
+
+from boto3.dynamodb.conditions import Key
 from flask import current_app
 from structlog import get_logger
 
 logger = get_logger()
 
+# The most items DynamoDB writes in one BatchWriteItem request
+MAX_BATCH_WRITE_ITEMS = 25
+
+# Seconds to wait before the first retry of keys or items DynamoDB left unprocessed, doubling on each retry
+UNPROCESSED_RETRY_DELAY = 0.05
+
+
+class UnprocessedItemsError(Exception):
+    pass
+
 
 def put_item(table_name, key_field, item, overwrite=True):
     """Insert an item into table"""
@@ -17,16 +30,103 @@ def put_item(table_name, key_field, item, overwrite=True):
     return response == 200
 
 
-def get_item(table_name, key):
-    """ Get an item given its key """
+def get_item(table_name, key, attributes=None):
+    """ Get an item given its key, or only the given attributes of it """
     table = get_table(table_name)
 
-    response = table.get_item(Key=key, ConsistentRead=True)
+    get_kwargs = {'Key': key, 'ConsistentRead': True}
+    if attributes:
+        get_kwargs['ProjectionExpression'] = ', '.join('#{}'.format(index) for index in range(len(attributes)))
+        get_kwargs['ExpressionAttributeNames'] = {'#{}'.format(index): attribute for index, attribute in enumerate(attributes)}
+
+    response = table.get_item(**get_kwargs)
     item = response.get('Item', None)
 
     return item
 
 
+def get_items(keys_by_table):
+    """ Get items from several tables in one request
+
+    :param keys_by_table: a dict of table name to a list of the keys of the items to get from it
+    :return: a dict of table name to a list of the items found in it
+    """
+    items = {table_name: [] for table_name in keys_by_table}
+    request_items = {table_name: {'Keys': keys, 'ConsistentRead': True}
+                     for table_name, keys in keys_by_table.items()}
+
+    for response in _batch_requests(current_app.eq['dynamodb'].batch_get_item, request_items, 'UnprocessedKeys'):
+        for table_name, table_items in response['Responses'].items():
+            items[table_name].extend(table_items)
+
+    return items
+
+
+def put_items(items_by_table):
+    """ Insert or overwrite items in several tables, in as few requests as possible
+
+    :param items_by_table: a dict of table name to a list of the items to put in it
+    """
+    put_requests = [(table_name, {'PutRequest': {'Item': item}})
+                    for table_name, items in items_by_table.items()
+                    for item in items]
+
+    for start in range(0, len(put_requests), MAX_BATCH_WRITE_ITEMS):
+        request_items = {}
+        for table_name, put_request in put_requests[start:start + MAX_BATCH_WRITE_ITEMS]:
+            request_items.setdefault(table_name, []).append(put_request)
+
+        for _ in _batch_requests(current_app.eq['dynamodb'].batch_write_item, request_items, 'UnprocessedItems'):
+            pass
+
+
+def query_items(table_name, key_field, key_value):
+    """ Get every item with the given partition key, in the order of their sort key """
+    table = get_table(table_name)
+
+    query_kwargs = {'KeyConditionExpression': Key(key_field).eq(key_value), 'ConsistentRead': True}
+    items = []
+    while True:
+        response = table.query(**query_kwargs)
+        items.extend(response['Items'])
+
+        if 'LastEvaluatedKey' not in response:
+            return items
+
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def delete_items(table_name, keys):
+    """ Delete several items from a table, in as few requests as possible
+
+    :param keys: a list of the keys of the items to delete
+    """
+    for start in range(0, len(keys), MAX_BATCH_WRITE_ITEMS):
+        request_items = {table_name: [{'DeleteRequest': {'Key': key}}
+                                      for key in keys[start:start + MAX_BATCH_WRITE_ITEMS]]}
+
+        for _ in _batch_requests(current_app.eq['dynamodb'].batch_write_item, request_items, 'UnprocessedItems'):
+            pass
+
+
+def _batch_requests(request, request_items, unprocessed_key):
+    """ Make a batch request, then retry with backoff whatever DynamoDB left unprocessed """
+    max_retries = current_app.config['EQ_DYNAMODB_MAX_RETRIES']
+
+    for retry in range(max_retries + 1):
+        if retry:
+            sleep(UNPROCESSED_RETRY_DELAY * 2 ** (retry - 1))
+
+        response = request(RequestItems=request_items)
+        yield response
+
+        request_items = response.get(unprocessed_key)
+        if not request_items:
+            return
+
+    raise UnprocessedItemsError('DynamoDB left items unprocessed after {} retries'.format(max_retries))
+
+
 def delete_item(table_name, key):
     """Deletes an item by its key
     """
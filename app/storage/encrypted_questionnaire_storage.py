@@ -1,11 +1,15 @@
 import json
-import snappy
+from uuid import uuid4
 
 from structlog import get_logger
 from jwcrypto.common import base64url_decode
 
-from app.data_model.app_models import QuestionnaireState
+from app.data_model.app_models import QuestionnaireState, QuestionnaireStateDelta
+from app.instrumentation import increment
 from app.storage import data_access
+from app.storage.data_access import ItemAlreadyExistsError
+from app.storage.compression import get_codec
+from app.storage.questionnaire_state_cache import state_cache
 from app.storage.storage_encryption import StorageEncryption
 logger = get_logger()
 
@@ -18,11 +22,17 @@ class EncryptedQuestionnaireStorage:
 
         self._user_id = user_id
         self.encrypter = StorageEncryption(user_id, user_ik, pepper)
+        # The questionnaire state last read or written, so it need not be read again to update it
+        self._questionnaire_state = None
+        self._questionnaire_state_loaded = False
+        # The sequence of the next delta, once the deltas have been read, and whether there are any to delete
+        self._next_delta_sequence = None
+        self._has_stored_deltas = False
 
     def add_or_update(self, data, version):
-        compressed_data = snappy.compress(data)
-        encrypted_data = self.encrypter.encrypt_data(compressed_data)
-        questionnaire_state = self._find_questionnaire_state()
+        compressed_data = get_codec(version).compress(data)
+        encrypted_data = self.encrypter.encrypt_data_as_envelope(compressed_data)
+        questionnaire_state = self._get_loaded_questionnaire_state()
         if questionnaire_state:
             logger.debug('updating questionnaire data', user_id=self._user_id)
             questionnaire_state.state_data = encrypted_data
@@ -31,18 +41,76 @@ class EncryptedQuestionnaireStorage:
             logger.debug('creating questionnaire data', user_id=self._user_id)
             questionnaire_state = QuestionnaireState(self._user_id, encrypted_data, version)
 
+        questionnaire_state.revision = uuid4().hex
         data_access.put(questionnaire_state)
+        self._set_loaded_questionnaire_state(questionnaire_state)
+        state_cache.set(self._user_id, self.encrypter.key_digest, questionnaire_state, data)
+
+        # Deltas to the previous revision are ignored, but are deleted so they do not build up
+        if self._has_stored_deltas:
+            self._delete_deltas()
+
+    def get_deltas(self):
+        """
+        Get the decrypted deltas saved to the questionnaire state, in the order they were saved
+        """
+        questionnaire_state = self._get_loaded_questionnaire_state()
+        deltas = self._find_deltas()
+        self._next_delta_sequence = max((delta.sequence for delta in deltas), default=-1) + 1
+        self._has_stored_deltas = bool(deltas)
+
+        if not questionnaire_state:
+            return []
+
+        return [self._get_compressed_data(delta.state_data, delta.version) for delta in deltas
+                if delta.base_revision == questionnaire_state.revision]
+
+    def add_delta(self, data, version):
+        """
+        Save a delta to the questionnaire state, after the deltas read by `get_deltas`.
+
+        :return: False if another delta was saved since the deltas were read, or they have not been read,
+                 in which case the state should be saved in full
+        """
+        questionnaire_state = self._get_loaded_questionnaire_state()
+        if questionnaire_state is None or self._next_delta_sequence is None:
+            return False
+
+        compressed_data = get_codec(version).compress(data)
+        encrypted_data = self.encrypter.encrypt_data_as_envelope(compressed_data)
+        delta = QuestionnaireStateDelta(self._user_id, self._next_delta_sequence, encrypted_data, version,
+                                        questionnaire_state.revision)
+
+        try:
+            data_access.put(delta, overwrite=False)
+        except ItemAlreadyExistsError:
+            logger.info('questionnaire data delta already exists', user_id=self._user_id, sequence=delta.sequence)
+            increment('questionnaire_state_delta_conflict')
+            return False
+
+        increment('questionnaire_state_delta_saved')
+        self._next_delta_sequence += 1
+        self._has_stored_deltas = True
+        return True
 
     def get_user_data(self):
+        cached = state_cache.get(self._user_id, self.encrypter.key_digest, self._find_revision)
+        if cached:
+            questionnaire_state, decrypted_data = cached
+            self._set_loaded_questionnaire_state(questionnaire_state)
+            return decrypted_data, questionnaire_state.version or 0
+
         questionnaire_state = self._find_questionnaire_state()
+        self._set_loaded_questionnaire_state(questionnaire_state)
         if questionnaire_state and questionnaire_state.state_data:
             version = questionnaire_state.version or 0
 
             if version < 3:
                 decrypted_data = self._get_base64_encoded_data(questionnaire_state.state_data)
             else:
-                decrypted_data = self._get_snappy_compressed_data(questionnaire_state.state_data)
+                decrypted_data = self._get_compressed_data(questionnaire_state.state_data, version)
 
+            state_cache.set(self._user_id, self.encrypter.key_digest, questionnaire_state, decrypted_data)
             return decrypted_data, version
 
         return None, None
@@ -52,11 +120,42 @@ class EncryptedQuestionnaireStorage:
         questionnaire_state = self._find_questionnaire_state()
         if questionnaire_state:
             data_access.delete(questionnaire_state)
+        self._set_loaded_questionnaire_state(None)
+        state_cache.delete(self._user_id)
+        if self._has_stored_deltas:
+            self._delete_deltas()
+
+    def _get_loaded_questionnaire_state(self):
+        if not self._questionnaire_state_loaded:
+            self._set_loaded_questionnaire_state(self._find_questionnaire_state())
+
+        return self._questionnaire_state
+
+    def _set_loaded_questionnaire_state(self, questionnaire_state):
+        self._questionnaire_state = questionnaire_state
+        self._questionnaire_state_loaded = True
 
     def _find_questionnaire_state(self):
         logger.debug('getting questionnaire data', user_id=self._user_id)
         return data_access.get_by_key(QuestionnaireState, self._user_id)
 
+    def _find_deltas(self):
+        logger.debug('getting questionnaire data deltas', user_id=self._user_id)
+        return data_access.get_all_by_key(QuestionnaireStateDelta, self._user_id)
+
+    def _delete_deltas(self):
+        deltas = self._find_deltas()
+        if deltas:
+            logger.debug('deleting questionnaire data deltas', user_id=self._user_id, deltas=len(deltas))
+            data_access.delete_all(deltas)
+
+        self._next_delta_sequence = 0
+        self._has_stored_deltas = False
+
+    def _find_revision(self):
+        logger.debug('getting questionnaire data revision', user_id=self._user_id)
+        return data_access.get_attribute_by_key(QuestionnaireState, self._user_id, 'revision')
+
     def _get_base64_encoded_data(self, data):
         """
         Legacy data was stored in a dict, base64-encoded, and not compressed:
@@ -66,6 +165,6 @@ class EncryptedQuestionnaireStorage:
         decrypted_data = self.encrypter.decrypt_data(data)
         return base64url_decode(decrypted_data.decode()).decode()
 
-    def _get_snappy_compressed_data(self, data):
+    def _get_compressed_data(self, data, version):
         decrypted_data = self.encrypter.decrypt_data(data)
-        return snappy.uncompress(decrypted_data).decode()
+        return get_codec(version).decompress(decrypted_data).decode()
@@ -0,0 +1,102 @@
+"""
+A pool to run storage requests while the request that started them carries on.
+
+Under the gunicorn gevent worker the pool runs greenlets, which yield while they wait on DynamoDB;
+otherwise it runs threads. Either way it runs at most EQ_DYNAMODB_MAX_POOL_CONNECTIONS at once, so
+they never wait on each other for a botocore connection. The pool is created by the first `submit`
+in each process, so is never shared across a fork.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+
+from flask import current_app
+
+try:
+    from gevent import monkey
+    from gevent.pool import Pool
+except ImportError:  # pragma: no cover
+    monkey = None
+
+_executor = None
+_executor_lock = Lock()
+
+
+class GreenletExecutor:
+    """
+    The parts of `concurrent.futures.Executor` the storage layer needs, for a gevent pool
+    """
+    def __init__(self, max_workers):
+        self._pool = Pool(max_workers)
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:  # pylint: disable=broad-except
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        self._pool.spawn(run)
+        return future
+
+    def shutdown(self, wait=True):
+        if wait:
+            self._pool.join()
+        else:
+            self._pool.kill(block=False)
+
+
+def is_gevent_patched():
+    return monkey is not None and monkey.is_module_patched('socket')
+
+
+def submit(fn, *args, **kwargs):
+    """
+    Run `fn` in the pool in a new context of the current app
+
+    :return: a `concurrent.futures.Future` of the result of `fn`
+    """
+    app = current_app._get_current_object()  # pylint: disable=protected-access
+
+    def run_in_app_context():
+        with app.app_context():
+            return fn(*args, **kwargs)
+
+    return _get_executor(app.config['EQ_DYNAMODB_MAX_POOL_CONNECTIONS']).submit(run_in_app_context)
+
+
+def completed(result):
+    """
+    A future which already has its result, for when there is nothing to wait on
+    """
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def shutdown():
+    global _executor  # pylint: disable=global-statement
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+def _get_executor(max_workers):
+    global _executor  # pylint: disable=global-statement
+
+    with _executor_lock:
+        if _executor is None:
+            if is_gevent_patched():
+                _executor = GreenletExecutor(max_workers)
+            else:
+                _executor = ThreadPoolExecutor(max_workers, thread_name_prefix='storage')
+
+        return _executor
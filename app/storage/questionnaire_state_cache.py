@@ -0,0 +1,135 @@
+from collections import OrderedDict, namedtuple
+from copy import copy
+from threading import Lock
+from time import monotonic
+
+from app import settings
+from app.instrumentation import increment
+
+_CachedState = namedtuple('_CachedState', 'key_digest questionnaire_state data size expires_at checked_at')
+
+
+class QuestionnaireStateCache:
+    """
+    A per process cache of decrypted questionnaire state, so the state a process has just written
+    need not be read and decrypted again by the next request.
+
+    The cache holds at most `max_bytes` of state, removing the least recently used first, and each
+    entry expires `ttl` seconds after it was stored. Within `sticky_seconds` of an entry being stored
+    or checked it is used as it is; after that it is only used if its revision is still the revision
+    stored, which is much cheaper to read than the state. Entries are only used with the key the
+    state was encrypted with.
+    """
+    def __init__(self, max_bytes, ttl, sticky_seconds=0):
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._sticky_seconds = sticky_seconds
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    @property
+    def enabled(self):
+        return self._max_bytes > 0
+
+    @property
+    def size(self):
+        return self._size
+
+    def get(self, user_id, key_digest, get_revision):
+        """
+        Get a copy of the cached QuestionnaireState model and the decrypted state for the user.
+
+        :param get_revision: a function which reads the stored revision of the user's state
+        :return: a tuple of the model and decrypted state, or None if there is no current cached state
+        """
+        if not self.enabled:
+            return None
+
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+
+        if entry is None or entry.key_digest != key_digest:
+            increment('questionnaire_state_cache_miss')
+            return None
+
+        if entry.expires_at <= now:
+            increment('questionnaire_state_cache_expired')
+            self._remove(user_id, entry)
+            return None
+
+        if now - entry.checked_at >= self._sticky_seconds:
+            if get_revision() != entry.questionnaire_state.revision:
+                increment('questionnaire_state_cache_stale')
+                self._remove(user_id, entry)
+                return None
+
+            self._replace(user_id, entry, entry._replace(checked_at=now))
+
+        increment('questionnaire_state_cache_hit')
+        return copy(entry.questionnaire_state), entry.data
+
+    def set(self, user_id, key_digest, questionnaire_state, data):
+        """
+        Cache the decrypted state of the QuestionnaireState model, which has just been read or written.
+        State without a revision cannot be checked so is not cached.
+        """
+        if not self.enabled:
+            return
+
+        size = len(data) + len(questionnaire_state.state_data)
+        if questionnaire_state.revision is None or size > self._max_bytes:
+            self.delete(user_id)
+            return
+
+        now = monotonic()
+        entry = _CachedState(key_digest, copy(questionnaire_state), data, size, now + self._ttl, now)
+
+        with self._lock:
+            self._pop(user_id)
+            self._entries[user_id] = entry
+            self._size += size
+            self._evict()
+
+    def delete(self, user_id):
+        with self._lock:
+            self._pop(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, user_id):
+        return user_id in self._entries
+
+    def _remove(self, user_id, entry):
+        with self._lock:
+            if self._entries.get(user_id) is entry:
+                self._pop(user_id)
+
+    def _replace(self, user_id, entry, new_entry):
+        with self._lock:
+            if self._entries.get(user_id) is entry:
+                self._entries[user_id] = new_entry
+                self._entries.move_to_end(user_id)
+
+    def _pop(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def _evict(self):
+        while self._size > self._max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self._size -= entry.size
+            increment('questionnaire_state_cache_evicted')
+
+
+state_cache = QuestionnaireStateCache(settings.EQ_QUESTIONNAIRE_STATE_CACHE_MAX_BYTES,
+                                      settings.EQ_QUESTIONNAIRE_STATE_CACHE_TTL_SECONDS,
+                                      settings.EQ_QUESTIONNAIRE_STATE_CACHE_STICKY_SECONDS)
@@ -1,14 +1,86 @@
 import hashlib
+import os
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
 
 import simplejson as json
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from jwcrypto import jwe, jwk
 from jwcrypto.common import base64url_encode
 from structlog import get_logger
 
+from app import settings
+from app.instrumentation import increment
 from app.utilities.strings import to_bytes, to_str
 
 logger = get_logger()
 
+# Data encrypted with `encrypt_data_as_envelope` is this version byte, a random nonce, then the
+# AES-256-GCM ciphertext and tag. The version byte is authenticated as associated data.
+ENVELOPE_VERSION = b'\x01'
+ENVELOPE_NONCE_SIZE = 12
+
+
+class KeyCache:
+    """
+    A bounded cache of derived keys, each of which expires `ttl` seconds after it was derived.
+
+    Keys are cached under `get_key_digest` of what they were derived from, which is not the key itself,
+    so the cache holds no user iks. Keys are never logged.
+    """
+    def __init__(self, max_size, ttl):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._keys = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, derive_key, *key_args):
+        cache_key = get_key_digest(*key_args)
+        now = monotonic()
+
+        with self._lock:
+            cached = self._keys.get(cache_key)
+            if cached is not None and cached[1] > now:
+                self._keys.move_to_end(cache_key)
+                increment('storage_key_cache_hit')
+                return cached[0]
+
+        increment('storage_key_cache_miss')
+        key = derive_key(*key_args)
+
+        with self._lock:
+            self._keys[cache_key] = (key, now + self._ttl)
+            self._keys.move_to_end(cache_key)
+            while len(self._keys) > self._max_size:
+                self._keys.popitem(last=False)
+
+        return key
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def get_key_digest(*key_args):
+    """
+    A digest of what a key is derived from, which identifies the key without revealing it or the user ik
+    """
+    return hashlib.sha256(json.dumps(['storage-key-cache'] + [to_str(arg) for arg in key_args]).encode('utf-8')).digest()
+
+
+key_cache = KeyCache(settings.EQ_STORAGE_KEY_CACHE_SIZE, settings.EQ_STORAGE_KEY_CACHE_TTL_SECONDS)
+
+
+def flush_key_cache():
+    """
+    Remove every cached storage key from this process
+    """
+    key_cache.clear()
+
 
 class StorageEncryption:
 
@@ -20,18 +92,21 @@ class StorageEncryption:
         if pepper is None:
             raise ValueError('Pepper must be set')
 
-        self.key = self._generate_key(user_id, user_ik, pepper)
+        self.key_digest = get_key_digest(user_id, user_ik, pepper)
+        self.key, self._aead = key_cache.get(self._generate_keys, user_id, user_ik, pepper)
 
     @staticmethod
-    def _generate_key(user_id, user_ik, pepper):
+    def _generate_cek(user_id, user_ik, pepper):
         sha256 = hashlib.sha256()
         sha256.update(to_str(user_id).encode('utf-8'))
         sha256.update(to_str(user_ik).encode('utf-8'))
         sha256.update(to_str(pepper).encode('utf-8'))
 
         # we only need the first 32 characters for the CEK
-        cek = to_bytes(sha256.hexdigest()[:32])
+        return to_bytes(sha256.hexdigest()[:32])
 
+    @staticmethod
+    def _get_jwk(cek):
         password = {
             'kty': 'oct',
             'k': base64url_encode(cek),
@@ -39,6 +114,18 @@ class StorageEncryption:
 
         return jwk.JWK(**password)
 
+    @classmethod
+    def _generate_key(cls, user_id, user_ik, pepper):
+        return cls._get_jwk(cls._generate_cek(user_id, user_ik, pepper))
+
+    @classmethod
+    def _generate_keys(cls, user_id, user_ik, pepper):
+        """
+        The JWK used for JWE and the AEAD cipher used for envelopes, which share the same CEK
+        """
+        cek = cls._generate_cek(user_id, user_ik, pepper)
+        return cls._get_jwk(cek), AESGCM(cek)
+
     def encrypt_data(self, data):
         if isinstance(data, dict):
             data = json.dumps(data)
@@ -57,8 +144,33 @@ class StorageEncryption:
 
         return jwe_token.serialize(compact=True)
 
-    def decrypt_data(self, encrypted_token):
+    def encrypt_data_as_envelope(self, data):
+        """
+        Encrypt data with the same key and cipher as `encrypt_data`, but without the JWE
+        serialisation. Returns bytes rather than a compact JWE string.
+        """
+        if isinstance(data, dict):
+            data = json.dumps(data)
+
+        nonce = os.urandom(ENVELOPE_NONCE_SIZE)
+        return ENVELOPE_VERSION + nonce + self._aead.encrypt(nonce, to_bytes(data), ENVELOPE_VERSION)
+
+    def decrypt_data(self, encrypted_data):
+        """
+        Decrypt either a compact JWE string or bytes from `encrypt_data_as_envelope`
+        """
+        if isinstance(encrypted_data, bytes):
+            return self._decrypt_envelope(encrypted_data)
+
         jwe_token = jwe.JWE(algs=['dir', 'A256GCM'])
-        jwe_token.deserialize(encrypted_token, self.key)
+        jwe_token.deserialize(encrypted_data, self.key)
 
         return jwe_token.payload
+
+    def _decrypt_envelope(self, envelope):
+        version = envelope[:1]
+        if version != ENVELOPE_VERSION:
+            raise ValueError('Unsupported storage envelope version {!r}'.format(version))
+
+        nonce = envelope[1:1 + ENVELOPE_NONCE_SIZE]
+        return self._aead.decrypt(nonce, envelope[1 + ENVELOPE_NONCE_SIZE:], version)
@@ -1,5 +1,5 @@
 from app.libs.utils import convert_tx_id
-from app.templating.schema_context import json_and_html_safe
+from app.templating.schema_context import html_safe
 from app.templating.schema_context import build_schema_metadata
 from app.utilities.schema import load_schema_from_metadata
 
@@ -11,11 +11,11 @@ def build_metadata_context(metadata):
     :return: metadata context
     """
     eq_context = {
-        'eq_id': json_and_html_safe(metadata['eq_id']),
-        'collection_id': json_and_html_safe(metadata['collection_exercise_sid']),
-        'form_type': json_and_html_safe(metadata['form_type']),
-        'ru_ref': json_and_html_safe(metadata['ru_ref']),
-        'tx_id': json_and_html_safe(metadata['tx_id']),
+        'eq_id': html_safe(metadata['eq_id']),
+        'collection_id': html_safe(metadata['collection_exercise_sid']),
+        'form_type': html_safe(metadata['form_type']),
+        'ru_ref': html_safe(metadata['ru_ref']),
+        'tx_id': html_safe(metadata['tx_id']),
     }
 
     schema = load_schema_from_metadata(metadata)
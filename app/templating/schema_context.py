@@ -42,7 +42,7 @@ def _build_answers(answer_store, schema, answer_ids_on_path):
             value = _create_answers_list(matching_answers, 'group_instance')
 
         elif matching_answers:
-            value = json_and_html_safe(next(iter(matching_answers))['value'])
+            value = html_safe(next(iter(matching_answers))['value'])
         else:
             value = ''
 
@@ -65,15 +65,15 @@ def _build_group_instances(answer_store, answer_ids_on_path):
 
 def build_schema_metadata(metadata, schema):
     schema_metadata = schema.json['metadata']
-    parsed = {metadata_field['name']: json_and_html_safe(metadata[metadata_field['name']])
+    parsed = {metadata_field['name']: html_safe(metadata[metadata_field['name']])
               for metadata_field in schema_metadata if metadata_field['name'] in metadata}
 
     return parsed
 
 
-def json_and_html_safe(data):
+def html_safe(data):
     if data and isinstance(data, str):
-        return escape(data.replace('\\', r'\\'))
+        return escape(data)
     return data
 
 
@@ -111,7 +111,7 @@ def _create_answers_list(answers, index_key):
         if len(items) < index:
             items.extend([''] * index)
 
-        value = json_and_html_safe(answer['value'])
+        value = html_safe(answer['value'])
         if len(items) == index:
             items.append(value)
         else:
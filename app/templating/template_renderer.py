@@ -1,16 +1,20 @@
 # coding: utf-8
 
 import re
+from functools import lru_cache
 
-import simplejson as json
 from jinja2 import Environment
 
 import app.jinja_filters as filters
+from app import settings
+from app.instrumentation import increment
+
+TEMPLATE_MARKERS = ('{{', '{%', '{#')
 
 
 class TemplateRenderer:
-    def __init__(self):
-        env = Environment(autoescape=True)
+    def __init__(self, cache_size=settings.EQ_TEMPLATE_CACHE_SIZE):
+        env = Environment(autoescape=True, keep_trailing_newline=True)
 
         env.filters['concatenated_list'] = filters.concatenated_list
         env.filters['format_date'] = filters.format_date
@@ -40,22 +44,92 @@ class TemplateRenderer:
 
         self.environment = env
 
+        # Compiled templates are cached by their source, which is the same for a block of a
+        # given schema and language on every request
+        self._template_cache = lru_cache(maxsize=cache_size)(self._compile_template)
+
     def render(self, renderable, **context):
         """Render.
 
-        Substitute variables into renderable with the variables in context.
+        Substitute variables into renderable with the variables in context. Only the strings which
+        contain template markers are rendered, so any part of a renderable dict without them is
+        shared with the rendered version rather than copied.
 
         :param (dict) renderable: Map of variables to be substituted.
         :param (dict) context: Map of variables to substitute.
         :returns (dict): The rendered version of the original renderable dict.
         """
-        json_string = json.dumps(renderable) if isinstance(
-            renderable, dict) else renderable
-        template = self.environment.from_string(json_string)
-        rendered = template.render(**context)
-        result = rendered if isinstance(
-            renderable, dict) else json.dumps(rendered)
-        return json.loads(result)
+        return self._render_value(renderable, context)
+
+    def _render_value(self, value, context):
+        if isinstance(value, str):
+            if any(marker in value for marker in TEMPLATE_MARKERS):
+                return self._get_template(value).render(**context)
+            return value
+
+        if isinstance(value, dict):
+            return self._render_container(value, value.items(), context)
+
+        if isinstance(value, list):
+            return self._render_container(value, enumerate(value), context)
+
+        return value
+
+    def _render_container(self, container, items, context):
+        """ copies the container only when something within it is rendered """
+        rendered = None
+        for key, item in items:
+            rendered_item = self._render_value(item, context)
+            if rendered_item is not item:
+                if rendered is None:
+                    rendered = container.copy()
+                rendered[key] = rendered_item
+
+        return container if rendered is None else rendered
+
+    def _get_template(self, source):
+        """ Get the compiled template from the cache, counting hits and misses for /status """
+        template = self._template_cache(source)
+        increment('template_cache_hit')
+        return template
+
+    def _compile_template(self, source):
+        """ Only called on a cache miss, so takes back the hit `_get_template` counts for it """
+        template = self.environment.from_string(source)
+        increment('template_cache_miss')
+        increment('template_cache_hit', -1)
+        return template
+
+    def precompile(self, renderable):
+        """Compile the templates in renderable into the template cache, so that rendering it does not have to.
+
+        Once the cache is full no more templates are compiled, as they would only evict those already compiled.
+
+        :param (dict) renderable: Map of variables to be substituted, as passed to `render`.
+        :returns (bool): False if the cache filled up before every template in renderable was compiled.
+        """
+        if isinstance(renderable, str):
+            if any(marker in renderable for marker in TEMPLATE_MARKERS):
+                cache_info = self._template_cache.cache_info()
+                if cache_info.maxsize is not None and cache_info.currsize >= cache_info.maxsize:
+                    return False
+                self._get_template(renderable)
+            return True
+
+        if isinstance(renderable, dict):
+            return all(self.precompile(item) for item in renderable.values())
+
+        if isinstance(renderable, list):
+            return all(self.precompile(item) for item in renderable)
+
+        return True
+
+    def cache_info(self):
+        """Compiled template cache statistics.
+
+        :returns (CacheInfo): The hits, misses, maxsize and currsize of the template cache.
+        """
+        return self._template_cache.cache_info()
 
     @staticmethod
     def safe_content(content):
@@ -266,8 +266,8 @@ def _remove_unwanted_questions_answers(block, answers_in_block, answer_ids_to_ke
     for question in reduced_block['questions']:
         if question['id'] in questions_to_keep:
             answers_to_keep = [answer for answer in question['answers'] if answer['id'] in answer_ids_to_keep]
-            question['answers'] = answers_to_keep
-            questions.append(question)
+            # The question is shared with the schema, so it is copied rather than changed
+            questions.append(dict(question, answers=answers_to_keep))
 
     reduced_block['questions'] = questions
 
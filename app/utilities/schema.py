@@ -1,17 +1,33 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+
 import requests
+from requests.adapters import HTTPAdapter
 import simplejson as json
 
+from flask import current_app, has_request_context
 from structlog import get_logger
 from werkzeug.exceptions import NotFound
 
+from app.instrumentation import increment
 from app.questionnaire.questionnaire_schema import QuestionnaireSchema, DEFAULT_LANGUAGE_CODE
-from app.setup import cache
+from app.templating.template_renderer import renderer
+from app.utilities import schema_snapshot
+from app.utilities.schema_cache import local_schema_cache, url_schema_cache
 
 logger = get_logger()
 
 DEFAULT_SCHEMA_DIR = 'data'
 
+# The session schemas are fetched from survey_url with, created by the first fetch in each process so it is never shared across a fork
+_session = None
+_session_lock = Lock()
+
+# Schemas are only preloaded in languages they have been translated into, rather than in English as a fallback
+PRELOAD_LANGUAGE_CODES = ('en', 'cy')
+
 
 def load_schema_from_metadata(metadata):
     if metadata.get('survey_url'):
@@ -23,12 +39,31 @@ def load_schema_from_session_data(session_data):
     return load_schema_from_metadata(vars(session_data))
 
 
-@cache.memoize()
 def load_schema_from_params(eq_id, form_type, language_code=None):
+    # The language is defaulted before caching, so a schema loaded without one is cached once with it
     language_code = language_code or DEFAULT_LANGUAGE_CODE
-    schema_json = _load_schema_file('{}_{}.json'.format(eq_id, form_type), language_code)
 
-    return QuestionnaireSchema(schema_json, language_code)
+    schema = schema_snapshot.get_schema('{}_{}'.format(eq_id, form_type), language_code)
+    if schema is not None:
+        return schema
+
+    return _get_cached(local_schema_cache, (eq_id, form_type, language_code),
+                       lambda _: _load_schema_from_params(eq_id, form_type, language_code))
+
+
+def _load_schema_from_params(eq_id, form_type, language_code):
+    schema_file = '{}_{}.json'.format(eq_id, form_type)
+    schema_json = _load_schema_file(schema_file, language_code)
+    size = os.path.getsize(_get_schema_file_path_or_default(schema_file, language_code))
+
+    return QuestionnaireSchema(schema_json, language_code, current_app.config['EQ_SCHEMA_LAZY_PARSING']), size, None
+
+
+def _get_cached(schema_cache, key, load):
+    if not current_app.config['EQ_ENABLE_CACHE']:
+        return load(None)[0]
+
+    return schema_cache.get_or_load(key, load)
 
 
 def _load_schema_file(schema_file, language_code):
@@ -37,12 +72,12 @@ def _load_schema_file(schema_file, language_code):
     :param schema_file: The name of the schema e.g. census_household.json
     :param language_code: ISO 2-character code for language e.g. 'en', 'cy'
     """
-    schema_path = get_schema_file_path(schema_file, language_code)
+    schema_path = _get_schema_file_path_or_default(schema_file, language_code)
 
-    if language_code != DEFAULT_LANGUAGE_CODE and not os.path.exists(schema_path):
+    if schema_path != get_schema_file_path(schema_file, language_code):
         logger.info("couldn't find requested language schema, falling back to 'en'",
-                    schema_file=schema_file, language_code=language_code, schema_path=schema_path)
-        schema_path = get_schema_file_path(schema_file, DEFAULT_LANGUAGE_CODE)
+                    schema_file=schema_file, language_code=language_code,
+                    schema_path=get_schema_file_path(schema_file, language_code))
 
     logger.info('loading schema', schema_file=schema_file, language_code=language_code, schema_path=schema_path)
 
@@ -55,21 +90,76 @@ def _load_schema_file(schema_file, language_code):
         raise e
 
 
-@cache.memoize()
+def _get_schema_file_path_or_default(schema_file, language_code):
+    """ The path of the schema in the language, or in English if it hasn't been translated into the language """
+    schema_path = get_schema_file_path(schema_file, language_code)
+    if language_code != DEFAULT_LANGUAGE_CODE and not os.path.exists(schema_path):
+        return get_schema_file_path(schema_file, DEFAULT_LANGUAGE_CODE)
+
+    return schema_path
+
+
 def load_schema_from_url(survey_url, language_code):
     language_code = language_code or DEFAULT_LANGUAGE_CODE
+
+    return _get_cached(url_schema_cache, (survey_url, language_code),
+                       lambda validators: _load_schema_from_url(survey_url, language_code, validators))
+
+
+def _load_schema_from_url(survey_url, language_code, validators=None):
+    """
+    Fetch the schema, unless it has not changed since it was fetched with `validators`
+
+    :param validators: a dict of the ETag and Last-Modified headers of the last response, if there was one
+    :return: the schema, or None if it has not changed, the size of its JSON and the validators of the response
+    """
     logger.info('loading schema from URL', survey_url=survey_url, language_code=language_code)
 
     constructed_survey_url = '{}?language={}'.format(survey_url, language_code)
 
-    req = requests.get(constructed_survey_url)
+    headers = {}
+    if validators and validators.get('ETag'):
+        headers['If-None-Match'] = validators['ETag']
+    if validators and validators.get('Last-Modified'):
+        headers['If-Modified-Since'] = validators['Last-Modified']
+
+    req = _get_session().get(constructed_survey_url, headers=headers, timeout=(
+        current_app.config['EQ_SURVEY_URL_CONNECT_TIMEOUT_SECONDS'], current_app.config['EQ_SURVEY_URL_READ_TIMEOUT_SECONDS']))
+
+    if req.status_code == 304:
+        return None, None, validators
+
     schema_response = req.content.decode()
 
     if req.status_code == 404:
         logger.error('no schema exists', survey_url=constructed_survey_url)
         raise NotFound
 
-    return QuestionnaireSchema(json.loads(schema_response), language_code)
+    response_validators = {header: req.headers[header] for header in ('ETag', 'Last-Modified') if header in req.headers}
+
+    lazy = current_app.config['EQ_SCHEMA_LAZY_PARSING']
+
+    # Error messages are translated with `force_locale`, which needs a request context, and schemas are reloaded in the background
+    if has_request_context():
+        schema = QuestionnaireSchema(json.loads(schema_response), language_code, lazy)
+    else:
+        with current_app.test_request_context():
+            schema = QuestionnaireSchema(json.loads(schema_response), language_code, lazy)
+
+    return schema, len(req.content), response_validators
+
+
+def _get_session():
+    global _session  # pylint: disable=global-statement
+
+    with _session_lock:
+        if _session is None:
+            pool_size = current_app.config['EQ_SURVEY_URL_MAX_POOL_CONNECTIONS']
+            _session = requests.Session()
+            _session.mount('http://', HTTPAdapter(pool_maxsize=pool_size))
+            _session.mount('https://', HTTPAdapter(pool_maxsize=pool_size))
+
+        return _session
 
 
 def get_schema_path(language_code, schema_dir=DEFAULT_SCHEMA_DIR):
@@ -79,3 +169,46 @@ def get_schema_path(language_code, schema_dir=DEFAULT_SCHEMA_DIR):
 def get_schema_file_path(schema_file, language_code):
     schema_dir = get_schema_path(language_code)
     return os.path.join(schema_dir, schema_file)
+
+
+def preload_schemas(application):
+    """
+    Load the schemas named by EQ_SCHEMA_PRELOAD, or all of them if it is '*', in every language they
+    are in, so that the first request for each of them does not have to. The templates in each schema
+    are compiled into the template cache too, until it is full, and lazily parsed schemas are parsed in full.
+    """
+    preload = application.config['EQ_SCHEMA_PRELOAD']
+    schema_names = None if preload == '*' else {name.strip() for name in preload.split(',')}
+
+    schemas_to_load = [(language_code, schema_name)
+                       for language_code in PRELOAD_LANGUAGE_CODES
+                       for schema_name in _get_schema_names(language_code)
+                       if schema_names is None or schema_name in schema_names]
+
+    def preload_schema(language_code, schema_name):
+        # Error messages are translated with `force_locale`, which needs a request context
+        with application.test_request_context():
+            try:
+                eq_id, form_type = schema_name.split('_', 1)
+                schema = load_schema_from_params(eq_id, form_type, language_code)
+                schema.materialise()
+                if not renderer.precompile(schema.json):
+                    increment('schema_templates_not_precompiled')
+                return True
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('could not preload schema', schema_name=schema_name, language_code=language_code)
+                return False
+
+    start = perf_counter()
+    with ThreadPoolExecutor(application.config['EQ_SCHEMA_PRELOAD_WORKERS'], thread_name_prefix='schema-preload') as executor:
+        loaded = sum(executor.map(lambda args: preload_schema(*args), schemas_to_load))
+    preload_ms = (perf_counter() - start) * 1000
+
+    increment('schemas_preloaded', loaded)
+    increment('schema_preload_ms', preload_ms)
+    logger.info('preloaded schemas', schemas=loaded, failed=len(schemas_to_load) - loaded, duration_ms=round(preload_ms))
+
+
+def _get_schema_names(language_code):
+    return sorted(os.path.splitext(schema_file)[0] for schema_file in os.listdir(get_schema_path(language_code))
+                  if schema_file.endswith('.json'))
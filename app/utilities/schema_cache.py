@@ -0,0 +1,180 @@
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+from threading import Lock
+from time import monotonic, perf_counter
+
+from structlog import get_logger
+
+from app import settings
+from app.instrumentation import increment
+from app.storage import executor
+
+logger = get_logger()
+
+_CachedSchema = namedtuple('_CachedSchema', 'schema size expires_at validators')
+
+
+class SchemaCache:
+    """
+    A per process cache of parsed schemas, shared by every request rather than copied for each.
+
+    The cache holds at most `max_bytes` of schemas, measured by the size of their JSON, removing the
+    least recently used first. If it is given a `ttl` each entry expires that many seconds after it was
+    stored, and for `stale_seconds` after that it is still used while it is reloaded in the background.
+    Requests for a schema which is being loaded wait for that load rather than loading it again.
+
+    Hits, misses, expiries, evictions and the time spent loading schemas are counted with the cache's
+    `name`, and reported by /status.
+    """
+    def __init__(self, name, max_bytes, ttl=None, stale_seconds=0):
+        self._name = name
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._stale_seconds = stale_seconds
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._size = 0
+        self._lock = Lock()
+
+    @property
+    def enabled(self):
+        return self._max_bytes > 0
+
+    @property
+    def size(self):
+        return self._size
+
+    def get_or_load(self, key, load):
+        """
+        Get the cached schema, or load and cache it.
+
+        :param load: a function which loads the schema, given the validators it returned when it last
+                     loaded it, or None. It returns the schema, the size of its JSON and the validators
+                     to load it with next time, or None for the schema if it has not changed.
+        :return: the schema
+        """
+        if not self.enabled:
+            return load(None)[0]
+
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.expires_at is None or entry.expires_at > now):
+                self._entries.move_to_end(key)
+                increment('{}_hit'.format(self._name))
+                return entry.schema
+
+            stale = entry is not None and now < entry.expires_at + self._stale_seconds
+            if stale:
+                reload = self._start_reload(key)
+            else:
+                loading = self._start_load(key, entry)
+
+        # Submitted outside the lock, which the reload takes, in case the executor runs it straight away
+        if stale:
+            return self._get_stale(key, load, entry, reload)
+
+        if loading is not None:
+            return self._wait_for_load(loading)
+
+        return self._load(key, load, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _start_reload(self, key):
+        """ Called with the lock held. :return: True if the stale schema is not already being reloaded """
+        increment('{}_stale'.format(self._name))
+        if key in self._loading:
+            return False
+
+        self._loading[key] = Future()
+        return True
+
+    def _start_load(self, key, entry):
+        """ Called with the lock held. :return: the Future of the load in flight, or None if there is none """
+        increment('{}_{}'.format(self._name, 'miss' if entry is None else 'expired'))
+        loading = self._loading.get(key)
+        if loading is None:
+            self._loading[key] = Future()
+        return loading
+
+    def _get_stale(self, key, load, entry, reload):
+        """ Get the stale schema, reloading it in the background if this request is to reload it """
+        if reload:
+            try:
+                executor.submit(self._reload, key, load, entry)
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(key)
+                raise
+        return entry.schema
+
+    def _wait_for_load(self, loading):
+        increment('{}_wait'.format(self._name))
+        return loading.result()
+
+    def _load(self, key, load, entry):
+        """ Load the schema, and give it to the requests waiting on it """
+        try:
+            start = perf_counter()
+            schema, size, validators = load(entry.validators if entry else None)
+            increment('{}_load_ms'.format(self._name), (perf_counter() - start) * 1000)
+
+            if schema is None:
+                increment('{}_not_modified'.format(self._name))
+                schema, size = entry.schema, entry.size
+
+            self._set(key, schema, size, validators)
+        except BaseException as e:
+            with self._lock:
+                self._loading.pop(key).set_exception(e)
+            raise
+
+        with self._lock:
+            self._loading.pop(key).set_result(schema)
+
+        return schema
+
+    def _reload(self, key, load, entry):
+        """ Reload a stale schema in the background, leaving it to be used until it has been reloaded """
+        try:
+            self._load(key, load, entry)
+        except Exception:  # pylint: disable=broad-except
+            increment('{}_reload_failed'.format(self._name))
+            logger.exception('could not reload schema', key=key)
+
+    def _set(self, key, schema, size, validators):
+        if size > self._max_bytes:
+            with self._lock:
+                self._pop(key)
+            return
+
+        expires_at = None if self._ttl is None else monotonic() + self._ttl
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = _CachedSchema(schema, size, expires_at, validators)
+            self._size += size
+            self._evict()
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def _evict(self):
+        while self._size > self._max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self._size -= entry.size
+            increment('{}_evicted'.format(self._name))
+
+
+# Schemas from survey_url can be anything, so they are kept apart from the schemas in `data` so they can't evict them
+local_schema_cache = SchemaCache('schema_cache', settings.EQ_SCHEMA_CACHE_MAX_BYTES)
+url_schema_cache = SchemaCache('url_schema_cache', settings.EQ_URL_SCHEMA_CACHE_MAX_BYTES,
+                               settings.EQ_URL_SCHEMA_CACHE_TTL_SECONDS, settings.EQ_URL_SCHEMA_CACHE_STALE_SECONDS)
@@ -0,0 +1,63 @@
+"""
+A snapshot of parsed schemas, built by `scripts/build_schema_snapshot.py`.
+
+The snapshot is loaded by the gunicorn master before it forks the workers, so that they share one
+copy of the schemas rather than each parsing their own. Every request is given the same schema
+object, so its json must be copied rather than changed. Only the modules needed to unpickle the
+schemas are imported here, so that loading the snapshot does not set up the rest of the app.
+"""
+import os
+import pickle
+
+from structlog import get_logger
+
+logger = get_logger()
+
+# Incremented whenever the snapshot changes in a way older code can't read
+SNAPSHOT_FORMAT_VERSION = 2
+
+# Parsed schemas by schema name, e.g. census_household, and language code
+_schemas = {}
+_loaded_files = set()
+
+
+def get_schema(schema_name, language_code):
+    """
+    :return: the snapshot's `QuestionnaireSchema` for the schema in the language, or None if it has none
+    """
+    return _schemas.get((schema_name, language_code))
+
+
+def load_snapshot(snapshot_file):
+    """
+    Load the schemas in the snapshot, unless it has already been loaded, as it has in a gunicorn worker
+    if the master loaded it
+    """
+    if snapshot_file in _loaded_files:
+        return
+
+    with open(snapshot_file, 'rb') as snapshot:
+        format_version, schemas = pickle.load(snapshot)
+
+    if format_version != SNAPSHOT_FORMAT_VERSION:
+        logger.warning('not loading schema snapshot of an unsupported format', snapshot_file=snapshot_file,
+                       format_version=format_version)
+        return
+
+    _schemas.update(schemas)
+    _loaded_files.add(snapshot_file)
+    logger.info('loaded schema snapshot', snapshot_file=snapshot_file, schemas=len(schemas),
+                size=os.path.getsize(snapshot_file))
+
+
+def write_snapshot(snapshot_file, schemas):
+    """
+    :param schemas: a dict of each `QuestionnaireSchema` by its schema name and language code
+    """
+    with open(snapshot_file, 'wb') as snapshot:
+        pickle.dump((SNAPSHOT_FORMAT_VERSION, schemas), snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def clear():
+    _schemas.clear()
+    _loaded_files.clear()
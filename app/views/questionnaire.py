@@ -84,7 +84,7 @@ def before_questionnaire_request():
     language_code = request.args.get('language_code')
     if language_code:
         session_data.language_code = language_code
-        session_store.save()
+        session_store.save(defer=True)
 
     g.schema = load_schema_from_session_data(session_data)
 
@@ -171,9 +171,11 @@ def post_block(routing_path, schema, metadata, collection_metadata, answer_store
         _set_started_at_metadata_if_required(form, collection_metadata)
         questionnaire_store = get_questionnaire_store(current_user.user_id, current_user.user_ik)
         answer_store_updater = AnswerStoreUpdater(current_location, schema, questionnaire_store)
-        answer_store_updater.save_answers(form)
+        answer_store_updater.update_answers(form)
 
+        # Find the next location before saving, so the routing path for the new answers is saved with them
         next_location = path_finder.get_next_location(current_location=current_location)
+        questionnaire_store.add_or_update()
 
         if _is_end_of_questionnaire(block, next_location):
             return submit_answers(routing_path, eq_id, form_type, schema)
@@ -227,10 +229,11 @@ def post_household_composition(routing_path, schema, metadata, answer_store, **k
         return response
 
     if form.validate():
-        answer_store_updater.save_answers(form)
+        answer_store_updater.update_answers(form)
 
         metadata = get_metadata(current_user)
         next_location = path_finder.get_next_location(current_location=current_location)
+        questionnaire_store.add_or_update()
 
         return redirect(next_location.url(metadata))
 
@@ -553,15 +556,22 @@ def _save_sign_out(routing_path, current_location, form, schema, answer_store, m
 
 
 def _evaluate_skip_conditions(block_json, location, schema, answer_store, metadata):
+    """ returns a copy of the block with skipped questions marked and their answers made optional. The
+    block is shared with every other request using the schema, so it is not changed in place """
+    if not any('skip_conditions' in question for question in schema.get_questions_for_block(block_json)):
+        return block_json
+
+    questions = []
     for question in schema.get_questions_for_block(block_json):
         if 'skip_conditions' in question:
             skip_question = evaluate_skip_conditions(question['skip_conditions'], schema, metadata, answer_store, location.group_instance)
-            question['skipped'] = skip_question
-            for answer in question['answers']:
-                if answer['mandatory'] and skip_question:
-                    answer['mandatory'] = False
+            answers = question['answers']
+            if skip_question:
+                answers = [dict(answer, mandatory=False) if answer['mandatory'] else answer for answer in answers]
+            question = dict(question, skipped=skip_question, answers=answers)
+        questions.append(question)
 
-    return block_json
+    return dict(block_json, questions=questions)
 
 
 def _redirect_to_location(collection_id, eq_id, form_type, location):
@@ -9,7 +9,7 @@ from structlog import get_logger
 from werkzeug.exceptions import Unauthorized
 
 from app.authentication.authenticator import store_session, decrypt_token
-from app.authentication.jti_claim_storage import JtiTokenUsed, use_jti_claim
+from app.authentication.jti_claim_storage import JtiTokenUsed, use_jti_claim_async
 from app.globals import get_completeness, get_session_timeout_in_seconds
 from app.helpers.path_finder_helper import path_finder
 from app.questionnaire.router import Router
@@ -49,7 +49,9 @@ def login():
         cookie_session.clear()
 
     decrypted_token = decrypt_token(request.args.get('token'))
-    validate_jti(decrypted_token)
+
+    # the jti claim is stored while the claims are parsed and the schema loaded
+    jti_claim_used = validate_jti(decrypted_token)
 
     claims = parse_runner_claims(decrypted_token)
 
@@ -57,6 +59,8 @@ def login():
     schema_metadata = g.schema.json['metadata']
     validate_metadata(claims, schema_metadata)
 
+    wait_for_jti_claim(jti_claim_used)
+
     eq_id = claims['eq_id']
     form_type = claims['form_type']
     tx_id = claims['tx_id']
@@ -93,13 +97,18 @@ def validate_jti(decrypted_token):
 
     jti_claim = decrypted_token.get('jti')
     try:
-        use_jti_claim(jti_claim, expires)
-    except JtiTokenUsed as e:
-        raise Unauthorized from e
+        return use_jti_claim_async(jti_claim, expires)
     except (TypeError, ValueError) as e:
         raise InvalidTokenException from e
 
 
+def wait_for_jti_claim(jti_claim_used):
+    try:
+        jti_claim_used.result()
+    except JtiTokenUsed as e:
+        raise Unauthorized from e
+
+
 @session_blueprint.route('/timeout-continue', methods=['GET'])
 @login_required
 def get_timeout_continue():
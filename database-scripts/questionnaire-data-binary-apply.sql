@@ -0,0 +1,2 @@
+ALTER TABLE questionnaire_state
+  ADD COLUMN questionnaire_data_binary BYTEA;
@@ -0,0 +1,10 @@
+CREATE TABLE questionnaire_state_delta (
+  userid VARCHAR NOT NULL,
+  sequence INTEGER NOT NULL,
+  questionnaire_data_binary BYTEA,
+  version INTEGER,
+  base_revision VARCHAR,
+  created_at TIMESTAMP,
+  updated_at TIMESTAMP,
+  PRIMARY KEY (userid, sequence)
+);
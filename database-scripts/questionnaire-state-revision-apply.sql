@@ -0,0 +1,2 @@
+ALTER TABLE questionnaire_state
+  ADD COLUMN revision VARCHAR;
@@ -0,0 +1,23 @@
+"""
+gunicorn settings for docker-entrypoint.sh.
+
+With EQ_SCHEMA_SNAPSHOT_FILE set, the master loads the schema snapshot before it forks the workers, so
+they share the parsed schemas copy-on-write. Only the snapshot is loaded in the master rather than the
+app, with `preload_app`, so that the workers do not share its connections to DynamoDB and the database.
+"""
+import gc
+import os
+
+bind = '0.0.0.0:5000'
+workers = 3
+worker_class = 'gevent'
+
+
+def on_starting(server):  # pylint: disable=unused-argument
+    snapshot_file = os.getenv('EQ_SCHEMA_SNAPSHOT_FILE')
+    if snapshot_file:
+        from app.utilities.schema_snapshot import load_snapshot
+        load_snapshot(snapshot_file)
+
+        # Keep the garbage collector from writing to the snapshot's pages, which would copy them into each worker
+        gc.freeze()
@@ -0,0 +1,69 @@
+"""
+Memory benchmark for the answers held in an AnswerStore.
+
+Builds synthetic answers for every schema in `data/en`, takes the largest resulting state and
+compares the memory used to hold its answers as a dict per answer, how the AnswerStore held them
+previously, against the AnswerStore's `AnswerRecord`s.
+
+Run from the project root with:
+
+    python -m scripts.benchmarks.answer_memory
+"""
+import argparse
+import tracemalloc
+from collections import defaultdict
+
+import simplejson as json
+
+from app.data_model.answer_store import AnswerStore
+from scripts.benchmarks.synthetic import build_answers, load_schema_json, schema_names
+
+
+def dict_answer_map(answers):
+    answer_map = defaultdict(list)
+
+    for answer in answers:
+        answer_map[answer['answer_id']].append(dict(answer))
+
+    return answer_map
+
+
+def measure(function, *args):
+    """ Returns the memory retained by, and the peak memory allocated during, `function(*args)` """
+    tracemalloc.start()
+    result = function(*args)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memory used by AnswerStore answers')
+    parser.add_argument('--repeats', type=int, default=25, help='Number of times repeating groups are answered')
+    args = parser.parse_args()
+
+    largest_schema, largest_answers = None, []
+    for schema_name in schema_names():
+        answers = build_answers(load_schema_json(schema_name), repeats=args.repeats)
+        if len(answers) > len(largest_answers):
+            largest_schema, largest_answers = schema_name, answers
+
+    serialised = json.dumps(largest_answers)
+    print('{}: {} answers, {} bytes serialised'.format(largest_schema, len(largest_answers), len(serialised)))  # noqa: T001
+    print('{:<36} {:>14} {:>14} {:>16}'.format('case', 'retained (KB)', 'peak (KB)', 'bytes / answer'))  # noqa: T001
+
+    cases = [
+        ('dict per answer', lambda: dict_answer_map(json.loads(serialised, use_decimal=True))),
+        ('AnswerStore records', lambda: AnswerStore(json.loads(serialised, use_decimal=True))),
+        ('AnswerStore records, escaped', lambda: AnswerStore(json.loads(serialised, use_decimal=True)).escaped()),
+    ]
+
+    for name, function in cases:
+        retained, peak = measure(function)
+        print('{:<36} {:>14.1f} {:>14.1f} {:>16.1f}'.format(name, retained / 1024, peak / 1024, retained / len(largest_answers)))  # noqa: T001
+
+
+if __name__ == '__main__':
+    main()
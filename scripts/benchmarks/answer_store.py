@@ -0,0 +1,96 @@
+"""
+Micro-benchmark of AnswerStore lookups on a census household of 25 people.
+
+Compares the indexed AnswerStore against a linear scan over the same answers, which is how
+`filter` and `find` behaved before the store was indexed.
+
+Run from the project root with:
+
+    python -m scripts.benchmarks.answer_store
+"""
+import argparse
+import itertools
+import timeit
+
+from app.data_model.answer import Answer
+from app.data_model.answer_store import AnswerStore
+from scripts.benchmarks.synthetic import build_answers, load_schema_json
+
+
+def linear_filter(answer_map, answer_ids=None, group_instance=None, group_instance_id=None, answer_instance=None):
+    filter_vars = {
+        'answer_id': answer_ids,
+        'answer_instance': answer_instance,
+        'group_instance_id': group_instance_id,
+        'group_instance': group_instance,
+    }
+
+    if answer_ids:
+        answers = itertools.chain.from_iterable(answer_map.get(answer_id, []) for answer_id in answer_ids)
+    else:
+        answers = itertools.chain.from_iterable(answer_map.values())
+
+    return [
+        answer for answer in answers
+        if all(
+            answer[key] in value if isinstance(value, list) else answer[key] == value
+            for key, value in filter_vars.items()
+            if value is not None
+        )
+    ]
+
+
+def linear_find(answer_map, answer):
+    for index, existing in enumerate(answer_map.get(answer.answer_id, [])):
+        if answer.matches_dict(existing):
+            return index
+
+    return None
+
+
+def _time(statement, number):
+    return min(timeit.repeat(statement, number=number, repeat=3)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AnswerStore lookups')
+    parser.add_argument('--schema', default='census_household.json')
+    parser.add_argument('--repeats', type=int, default=25, help='Number of people in the household')
+    parser.add_argument('--number', type=int, default=20, help='Iterations per measurement')
+    args = parser.parse_args()
+
+    answers = build_answers(load_schema_json(args.schema), repeats=args.repeats)
+    store = AnswerStore(answers)
+    answer_map = store.answer_map
+
+    answer_ids = list(answer_map.keys())
+    group_instance_ids = sorted({answer['group_instance_id'] for answer in answers if answer['group_instance_id']})
+    lookups = [Answer(answer['answer_id'], answer['value'], answer['group_instance_id'],
+                      answer['group_instance'], answer['answer_instance']) for answer in answers[::7]]
+
+    cases = [
+        ('filter by answer_id and group_instance',
+         lambda: [list(store.filter(answer_ids=[answer_id], group_instance=1)) for answer_id in answer_ids],
+         lambda: [linear_filter(answer_map, answer_ids=[answer_id], group_instance=1) for answer_id in answer_ids]),
+        ('filter by group_instance_id',
+         lambda: [list(store.filter(group_instance_id=group_instance_id)) for group_instance_id in group_instance_ids],
+         lambda: [linear_filter(answer_map, group_instance_id=group_instance_id) for group_instance_id in group_instance_ids]),
+        ('filter by answer_instance',
+         lambda: [list(store.filter(answer_instance=answer_instance)) for answer_instance in range(args.repeats)],
+         lambda: [linear_filter(answer_map, answer_instance=answer_instance) for answer_instance in range(args.repeats)]),
+        ('find',
+         lambda: [store.find(answer) for answer in lookups],
+         lambda: [linear_find(answer_map, answer) for answer in lookups]),
+    ]
+
+    print('{} answers, {} answer ids, {} group instance ids'.format(len(store), len(answer_ids), len(group_instance_ids)))  # noqa: T001
+    print('{:<40} {:>12} {:>12} {:>9}'.format('case', 'linear (ms)', 'indexed (ms)', 'speed-up'))  # noqa: T001
+
+    for name, indexed, linear in cases:
+        indexed_time = _time(indexed, args.number) * 1000
+        linear_time = _time(linear, args.number) * 1000
+        print('{:<40} {:>12.3f} {:>12.3f} {:>8.1f}x'.format(name, linear_time, indexed_time, linear_time / indexed_time))  # noqa: T001
+
+
+if __name__ == '__main__':
+    main()
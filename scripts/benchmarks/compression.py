@@ -0,0 +1,67 @@
+"""
+Benchmark of the codecs questionnaire state can be compressed with, on synthetic state for the
+schemas in `data/<language>`.
+
+Reports the compression ratio and the mean time to compress and decompress a state for snappy,
+zlib without a dictionary, and each codec in `app.storage.compression.CODECS`. The dictionaries
+are built from the English schemas, so `--language cy` gives a fairer view of how they do on
+state they were not built from.
+
+Run from the project root with:
+
+    python -m scripts.benchmarks.compression
+"""
+import argparse
+import timeit
+import zlib
+
+import snappy
+
+from app.storage.compression import CODECS
+from scripts.benchmarks.synthetic import build_questionnaire_state, load_schema_json, schema_names
+
+
+def _mean_microseconds(function, states, number):
+    def run_all():
+        for state in states:
+            function(state)
+
+    return min(timeit.repeat(run_all, number=number, repeat=3)) / number / len(states) * 1e6
+
+
+def _codecs():
+    codecs = [('snappy', snappy.compress, snappy.uncompress), ('zlib', zlib.compress, zlib.decompress)]
+    codecs.extend((codec.name, codec.compress, codec.decompress) for codec in CODECS.values() if codec.name != 'snappy')
+    return codecs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark questionnaire state compression codecs')
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--pattern', default='', help='Benchmark schemas with this in their name')
+    parser.add_argument('--repeats', type=int, default=3, help='Number of instances of repeating groups')
+    parser.add_argument('--number', type=int, default=5, help='Runs over all states per measurement')
+    args = parser.parse_args()
+
+    states = [build_questionnaire_state(load_schema_json(schema_name, args.language), args.repeats).encode('utf-8')
+              for schema_name in schema_names(args.language) if args.pattern in schema_name]
+    state_size = sum(len(state) for state in states)
+
+    print('{} states, mean size {:.0f} bytes'.format(len(states), state_size / len(states)))  # noqa: T001
+    print(  # noqa: T001
+        '{:<32} {:>9} {:>10} {:>15} {:>17}'.format(
+            'codec', 'ratio', 'mean (B)', 'compress (us)', 'decompress (us)'))
+
+    for name, compress, decompress in _codecs():
+        compressed_states = [compress(state) for state in states]
+        compressed_size = sum(len(compressed_state) for compressed_state in compressed_states)
+
+        print(  # noqa: T001
+            '{:<32} {:>9.2f} {:>10.0f} {:>15.1f} {:>17.1f}'.format(
+                name, state_size / compressed_size, compressed_size / len(states),
+                _mean_microseconds(compress, states, args.number),
+                _mean_microseconds(decompress, compressed_states, args.number)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Load test of `data_access` against a local DynamoDB stand-in, comparing storage requests made one
+after another with the same requests made concurrently through the futures `data_access` returns.
+
+The stand-in is moto's DynamoDB server run in a subprocess, which waits `--latency` milliseconds
+before each response so that, as with DynamoDB, most of the time of a request is spent waiting.
+The load test is run under gevent monkey patching, as the gunicorn gevent worker runs the app, with
+`--users` greenlets each making `--requests` requests. Each request does what `/session` does with
+storage: it uses a new jti claim and reads the user's questionnaire state, while loading the schema.
+The stand-in is a single process, so with many users the load test measures moto rather than the app.
+
+Run from the project root, with the settings from `scripts/dev_settings.sh`, with:
+
+    python -m scripts.benchmarks.dynamodb_concurrency
+"""
+# pylint: disable=wrong-import-position,wrong-import-order
+# gevent must patch the standard library before anything else imports it, as gunicorn does
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse  # noqa: E402
+import os  # noqa: E402
+import socket  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from datetime import datetime, timedelta  # noqa: E402
+from uuid import uuid4  # noqa: E402
+
+import gevent  # noqa: E402
+from dateutil.tz import tzutc  # noqa: E402
+
+from app.authentication.jti_claim_storage import use_jti_claim, use_jti_claim_async  # noqa: E402
+from app.data_model.app_models import QuestionnaireState  # noqa: E402
+from app.data_model.questionnaire_store import QuestionnaireStore  # noqa: E402
+from app.setup import create_app  # noqa: E402
+from app.storage import data_access  # noqa: E402
+from app.storage.data_access import TABLE_CONFIG, get_table_name, is_dynamodb_read_enabled  # noqa: E402
+from app.utilities.schema import load_schema_from_metadata  # noqa: E402
+from scripts.benchmarks.synthetic import METADATA  # noqa: E402
+
+USER_ID = 'load-test-user'
+
+
+def serve(port, latency):
+    from moto.server import create_backend_app
+    from werkzeug.serving import run_simple
+
+    backend_app = create_backend_app('dynamodb2')
+
+    def delayed_app(environ, start_response):
+        time.sleep(latency)
+        return backend_app(environ, start_response)
+
+    run_simple('127.0.0.1', port, delayed_app, threaded=True)
+
+
+def _free_port():
+    with socket.socket() as free_socket:
+        free_socket.bind(('127.0.0.1', 0))
+        return free_socket.getsockname()[1]
+
+
+def _start_server(latency_ms):
+    port = _free_port()
+    server = subprocess.Popen([sys.executable, '-m', 'scripts.benchmarks.dynamodb_concurrency',
+                               '--serve', str(port), '--latency', str(latency_ms)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return server, port
+        except ConnectionRefusedError:
+            time.sleep(0.1)
+
+    server.kill()
+    raise RuntimeError('DynamoDB stand-in did not start')
+
+
+def _create_tables(application):
+    for config in TABLE_CONFIG.values():
+        if is_dynamodb_read_enabled(config) and get_table_name(config) and 'range_field' not in config:
+            application.eq['dynamodb'].create_table(
+                TableName=get_table_name(config),
+                AttributeDefinitions=[{'AttributeName': config['key_field'], 'AttributeType': 'S'}],
+                KeySchema=[{'AttributeName': config['key_field'], 'KeyType': 'HASH'}],
+                ProvisionedThroughput={'ReadCapacityUnits': 1, 'WriteCapacityUnits': 1})
+
+
+def _expires():
+    return datetime.now(tz=tzutc()) + timedelta(minutes=5)
+
+
+def sequential_request():
+    use_jti_claim(str(uuid4()), _expires())
+    data_access.get_by_key(QuestionnaireState, USER_ID)
+    load_schema_from_metadata(METADATA)
+
+
+def concurrent_request():
+    jti_claim_used = use_jti_claim_async(str(uuid4()), _expires())
+    questionnaire_state = data_access.get_by_key_async(QuestionnaireState, USER_ID)
+    load_schema_from_metadata(METADATA)
+
+    jti_claim_used.result()
+    questionnaire_state.result()
+
+
+def _run_user(application, request, number, timings):
+    for _ in range(number):
+        with application.app_context():
+            start = time.perf_counter()
+            request()
+            timings.append(time.perf_counter() - start)
+
+
+def _percentile(timings, percentile):
+    return sorted(timings)[min(len(timings) - 1, int(len(timings) * percentile / 100))] * 1000
+
+
+def run(application, request, users, number):
+    timings = []
+    start = time.perf_counter()
+    gevent.joinall([gevent.spawn(_run_user, application, request, number, timings) for _ in range(users)])
+    elapsed = time.perf_counter() - start
+
+    return _percentile(timings, 50), _percentile(timings, 99), len(timings) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test sequential against concurrent DynamoDB requests')
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--latency', type=float, default=20, help='Milliseconds the stand-in waits per request')
+    parser.add_argument('--users', type=int, default=5, help='Concurrent users')
+    parser.add_argument('--requests', type=int, default=25, help='Requests per user')
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.latency / 1000)
+        return
+
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        os.environ.setdefault(name, 'load-test')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+
+    server, port = _start_server(args.latency)
+    try:
+        application = create_app({
+            'EQ_DYNAMODB_ENDPOINT': 'http://127.0.0.1:{}'.format(port),
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        })
+        with application.app_context():
+            _create_tables(application)
+            data_access.put(QuestionnaireState(USER_ID, '{}', QuestionnaireStore.LATEST_VERSION))
+            load_schema_from_metadata(METADATA)
+
+        print('{} users, {} requests each, {:.0f}ms DynamoDB latency, pool of {}'.format(  # noqa: T001
+            args.users, args.requests, args.latency, application.config['EQ_DYNAMODB_MAX_POOL_CONNECTIONS']))
+        print('{:<12} {:>9} {:>9} {:>14}'.format('requests', 'p50 (ms)', 'p99 (ms)', 'requests (/s)'))  # noqa: T001
+
+        for name, request in (('sequential', sequential_request), ('concurrent', concurrent_request)):
+            p50, p99, rate = run(application, request, args.users, args.requests)
+            print('{:<12} {:>9.1f} {:>9.1f} {:>14.0f}'.format(name, p50, p99, rate))  # noqa: T001
+    finally:
+        server.kill()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark of `PathFinder.build_path` over every schema in `data/<language>`.
+
+Compares path building using the (group_id, group_instance, block_id) block position index
+against a linear scan of the blocks for every step, which is how `build_path` located blocks
+before the index was added. Every answer in the schema is given a synthetic value and repeating
+groups are answered `--repeats` times.
+
+Run from the project root with:
+
+    python -m scripts.benchmarks.path_finder
+"""
+import argparse
+import time
+
+from app.data_model.answer_store import AnswerStore
+from app.questionnaire.path_finder import PathFinder
+from app.questionnaire.questionnaire_schema import QuestionnaireSchema
+from scripts.benchmarks.synthetic import MAX_REPEATS, build_answers, load_schema_json, schema_names
+
+
+class LinearScanPathFinder(PathFinder):
+
+    @staticmethod
+    def _block_index_for_location(block_indexes, location):
+        # `block_indexes` is in block order, so this visits blocks the way the old enumerate did
+        key = (location.group_id, location.group_instance, location.block_id)
+        return next((index for (block_key, index) in block_indexes.items() if block_key == key), None)
+
+
+def _time_build_path(path_finder_class, schema, answer_store, number):
+    # Routing backwards removes answers, so each run gets its own copy of the answers
+    path_finders = [path_finder_class(schema, answer_store.copy(), metadata={}, completed_blocks=[])
+                    for _ in range(number)]
+
+    timings = []
+    for path_finder in path_finders:
+        start = time.perf_counter()
+        path = path_finder.build_path()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings), len(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PathFinder.build_path over all schemas')
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--repeats', type=int, default=MAX_REPEATS, help='Number of instances of repeating groups')
+    parser.add_argument('--number', type=int, default=5, help='Path builds per measurement')
+    args = parser.parse_args()
+
+    print(  # noqa: T001
+        '{:<60} {:>7} {:>7} {:>12} {:>12} {:>9}'.format(
+            'schema', 'blocks', 'path', 'linear (ms)', 'indexed (ms)', 'speed-up'))
+
+    total_linear = total_indexed = 0
+
+    for schema_name in schema_names(args.language):
+        schema_json = load_schema_json(schema_name, args.language)
+        schema = QuestionnaireSchema(schema_json, args.language)
+        answer_store = AnswerStore(build_answers(schema_json, repeats=args.repeats))
+
+        try:
+            indexed_time, path_length = _time_build_path(PathFinder, schema, answer_store, args.number)
+            linear_time, _ = _time_build_path(LinearScanPathFinder, schema, answer_store, args.number)
+        except Exception as e:  # pylint: disable=broad-except
+            print('{:<60} skipped: {!r}'.format(schema_name, e))  # noqa: T001
+            continue
+
+        total_linear += linear_time
+        total_indexed += indexed_time
+
+        print(  # noqa: T001
+            '{:<60} {:>7} {:>7} {:>12.3f} {:>12.3f} {:>8.1f}x'.format(
+                schema_name, len(schema.blocks), path_length,
+                linear_time * 1000, indexed_time * 1000, linear_time / indexed_time))
+
+    print(  # noqa: T001
+        '{:<60} {:>7} {:>7} {:>12.3f} {:>12.3f} {:>8.1f}x'.format(
+            'total', '', '', total_linear * 1000, total_indexed * 1000, total_linear / total_indexed))
+
+
+if __name__ == '__main__':
+    main()
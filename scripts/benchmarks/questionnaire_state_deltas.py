@@ -0,0 +1,94 @@
+"""
+Benchmark of how much questionnaire state is written as a questionnaire is completed, saving the
+state in full on every page against saving deltas with `deltas_before_compaction`.
+
+Each schema in `data/<language>` is completed one block at a time with synthetic answers, saving
+the state after each block as `QuestionnaireStore.add_or_update` does on a POST. The sizes are of
+the data as it is stored, compressed with the codec of the latest storage version but before
+encryption, which adds the same few bytes to every write.
+
+Run from the project root with:
+
+    python -m scripts.benchmarks.questionnaire_state_deltas
+"""
+import argparse
+
+from app.data_model.answer import Answer
+from app.data_model.questionnaire_store import QuestionnaireStore
+from app.storage.compression import get_codec
+from scripts.benchmarks.synthetic import METADATA, build_block_answers, load_schema_json, schema_names
+
+
+class _SizeRecordingStorage:
+    """
+    Storage which keeps the state in memory and records the size of every write
+    """
+    def __init__(self):
+        self._codec = get_codec(QuestionnaireStore.LATEST_VERSION)
+        self._data = None
+        self._deltas = []
+        self.write_sizes = []
+
+    def get_user_data(self):
+        return self._data, QuestionnaireStore.LATEST_VERSION
+
+    def get_deltas(self):
+        return list(self._deltas)
+
+    def add_delta(self, data, version):  # pylint: disable=unused-argument
+        self._deltas.append(data)
+        self.write_sizes.append(len(self._codec.compress(data)))
+        return True
+
+    def add_or_update(self, data, version):  # pylint: disable=unused-argument
+        self._data = data
+        self._deltas = []
+        self.write_sizes.append(len(self._codec.compress(data)))
+
+
+def complete_questionnaire(schema_json, repeats, deltas_before_compaction):
+    storage = _SizeRecordingStorage()
+
+    questionnaire_store = QuestionnaireStore(storage, deltas_before_compaction=deltas_before_compaction)
+    questionnaire_store.set_metadata(METADATA)
+    questionnaire_store.add_or_update()
+
+    for location, answers in build_block_answers(schema_json, repeats):
+        # Each page is a new request, which loads the state saved by the last
+        questionnaire_store = QuestionnaireStore(storage, deltas_before_compaction=deltas_before_compaction)
+        for answer in answers:
+            questionnaire_store.answer_store.add_or_update(Answer(**answer))
+        questionnaire_store.completed_blocks.append(location)
+        questionnaire_store.add_or_update()
+
+    return storage.write_sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark questionnaire state saved in full against deltas')
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--pattern', default='census', help='Benchmark schemas with this in their name')
+    parser.add_argument('--repeats', type=int, default=25, help='Number of instances of repeating groups')
+    parser.add_argument('--deltas', type=int, default=20, help='Deltas saved before the state is saved in full')
+    args = parser.parse_args()
+
+    print(  # noqa: T001
+        '{:<32} {:<7} {:>7} {:>12} {:>14} {:>13}'.format(
+            'schema', 'saves', 'writes', 'total (kB)', 'mean (bytes)', 'last (bytes)'))
+
+    for schema_name in schema_names(args.language):
+        if args.pattern not in schema_name:
+            continue
+
+        schema_json = load_schema_json(schema_name, args.language)
+        for saves, deltas_before_compaction in (('full', 0), ('deltas', args.deltas)):
+            write_sizes = complete_questionnaire(schema_json, args.repeats, deltas_before_compaction)
+
+            print(  # noqa: T001
+                '{:<32} {:<7} {:>7} {:>12.1f} {:>14.0f} {:>13}'.format(
+                    schema_name, saves, len(write_sizes), sum(write_sizes) / 1000,
+                    sum(write_sizes) / len(write_sizes), write_sizes[-1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark of the two formats questionnaire state is encrypted into by `StorageEncryption`.
+
+Compares the compact JWE string written before questionnaire store version 4 against the storage
+envelope of version byte, nonce, ciphertext and tag written since. Both use AES-256-GCM with the
+same key, so the difference is the cost of the JWE serialisation. The state is built from the
+synthetic answers for each schema and snappy compressed, as `EncryptedQuestionnaireStorage` does.
+
+Run from the project root with:
+
+    python -m scripts.benchmarks.storage_encryption
+"""
+import argparse
+import timeit
+
+import simplejson as json
+import snappy
+
+from app.storage.storage_encryption import StorageEncryption
+from scripts.benchmarks.synthetic import build_answers, load_schema_json, schema_names
+
+
+def _operations_per_second(operation, number):
+    return number / min(timeit.repeat(operation, number=number, repeat=3))
+
+
+def _measure(encrypt, decrypt, data, number):
+    encrypted_data = encrypt(data)
+    encrypt_rate = _operations_per_second(lambda: encrypt(data), number)
+    decrypt_rate = _operations_per_second(lambda: decrypt(encrypted_data), number)
+    return len(encrypted_data), encrypt_rate, decrypt_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JWE against storage envelope encryption')
+    parser.add_argument('--pattern', default='census', help='Benchmark schemas with this in their name')
+    parser.add_argument('--repeats', type=int, default=5, help='Number of instances of repeating groups')
+    parser.add_argument('--number', type=int, default=500, help='Operations per measurement')
+    args = parser.parse_args()
+
+    encrypter = StorageEncryption('user_id', 'user_ik', 'pepper')
+
+    print(  # noqa: T001
+        '{:<40} {:<9} {:>9} {:>14} {:>14}'.format(
+            'schema', 'format', 'size (B)', 'encrypt (/s)', 'decrypt (/s)'))
+
+    for schema_name in schema_names():
+        if args.pattern not in schema_name:
+            continue
+
+        state = json.dumps({'answers': build_answers(load_schema_json(schema_name), repeats=args.repeats)})
+        data = snappy.compress(state)
+
+        for format_name, encrypt in (('jwe', encrypter.encrypt_data), ('envelope', encrypter.encrypt_data_as_envelope)):
+            size, encrypt_rate, decrypt_rate = _measure(encrypt, encrypter.decrypt_data, data, args.number)
+
+            print(  # noqa: T001
+                '{:<40} {:<9} {:>9} {:>14.0f} {:>14.0f}'.format(
+                    schema_name, format_name, size, encrypt_rate, decrypt_rate))
+
+
+if __name__ == '__main__':
+    main()
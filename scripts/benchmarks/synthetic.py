@@ -0,0 +1,138 @@
+"""
+Helpers for building synthetic questionnaire data from the schemas in `data/`, for use by the benchmarks.
+"""
+import os
+from uuid import uuid4
+
+import simplejson as json
+
+from app.data_model.answer_store import AnswerStore
+from app.data_model.questionnaire_store import QuestionnaireStore
+from app.questionnaire.location import Location
+from app.questionnaire.routing_path import RoutingPath
+
+SCHEMA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+
+MAX_REPEATS = 25
+
+METADATA = {
+    'ru_ref': '12345678901A',
+    'ru_name': 'ESSENTIAL ENTERPRISE LTD.',
+    'trad_as': 'ESSENTIAL ENTERPRISE LTD.',
+    'collection_exercise_sid': '789',
+    'ref_p_start_date': '2016-01-01',
+    'ref_p_end_date': '2016-12-31',
+    'return_by': '2017-01-31',
+    'employment_date': '2016-06-10',
+    'region_code': 'GB-ENG',
+    'language_code': 'en',
+    'account_service_url': 'https://upstream.example.com',
+    'user_id': '64389274239',
+    'eq_id': '1',
+    'form_type': '0205',
+    'period_id': '201605',
+    'period_str': 'May 2016',
+}
+
+
+def load_schema_json(schema_name, language_code='en'):
+    with open(os.path.join(SCHEMA_DIR, language_code, schema_name), encoding='utf8') as schema_file:
+        return json.load(schema_file, use_decimal=True)
+
+
+def schema_names(language_code='en'):
+    return sorted(name for name in os.listdir(os.path.join(SCHEMA_DIR, language_code)) if name.endswith('.json'))
+
+
+def _is_repeating_group(group):
+    return any('repeat' in rule for rule in group.get('routing_rules', []))
+
+
+def _answer_schemas(question):
+    for answer in question.get('answers', []):
+        yield answer
+        for option in answer.get('options', []):
+            if 'detail_answer' in option:
+                yield option['detail_answer']
+
+
+def _synthetic_value(answer):
+    answer_type = answer.get('type')
+
+    if answer_type in ('Number', 'Currency', 'Percentage', 'Unit', 'Duration'):
+        return 42
+    if answer_type == 'Date':
+        return '1990-01-01'
+    if answer_type == 'MonthYearDate':
+        return '1990-01'
+    if answer_type == 'Checkbox':
+        return [option['value'] for option in answer.get('options', [])[:2]]
+    if answer_type in ('Radio', 'Dropdown', 'Relationship') and answer.get('options'):
+        return answer['options'][0]['value']
+
+    return 'Synthetic answer for {}'.format(answer['id'])
+
+
+def build_block_answers(schema_json, repeats=MAX_REPEATS):
+    """
+    Generate the location of each block in the schema, in order, with a list of answer dicts giving
+    every answer in the block a value. Repeating groups are answered `repeats` times, as are
+    `RepeatingAnswer` questions, e.g. a census household of `repeats` people.
+    """
+    for section in schema_json.get('sections', []):
+        for group in section['groups']:
+            group_instances = repeats if _is_repeating_group(group) else 1
+
+            for group_instance in range(group_instances):
+                group_instance_id = str(uuid4()) if group_instances > 1 else None
+
+                for block in group['blocks']:
+                    answers = []
+                    for question in block.get('questions', []):
+                        answer_instances = repeats if question.get('type') == 'RepeatingAnswer' else 1
+
+                        for answer in _answer_schemas(question):
+                            for answer_instance in range(answer_instances):
+                                answers.append({
+                                    'answer_id': answer['id'],
+                                    'answer_instance': answer_instance,
+                                    'group_instance': group_instance,
+                                    'group_instance_id': group_instance_id,
+                                    'value': _synthetic_value(answer),
+                                })
+
+                    yield Location(group['id'], group_instance, block['id']), answers
+
+
+def build_answers(schema_json, repeats=MAX_REPEATS):
+    """
+    Build a list of answer dicts giving every answer in the schema a value, see `build_block_answers`
+    """
+    return [answer for _, answers in build_block_answers(schema_json, repeats) for answer in answers]
+
+
+class _NoStorage:
+    @staticmethod
+    def get_user_data():
+        return None, None
+
+
+def build_questionnaire_state(schema_json, repeats=MAX_REPEATS):
+    """
+    Build serialised questionnaire state for the schema, as it is saved after the whole questionnaire
+    has been answered: every answer given a value, and every block of every group instance completed
+    and on the routing path.
+    """
+    locations = []
+    for section in schema_json.get('sections', []):
+        for group in section['groups']:
+            for group_instance in range(repeats if _is_repeating_group(group) else 1):
+                locations.extend(Location(group['id'], group_instance, block['id']) for block in group['blocks'])
+
+    questionnaire_store = QuestionnaireStore(_NoStorage())
+    questionnaire_store.set_metadata(dict(METADATA, tx_id=str(uuid4()), case_id=str(uuid4())))
+    questionnaire_store.answer_store = AnswerStore(build_answers(schema_json, repeats))
+    questionnaire_store.completed_blocks = locations
+    questionnaire_store.set_routing_path(RoutingPath(locations), questionnaire_store.answer_store.get_hash())
+
+    return questionnaire_store._serialise()  # pylint: disable=protected-access
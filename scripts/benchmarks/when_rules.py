@@ -0,0 +1,185 @@
+"""
+Benchmark of when rule evaluation throughput on the routing test schemas in `data/en`.
+
+Compares the when rules compiled by QuestionnaireSchema against interpreting the rule dicts on
+every evaluation, which is how `evaluate_when_rules` worked before rules were compiled. Every
+answer in each schema is given a synthetic value and every when clause in the schema is evaluated.
+
+Run from the project root with:
+
+    python -m scripts.benchmarks.when_rules
+"""
+import argparse
+import timeit
+from datetime import datetime
+from functools import partial
+
+from dateutil.relativedelta import relativedelta
+
+from app.data_model.answer_store import AnswerStore
+from app.questionnaire.questionnaire_schema import QuestionnaireSchema
+from app.questionnaire.rules import convert_to_datetime, get_answer_store_value, get_metadata_value
+from scripts.benchmarks.synthetic import build_answers, load_schema_json, schema_names
+
+METADATA = {
+    'ref_p_start_date': '2016-01-01',
+    'ref_p_end_date': '2016-12-31',
+    'region_code': 'GB-ENG',
+}
+
+
+def interpreted_evaluate_condition(condition, answer_value, match_value):
+    answer_and_match = answer_value is not None and match_value is not None
+
+    comparison_operators = {
+        'equals': lambda answer_value, match_value: answer_value == match_value,
+        'not equals': lambda answer_value, match_value: answer_value != match_value,
+        'contains':
+            lambda answer_value, match_value: isinstance(answer_value, list)
+            and match_value in answer_value,
+        'contains all':
+            lambda answer_value, match_value: isinstance(answer_value, list)
+            and isinstance(match_value, list)
+            and set(answer_value) >= set(match_value),
+        'contains any':
+            lambda answer_value, match_value: answer_and_match
+            and isinstance(match_value, list)
+            and bool(set(answer_value) & set(match_value)) if isinstance(answer_value, list) else answer_value in match_value,
+        'not contains any':
+            lambda answer_value, match_value: answer_and_match
+            and isinstance(match_value, list)
+            and set(answer_value).isdisjoint(set(match_value)) if isinstance(answer_value, list) else answer_value not in match_value,
+        'not contains all':
+            lambda answer_value, match_value: isinstance(answer_value, list)
+            and isinstance(match_value, list)
+            and not set(match_value) <= set(answer_value),
+        'not contains':
+            lambda answer_value, match_value: isinstance(answer_value, list)
+            and match_value not in answer_value,
+        'set': lambda answer_value, _: answer_value is not None and answer_value != [],
+        'not set': lambda answer_value, _: answer_value is None or answer_value == [],
+        'greater than': lambda answer_value, match_value: answer_and_match and answer_value > match_value,
+        'greater than or equal to': lambda answer_value, match_value: answer_and_match and answer_value >= match_value,
+        'less than': lambda answer_value, match_value: answer_and_match and answer_value < match_value,
+        'less than or equal to': lambda answer_value, match_value: answer_and_match and answer_value <= match_value,
+    }
+
+    return comparison_operators[condition](answer_value, match_value)
+
+
+def interpreted_date_match_value(date_comparison, answer_store, schema, group_instance, metadata):
+    match_value = None
+
+    if 'value' in date_comparison:
+        match_value = datetime.utcnow().strftime('%Y-%m-%d') if date_comparison['value'] == 'now' else date_comparison['value']
+    elif 'id' in date_comparison:
+        match_value = get_answer_store_value(date_comparison['id'], answer_store, schema, group_instance)
+    elif 'meta' in date_comparison:
+        match_value = get_metadata_value(metadata, date_comparison['meta'])
+
+    match_value = convert_to_datetime(match_value)
+
+    if 'offset_by' in date_comparison and match_value:
+        offset = date_comparison['offset_by']
+        match_value = match_value + relativedelta(days=offset.get('days', 0),
+                                                  months=offset.get('months', 0),
+                                                  years=offset.get('years', 0))
+
+    return match_value
+
+
+def interpreted_when_rule_value(when_rule, schema, metadata, answer_store, group_instance, group_instance_id, routing_path):
+    if 'id' in when_rule:
+        return get_answer_store_value(when_rule['id'], answer_store, schema, group_instance, group_instance_id, routing_path=routing_path)
+    if 'meta' in when_rule:
+        return get_metadata_value(metadata, when_rule['meta'])
+    return answer_store.filter(answer_ids=when_rule['answer_ids']).count()
+
+
+def interpreted_evaluate_when_rules(when_rules, schema, metadata, answer_store, group_instance, group_instance_id=None, routing_path=None):
+    for when_rule in when_rules:
+        if 'id' in when_rule:
+            if group_instance > 0 and not schema.answer_is_in_repeating_group(when_rule['id']):
+                group_instance = 0
+
+        value = interpreted_when_rule_value(when_rule, schema, metadata, answer_store, group_instance, group_instance_id, routing_path)
+
+        if 'date_comparison' in when_rule:
+            value = convert_to_datetime(value)
+            match_value = interpreted_date_match_value(when_rule['date_comparison'], answer_store, schema, group_instance, metadata)
+            if not value or not match_value or not when_rule.get('condition') or \
+                    not interpreted_evaluate_condition(when_rule['condition'], value, match_value):
+                return False
+        elif 'comparison_id' in when_rule:
+            comparison_value = get_answer_store_value(when_rule['comparison_id'], answer_store, schema,
+                                                      group_instance=group_instance, group_instance_id=group_instance_id)
+            if not interpreted_evaluate_condition(when_rule['condition'], value, comparison_value):
+                return False
+        elif not interpreted_evaluate_condition(when_rule['condition'], value, when_rule.get('value', when_rule.get('values'))):
+            return False
+
+    return True
+
+
+def _when_rules_in(json_object):
+    if isinstance(json_object, dict):
+        for key, value in json_object.items():
+            if key == 'when' and isinstance(value, list):
+                yield value
+            else:
+                yield from _when_rules_in(value)
+    elif isinstance(json_object, list):
+        for item in json_object:
+            yield from _when_rules_in(item)
+
+
+def _evaluations_per_second(evaluate, all_when_rules, number):
+    def evaluate_all():
+        for when_rules in all_when_rules:
+            evaluate(when_rules)
+
+    return len(all_when_rules) * number / min(timeit.repeat(evaluate_all, number=number, repeat=3))
+
+
+def _evaluate_compiled(schema, answer_store, when_rules):
+    return schema.get_when_rules_evaluator(when_rules)(METADATA, answer_store, 0)
+
+
+def _evaluate_interpreted(schema, answer_store, when_rules):
+    return interpreted_evaluate_when_rules(when_rules, schema, METADATA, answer_store, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark when rule evaluation')
+    parser.add_argument('--pattern', default='routing', help='Benchmark schemas with this in their name')
+    parser.add_argument('--number', type=int, default=1000, help='Evaluations of every when clause per measurement')
+    args = parser.parse_args()
+
+    print(  # noqa: T001
+        '{:<60} {:>6} {:>16} {:>16} {:>9}'.format(
+            'schema', 'rules', 'interpreted (/s)', 'compiled (/s)', 'speed-up'))
+
+    for schema_name in schema_names():
+        if args.pattern not in schema_name:
+            continue
+
+        schema_json = load_schema_json(schema_name)
+        schema = QuestionnaireSchema(schema_json)
+        answer_store = AnswerStore(build_answers(schema_json, repeats=3))
+        all_when_rules = list(_when_rules_in(schema.json))
+
+        if not all_when_rules:
+            continue
+
+        compiled_rate = _evaluations_per_second(
+            partial(_evaluate_compiled, schema, answer_store), all_when_rules, args.number)
+        interpreted_rate = _evaluations_per_second(
+            partial(_evaluate_interpreted, schema, answer_store), all_when_rules, args.number)
+
+        print(  # noqa: T001
+            '{:<60} {:>6} {:>16.0f} {:>16.0f} {:>8.2f}x'.format(
+                schema_name, len(all_when_rules), interpreted_rate, compiled_rate, compiled_rate / interpreted_rate))
+
+
+if __name__ == '__main__':
+    main()
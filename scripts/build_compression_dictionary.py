@@ -0,0 +1,76 @@
+"""
+Build a preset dictionary for `ZlibDictionaryCodec` from synthetic questionnaire state for the
+schemas in `data/<language>`.
+
+The dictionary is the JSON fragments found in the most states, weighted by their length, with the
+most valuable last as deflate finds the closest matches cheapest. State saved with a dictionary
+can only be read with that same dictionary, so never rebuild one which is in use; build a new one
+and register it in `app/storage/compression.py` with a new QuestionnaireStore version.
+
+Run from the project root with:
+
+    python -m scripts.build_compression_dictionary app/storage/compression_dictionaries/<name>.bin
+"""
+import argparse
+import re
+from collections import Counter
+
+from scripts.benchmarks.synthetic import build_questionnaire_state, load_schema_json, schema_names
+
+# The maximum size of a deflate dictionary, which is its window size
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+# JSON strings and the runs of punctuation, numbers and literals between them
+JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[^"]+')
+
+
+def _fragments(state, max_tokens):
+    tokens = JSON_TOKEN.findall(state)
+    return {b''.join(tokens[start:start + length])
+            for length in range(1, max_tokens + 1)
+            for start in range(len(tokens) - length + 1)}
+
+
+def build_dictionary(states, max_tokens=4, size=MAX_DICTIONARY_SIZE):
+    state_counts = Counter()
+    for state in states:
+        state_counts.update(_fragments(state, max_tokens))
+
+    candidates = sorted(((count * len(fragment), fragment) for fragment, count in state_counts.items() if count > 1),
+                        reverse=True)
+
+    fragments = []
+    dictionary_size = 0
+    for _, fragment in candidates:
+        if dictionary_size + len(fragment) > size or any(fragment in chosen for chosen in fragments):
+            continue
+
+        fragments.append(fragment)
+        dictionary_size += len(fragment)
+
+    return b''.join(reversed(fragments))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a compression dictionary for questionnaire state')
+    parser.add_argument('output', help='File to write the dictionary to')
+    parser.add_argument('--language', default='en')
+    args = parser.parse_args()
+
+    states = []
+    for schema_name in schema_names(args.language):
+        schema_json = load_schema_json(schema_name, args.language)
+        for repeats in (1, 3):
+            states.append(build_questionnaire_state(schema_json, repeats).encode('utf-8'))
+
+    dictionary = build_dictionary(states)
+
+    with open(args.output, 'wb') as output_file:
+        output_file.write(dictionary)
+
+    print('Wrote {} byte dictionary built from {} states to {}'.format(  # noqa: T001
+        len(dictionary), len(states), args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Build a snapshot of the parsed schemas in `data/<language>`, for the gunicorn master to load with
+EQ_SCHEMA_SNAPSHOT_FILE and share with its workers.
+
+The snapshot holds the schemas as the app parses them, with their error messages translated, so it
+must be rebuilt whenever the schemas, their translations or `QuestionnaireSchema` change.
+
+Run from the project root, after the schemas have been translated, with:
+
+    python -m scripts.build_schema_snapshot schemas.snapshot
+"""
+import argparse
+import os
+from time import perf_counter
+
+from flask import Flask
+from flask_babel import Babel
+
+from app.questionnaire.questionnaire_schema import QuestionnaireSchema
+from app.utilities.schema_snapshot import write_snapshot
+from scripts.benchmarks.synthetic import load_schema_json, schema_names
+
+LANGUAGE_CODES = ('en', 'cy')
+
+
+def build_schemas(language_codes):
+    # Error messages are translated with `force_locale`, which needs the app's translations and a request context
+    application = Flask('app')
+    Babel(application)
+
+    schemas = {}
+    with application.test_request_context():
+        for language_code in language_codes:
+            for schema_file in schema_names(language_code):
+                schema_name = os.path.splitext(schema_file)[0]
+                schemas[(schema_name, language_code)] = QuestionnaireSchema(
+                    load_schema_json(schema_file, language_code), language_code)
+
+    return schemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a snapshot of the parsed schemas')
+    parser.add_argument('output', help='File to write the snapshot to')
+    args = parser.parse_args()
+
+    start = perf_counter()
+    schemas = build_schemas(LANGUAGE_CODES)
+    write_snapshot(args.output, schemas)
+
+    print('Wrote {} schemas to {} ({:.1f} MB) in {:.1f}s'.format(  # noqa: T001
+        len(schemas), args.output, os.path.getsize(args.output) / 1000000, perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
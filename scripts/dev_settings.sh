@@ -44,6 +44,10 @@ if [ -z "$EQ_QUESTIONNAIRE_STATE_TABLE_NAME" ]; then
   export EQ_QUESTIONNAIRE_STATE_TABLE_NAME="dev-questionnaire-state"
 fi
 
+if [ -z "$EQ_QUESTIONNAIRE_STATE_DELTA_TABLE_NAME" ]; then
+  export EQ_QUESTIONNAIRE_STATE_DELTA_TABLE_NAME="dev-questionnaire-state-delta"
+fi
+
 if [ -z "$EQ_QUESTIONNAIRE_STATE_DYNAMO_READ" ]; then
   export EQ_QUESTIONNAIRE_STATE_DYNAMO_READ=True
 fi
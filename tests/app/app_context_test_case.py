@@ -5,6 +5,7 @@ from moto import mock_dynamodb2
 
 from app.setup import create_app
 from app.storage.data_access import get_table_name, TABLE_CONFIG, is_dynamodb_read_enabled
+from app.utilities.schema_cache import local_schema_cache, url_schema_cache
 
 
 class AppContextTestCase(unittest.TestCase):
@@ -18,6 +19,10 @@ class AppContextTestCase(unittest.TestCase):
         self._ddb = mock_dynamodb2()
         self._ddb.start()
 
+        # Schemas are cached per process, so each test starts as a new process would
+        local_schema_cache.clear()
+        url_schema_cache.clear()
+
         setting_overrides = {
             'SQLALCHEMY_DATABASE_URI': 'sqlite://',
             'LOGIN_DISABLED': self.LOGIN_DISABLED,
@@ -45,9 +50,15 @@ def setup_tables():
         if is_dynamodb_read_enabled(config):
             table_name = get_table_name(config)
             if table_name:
+                attribute_definitions = [{'AttributeName': config['key_field'], 'AttributeType': 'S'}]
+                key_schema = [{'AttributeName': config['key_field'], 'KeyType': 'HASH'}]
+                if 'range_field' in config:
+                    attribute_definitions.append({'AttributeName': config['range_field'], 'AttributeType': 'N'})
+                    key_schema.append({'AttributeName': config['range_field'], 'KeyType': 'RANGE'})
+
                 current_app.eq['dynamodb'].create_table(
                     TableName=table_name,
-                    AttributeDefinitions=[{'AttributeName': config['key_field'], 'AttributeType': 'S'}],
-                    KeySchema=[{'AttributeName': config['key_field'], 'KeyType': 'HASH'}],
+                    AttributeDefinitions=attribute_definitions,
+                    KeySchema=key_schema,
                     ProvisionedThroughput={'ReadCapacityUnits': 1, 'WriteCapacityUnits': 1}
                 )
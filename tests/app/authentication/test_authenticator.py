@@ -7,6 +7,7 @@ from mock import patch
 from app.authentication.authenticator import load_user, request_load_user, user_loader
 from app.data_model.session_data import SessionData
 from app.data_model.session_store import SessionStore
+from app.instrumentation import get_counters, reset_counters
 from app.settings import USER_IK
 from tests.app.app_context_test_case import AppContextTestCase
 
@@ -128,3 +129,43 @@ class TestAuthenticator(AppContextTestCase): # pylint: disable=too-many-public-m
                 self.assertEqual(user.user_ik, 'user_ik')
                 self.assertEqual(user.is_authenticated, True)
                 self.assertIsNone(self.session_store.expiration_time)
+
+    def test_valid_user_does_not_save_session_expiry_until_threshold(self):
+        self._app.config['EQ_SESSION_EXTENSION_THRESHOLD_PERCENTAGE'] = 50
+        reset_counters()
+
+        with self.app_request_context('/status'):
+            with patch('app.authentication.authenticator.get_session_store', return_value=self.session_store):
+                # Given
+                self.session_store.create('eq_session_id', 'user_id', self.session_data, self.expires_at)
+                cookie_session[USER_IK] = 'user_ik'
+                cookie_session['expires_in'] = 5
+
+                # When
+                with patch.object(self.session_store, 'save') as save:
+                    user = user_loader(None)
+
+                # Then
+                self.assertEqual(user.user_id, 'user_id')
+                self.assertGreater(self.session_store.expiration_time, self.expires_at)
+                save.assert_not_called()
+                self.assertEqual(get_counters(), {'session_expiry_extension_skipped': 1})
+
+    def test_valid_user_saves_session_expiry_below_threshold(self):
+        self._app.config['EQ_SESSION_EXTENSION_THRESHOLD_PERCENTAGE'] = 50
+        reset_counters()
+
+        with self.app_request_context('/status'):
+            with patch('app.authentication.authenticator.get_session_store', return_value=self.session_store):
+                # Given
+                self.session_store.create('eq_session_id', 'user_id', self.session_data, self.expires_at)
+                cookie_session[USER_IK] = 'user_ik'
+                cookie_session['expires_in'] = 20
+
+                # When
+                with patch.object(self.session_store, 'save') as save:
+                    user_loader(None)
+
+                # Then
+                save.assert_called_once_with(defer=True)
+                self.assertEqual(get_counters(), {'session_expiry_extension_saved': 1})
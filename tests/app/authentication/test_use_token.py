@@ -4,7 +4,7 @@ from uuid import uuid4
 from dateutil.tz import tzutc
 from mock import patch
 
-from app.authentication.jti_claim_storage import JtiTokenUsed, use_jti_claim
+from app.authentication.jti_claim_storage import JtiTokenUsed, use_jti_claim, use_jti_claim_async
 from app.storage.data_access import ItemAlreadyExistsError
 from tests.app.app_context_test_case import AppContextTestCase
 
@@ -53,3 +53,20 @@ class TestJtiClaimStorage(AppContextTestCase):
 
         with self.assertRaises(TypeError):
             use_jti_claim(jti_token, expires)
+
+    def test_should_use_token_async(self):
+        jti_token = str(uuid4())
+        expires = datetime.now(tz=tzutc()) + timedelta(seconds=60)
+
+        use_jti_claim_async(jti_token, expires).result(timeout=5)
+
+        with self.assertRaises(JtiTokenUsed):
+            use_jti_claim_async(jti_token, expires).result(timeout=5)
+
+    def test_should_raise_type_error_invalid_uuid_before_using_token_async(self):
+        expires = datetime.now(tz=tzutc()) + timedelta(seconds=60)
+
+        with patch('app.storage.executor.submit') as submit, self.assertRaises(TypeError):
+            use_jti_claim_async('jti_token', expires)
+
+        submit.assert_not_called()
@@ -2,7 +2,10 @@
 import unittest
 from unittest.mock import patch, MagicMock
 
-from app.data_model.answer_store import Answer, AnswerStore, upgrade_to_1_update_date_formats, upgrade_to_2_add_group_instance_id
+import simplejson as json
+
+from app.data_model.answer import AnswerRecord
+from app.data_model.answer_store import Answer, AnswerStore, AnswerStoreView, upgrade_to_1_update_date_formats, upgrade_to_2_add_group_instance_id
 from app.questionnaire.questionnaire_schema import QuestionnaireSchema
 
 
@@ -89,6 +92,43 @@ class TestAnswer(unittest.TestCase):
         self.assertEqual(answer_1.matches_dict(answer_2), True)
 
 
+class TestAnswerRecord(unittest.TestCase):
+    def test_reads_like_answer_dict(self):
+        record = AnswerRecord.from_answer(Answer(answer_id='4', value=25, group_instance_id='foo', group_instance=1))
+
+        self.assertEqual(record['answer_id'], '4')
+        self.assertEqual(record.get('group_instance_id'), 'foo')
+        self.assertEqual(record.get('not-a-field', 'default'), 'default')
+        self.assertEqual(record, {
+            'answer_id': '4',
+            'group_instance_id': 'foo',
+            'group_instance': 1,
+            'answer_instance': 0,
+            'value': 25,
+        })
+
+        with self.assertRaises(KeyError):
+            record['not-a-field']  # pylint: disable=pointless-statement
+
+    def test_from_dict_defaults_missing_fields(self):
+        record = AnswerRecord.from_dict({'answer_id': '4', 'value': 25})
+
+        self.assertEqual(record.to_dict(), vars(Answer(answer_id='4', value=25)))
+
+    def test_copy_is_independent(self):
+        record = AnswerRecord('4', 25)
+        copied = record.copy()
+        copied['value'] = 26
+
+        self.assertEqual(record.value, 25)
+        self.assertEqual(copied.value, 26)
+
+    def test_serialises_to_answer_layout(self):
+        answer = Answer(answer_id='4', value='a', group_instance_id='foo', group_instance=1, answer_instance=2)
+
+        self.assertEqual(json.loads(json.dumps(AnswerRecord.from_answer(answer))), vars(answer))
+
+
 class TestAnswerStore(unittest.TestCase):  # pylint: disable=too-many-public-methods
     def setUp(self):
         self.store = AnswerStore()
@@ -622,3 +662,250 @@ class TestAnswerStore(unittest.TestCase):  # pylint: disable=too-many-public-met
 
         self.store.remove_answer(vars(answer_1))
         self.assertEqual(len(self.store), 1)
+
+    def test_filter_by_group_instance_id_after_update(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a', group_instance_id='foo', group_instance=0))
+        self.store.add_or_update(Answer(answer_id='2', value='b', group_instance_id='bar', group_instance=1))
+        self.store.add_or_update(Answer(answer_id='1', value='c', group_instance_id='bar', group_instance=1))
+        self.store.add_or_update(Answer(answer_id='1', value='d', group_instance_id='bar', group_instance=1))
+
+        filtered = self.store.filter(group_instance_id='bar')
+
+        self.assertEqual(filtered.values(), ['d', 'b'])
+        self.assertEqual(self.store.filter(answer_ids=['1'], group_instance_id='foo').values(), ['a'])
+
+    def test_filter_with_empty_answer_ids(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+
+        self.assertEqual(len(self.store.filter(answer_ids=[])), 0)
+
+    def test_filter_with_list_of_group_instances(self):
+        for group_instance in range(3):
+            self.store.add_or_update(Answer(answer_id='1', value=group_instance, group_instance=group_instance))
+
+        filtered = self.store.filter(answer_ids=['1'], group_instance=[0, 2])
+
+        self.assertEqual(filtered.values(), [0, 2])
+
+    def test_find_after_remove(self):
+        answer_1 = Answer(answer_id='1', value='a', answer_instance=0)
+        answer_2 = Answer(answer_id='1', value='b', answer_instance=1)
+
+        self.store.add_or_update(answer_1)
+        self.store.add_or_update(answer_2)
+        self.assertEqual(self.store.find(answer_2), 1)
+
+        self.store.remove(answer_ids=['1'], answer_instance=0)
+
+        self.assertIsNone(self.store.find(answer_1))
+        self.assertEqual(self.store.find(answer_2), 0)
+        self.assertEqual(len(self.store.filter(answer_instance=0)), 0)
+
+    def test_replace_answers(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+        self.store.add_or_update(Answer(answer_id='1', value='b', answer_instance=1))
+        self.store.add_or_update(Answer(answer_id='2', value='c'))
+        answer_store_hash = self.store.get_hash()
+
+        self.store.replace_answers('1', [vars(Answer(answer_id='1', value='d', group_instance=1))])
+
+        self.assertEqual(self.store.filter(answer_ids=['1']).values(), ['d'])
+        self.assertEqual(len(self.store.filter(group_instance=1)), 1)
+        self.assertEqual(self.store.get_changed_answer_ids(answer_store_hash), {'1'})
+
+    def test_replace_answers_with_none(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+
+        self.store.replace_answers('1', [])
+
+        self.assertEqual(len(self.store), 0)
+        self.assertNotIn('1', self.store.answer_map)
+
+    def test_remove_answer_updates_indexes(self):
+        answer = Answer(answer_id='1', value='a', group_instance_id='foo')
+        self.store.add_or_update(answer)
+
+        self.store.remove_answer(vars(answer))
+
+        self.assertEqual(len(self.store.filter(group_instance_id='foo')), 0)
+
+        self.store.add_or_update(answer)
+
+        self.assertEqual(len(self.store), 1)
+
+    def test_copy_is_independent(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+        self.store.add_or_update(Answer(answer_id='1', value='b', answer_instance=1))
+
+        copied = self.store.copy()
+        copied.remove(answer_ids=['1'], answer_instance=1)
+
+        self.assertEqual(len(copied), 1)
+        self.assertEqual(len(self.store), 2)
+
+    def test_clear_resets_indexes(self):
+        answer = Answer(answer_id='1', value='a', group_instance=1)
+        self.store.add_or_update(answer)
+
+        self.store.clear()
+
+        self.assertEqual(len(self.store.filter(group_instance=1)), 0)
+        self.assertIsNone(self.store.find(answer))
+
+    def test_upgrade_reindexes_answers(self):
+        answer_store = AnswerStore([{
+            'answer_id': 'answer1',
+            'answer_instance': 0,
+            'group_instance': 0,
+            'value': 'a',
+        }])
+
+        def add_group_instance_id(store, _):
+            for answer in store:
+                answer['group_instance_id'] = 'foo'
+
+        add_group_instance_id.__name__ = 'add_group_instance_id'
+
+        with patch('app.data_model.answer_store.UPGRADE_TRANSFORMS', {1: add_group_instance_id}):
+            answer_store.upgrade(0, MagicMock())
+
+        self.assertEqual(answer_store.filter(group_instance_id='foo').values(), ['a'])
+        self.assertEqual(answer_store.find(Answer('answer1', 'b', group_instance_id='foo')), 0)
+
+    def test_equal_to_store_with_same_answers(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+
+        self.assertEqual(self.store, AnswerStore([{'answer_id': '1', 'value': 'a'}]))
+        self.assertNotEqual(self.store, AnswerStore())
+
+    def test_not_equal_to_other_types(self):
+        self.assertNotEqual(self.store, None)
+        self.assertNotEqual(self.store, {})
+
+    def test_get_hash_changes_when_answer_added(self):
+        initial_hash = self.store.get_hash()
+
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+
+        self.assertNotEqual(initial_hash, self.store.get_hash())
+
+    def test_get_hash_changes_when_answer_value_changes(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+        initial_hash = self.store.get_hash()
+
+        self.store.add_or_update(Answer(answer_id='1', value='b'))
+
+        self.assertNotEqual(initial_hash, self.store.get_hash())
+
+    def test_get_hash_unchanged_when_answer_value_unchanged(self):
+        self.store.add_or_update(Answer(answer_id='1', value=['a', 'b']))
+        initial_hash = self.store.get_hash()
+
+        self.store.add_or_update(Answer(answer_id='1', value=['a', 'b']))
+
+        self.assertEqual(initial_hash, self.store.get_hash())
+
+    def test_get_hash_changes_when_answers_removed(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+        self.store.add_or_update(Answer(answer_id='2', value='b'))
+        self.store.add_or_update(Answer(answer_id='3', value='c'))
+
+        hashes = [self.store.get_hash()]
+
+        self.store.remove(answer_ids=['1'])
+        hashes.append(self.store.get_hash())
+
+        self.store.remove_answer({'answer_id': '2', 'answer_instance': 0, 'group_instance': 0, 'group_instance_id': None, 'value': 'b'})
+        hashes.append(self.store.get_hash())
+
+        self.store.clear()
+        hashes.append(self.store.get_hash())
+
+        self.assertEqual(len(set(hashes)), 4)
+
+    def test_get_hash_unchanged_when_nothing_removed(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+        initial_hash = self.store.get_hash()
+
+        self.store.remove(answer_ids=['2'])
+        self.store.remove_answer({'answer_id': '1', 'answer_instance': 0, 'group_instance': 0, 'value': 'b'})
+
+        self.assertEqual(initial_hash, self.store.get_hash())
+
+    def test_filtered_view_not_equal_to_other_types(self):
+        self.assertNotEqual(self.store.filter(answer_ids=['1']), [])
+
+    def test_filter_returns_view_without_copying_answers(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+        self.store.add_or_update(Answer(answer_id='2', value='b'))
+
+        filtered = self.store.filter(answer_ids=['1'])
+
+        self.assertIsInstance(filtered, AnswerStoreView)
+        self.assertIs(next(iter(filtered)), self.store.first())
+
+    def test_filter_view_reflects_later_changes(self):
+        filtered = self.store.filter(answer_ids=['1'])
+        self.assertFalse(filtered)
+
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+
+        self.assertTrue(filtered)
+        self.assertEqual(filtered.values(), ['a'])
+
+    def test_filter_view_first_and_count(self):
+        for answer_instance in range(3):
+            self.store.add_or_update(Answer(answer_id='1', answer_instance=answer_instance, value=answer_instance))
+
+        filtered = self.store.filter(answer_ids=['1'])
+
+        self.assertEqual(filtered.count(), 3)
+        self.assertEqual(len(filtered), 3)
+        self.assertEqual(filtered.first()['answer_instance'], 0)
+        self.assertIsNone(self.store.filter(answer_ids=['2']).first())
+
+    def test_filter_view_copy_is_independent(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+
+        copied = self.store.filter(answer_ids=['1']).copy()
+        self.store.clear()
+
+        self.assertIsInstance(copied, AnswerStore)
+        self.assertEqual(copied.values(), ['a'])
+
+    def test_filter_view_chained_limit(self):
+        for answer_instance in range(30):
+            self.store.add_or_update(Answer(answer_id='1', answer_instance=answer_instance, value=answer_instance))
+
+        filtered = self.store.filter(answer_ids=['1']).filter(limit=True)
+
+        self.assertEqual(filtered.count(), AnswerStore.EQ_MAX_NUM_REPEATS)
+
+    def test_remove_using_filter_view(self):
+        for answer_instance in range(3):
+            self.store.add_or_update(Answer(answer_id='1', answer_instance=answer_instance, value=answer_instance))
+
+        self.store.remove(answer_ids=['1'])
+
+        self.assertEqual(len(self.store), 0)
+
+    def test_get_changed_answer_ids(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+        since_hash = self.store.get_hash()
+
+        self.store.add_or_update(Answer(answer_id='2', value='b'))
+        self.store.add_or_update(Answer(answer_id='1', value='c'))
+        self.store.remove(answer_ids=['3'])
+
+        self.assertEqual(self.store.get_changed_answer_ids(since_hash), {'1', '2'})
+        self.assertEqual(self.store.get_changed_answer_ids(self.store.get_hash()), set())
+
+    def test_get_changed_answer_ids_unknown(self):
+        self.store.add_or_update(Answer(answer_id='1', value='a'))
+        since_hash = self.store.get_hash()
+
+        self.store.clear()
+
+        self.assertIsNone(self.store.get_changed_answer_ids(since_hash))
+        self.assertIsNone(self.store.get_changed_answer_ids(self.store.get_hash() + 1))
+        self.assertIsNone(self.store.get_changed_answer_ids(None))
@@ -1,8 +1,9 @@
 import datetime
 
+from boto3.dynamodb.types import Binary
 from dateutil.tz import tzutc
 
-from app.data_model.app_models import EQSession, QuestionnaireState, UsedJtiClaim, SubmittedResponse
+from app.data_model.app_models import EQSession, QuestionnaireState, QuestionnaireStateDelta, UsedJtiClaim, SubmittedResponse
 from app.storage.data_access import TABLE_CONFIG
 from tests.app.app_context_test_case import AppContextTestCase
 
@@ -20,6 +21,21 @@ class TestAppModels(AppContextTestCase):
         self.assertGreaterEqual(new_model.created_at, NOW)
         self.assertGreaterEqual(new_model.updated_at, NOW)
 
+    def test_questionnaire_state_with_binary_state_data(self):
+        self._test_model(QuestionnaireState('someuser', b'somedata', 4))
+
+    def test_binary_state_data_loaded_from_dynamodb(self):
+        schema = TABLE_CONFIG[QuestionnaireState]['schema'](strict=True)
+        item, _ = schema.dump(QuestionnaireState('someuser', b'somedata', 4))
+        item['state_data'] = Binary(item['state_data'])
+
+        new_model, _ = schema.load(item)
+
+        self.assertEqual(new_model.state_data, b'somedata')
+
+    def test_questionnaire_state_delta(self):
+        self._test_model(QuestionnaireStateDelta('someuser', 1, b'somedata', 5, 'revision'))
+
     def test_eq_session(self):
         new_model = self._test_model(EQSession('sessionid', 'someuser', 'somedata', NOW))
 
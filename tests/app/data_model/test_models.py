@@ -1,4 +1,4 @@
-from app.data_model.models import QuestionnaireState
+from app.data_model.models import QuestionnaireState, QuestionnaireStateDelta
 from tests.app.app_context_test_case import AppContextTestCase
 
 
@@ -9,6 +9,18 @@ class TestModels(AppContextTestCase):
 
         self.assertEqual(original, new)
 
+    def test_questionnaire_state_with_binary_state(self):
+        original, new = self._make_models(QuestionnaireState, ['someuser', b'somedata', 4])
+
+        self.assertEqual(original, new)
+        self.assertIsNone(new['state'])
+        self.assertEqual(new['state_binary'], b'somedata')
+
+    def test_questionnaire_state_delta(self):
+        original, new = self._make_models(QuestionnaireStateDelta, ['someuser', 1, b'somedata', 5, 'revision'])
+
+        self.assertEqual(original, new)
+
     @staticmethod
     def _make_models(model_type, args):
         orig = model_type(*args)
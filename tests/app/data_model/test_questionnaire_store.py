@@ -3,9 +3,13 @@ from unittest.mock import MagicMock
 
 import simplejson as json
 
+from app.data_model.answer import Answer
 from app.data_model.answer_store import AnswerStore
 from app.data_model.questionnaire_store import QuestionnaireStore
 from app.questionnaire.location import Location
+from app.questionnaire.routing_path import GroupCheckpoint, RoutingPath
+
+SCHEMA = MagicMock(fingerprint='schema-fingerprint', routing_uses_current_date=False)
 
 
 def get_basic_input():
@@ -15,6 +19,9 @@ def get_basic_input():
         },
         'ANSWERS': [{
             'answer_id': 'test',
+            'group_instance_id': None,
+            'group_instance': 0,
+            'answer_instance': 0,
             'value': 'test',
         }],
         'COMPLETED_BLOCKS': [
@@ -53,7 +60,7 @@ def get_input_answers_dict():
         },
     }
 
-class TestQuestionnaireStore(TestCase):
+class TestQuestionnaireStore(TestCase):  # pylint: disable=too-many-public-methods
 
     def setUp(self):
 
@@ -145,6 +152,161 @@ class TestQuestionnaireStore(TestCase):
         # Then
         self.assertEqual(expected, json.loads(self.output_data))
 
+    def test_questionnaire_store_does_not_update_storage_when_unchanged(self):
+        # Given
+        self.input_data = json.dumps(get_basic_input())
+        store = QuestionnaireStore(self.storage)
+        store.answer_store.add_or_update(Answer(answer_id='test', value='test'))
+        store.set_metadata(dict(store.metadata))
+
+        # When
+        store.add_or_update()
+
+        # Then
+        self.assertFalse(store.has_changed())
+        self.storage.add_or_update.assert_not_called()
+
+    def test_questionnaire_store_updates_storage_when_completed_blocks_change(self):
+        # Given
+        self.input_data = json.dumps(get_basic_input())
+        store = QuestionnaireStore(self.storage)
+        store.completed_blocks.append(Location('a-test-group', 0, 'another-test-block'))
+
+        # When
+        store.add_or_update()
+
+        # Then
+        self.assertEqual(len(json.loads(self.output_data)['COMPLETED_BLOCKS']), 2)
+
+    def test_questionnaire_store_updates_storage_when_collection_metadata_changes(self):
+        # Given
+        self.input_data = json.dumps(get_basic_input())
+        store = QuestionnaireStore(self.storage)
+        store.collection_metadata['started_at'] = '2018-07-04T14:49:33.448608'
+
+        # When
+        store.add_or_update()
+
+        # Then
+        self.assertIn('started_at', json.loads(self.output_data)['COLLECTION_METADATA'])
+
+    def test_questionnaire_store_does_not_update_storage_again_until_changed(self):
+        # Given
+        store = QuestionnaireStore(self.storage)
+        store.answer_store.add_or_update(Answer(answer_id='test', value='test'))
+        store.add_or_update()
+
+        # When
+        store.add_or_update()
+        store.answer_store.add_or_update(Answer(answer_id='test', value='changed'))
+        store.add_or_update()
+
+        # Then
+        self.assertEqual(self.storage.add_or_update.call_count, 2)
+
+    def test_questionnaire_store_saves_routing_path_for_current_answers(self):
+        # Given
+        expected = get_basic_input()
+        routing_path = RoutingPath([Location('a-test-group', 0, 'a-test-block')])
+        store = QuestionnaireStore(self.storage)
+        store.set_metadata(expected['METADATA'])
+        store.answer_store = AnswerStore(expected['ANSWERS'])
+        store.collection_metadata = expected['COLLECTION_METADATA']
+        store.completed_blocks = [Location.from_dict(expected['COMPLETED_BLOCKS'][0])]
+        store.set_routing_path(routing_path, store.answer_store.get_hash(), SCHEMA)
+
+        # When
+        store.add_or_update()  # See setUp - populates self.output_data
+
+        # Then
+        expected['ROUTING_PATH'] = [routing_path[0].to_dict()]
+        expected['ROUTING_PATH_SCHEMA'] = SCHEMA.fingerprint
+        self.assertEqual(expected, json.loads(self.output_data))
+
+    def test_questionnaire_store_does_not_save_routing_path_for_changed_answers(self):
+        # Given
+        store = QuestionnaireStore(self.storage)
+        store.set_routing_path(RoutingPath([Location('a-test-group', 0, 'a-test-block')]), store.answer_store.get_hash(), SCHEMA)
+        store.answer_store.add_or_update(Answer(answer_id='test', value='test'))
+
+        # When
+        store.add_or_update()  # See setUp - populates self.output_data
+
+        # Then
+        self.assertNotIn('ROUTING_PATH', json.loads(self.output_data))
+
+    def test_questionnaire_store_does_not_save_routing_path_which_depends_on_the_date(self):
+        # Given
+        schema = MagicMock(fingerprint='schema-fingerprint', routing_uses_current_date=True)
+        store = QuestionnaireStore(self.storage)
+        store.set_routing_path(RoutingPath([Location('a-test-group', 0, 'a-test-block')]), store.answer_store.get_hash(), schema)
+
+        # When
+        store.add_or_update()  # See setUp - populates self.output_data
+
+        # Then
+        self.assertNotIn('ROUTING_PATH', json.loads(self.output_data))
+        self.assertEqual(store.get_routing_path(schema)[1], store.answer_store.get_hash())
+
+    def test_questionnaire_store_loads_routing_path(self):
+        # Given
+        expected = get_basic_input()
+        expected['ROUTING_PATH'] = expected['COMPLETED_BLOCKS']
+        expected['ROUTING_PATH_SCHEMA'] = SCHEMA.fingerprint
+        self.input_data = json.dumps(expected)
+
+        # When
+        store = QuestionnaireStore(self.storage)
+
+        # Then
+        routing_path, answer_store_version = store.get_routing_path(SCHEMA)
+        self.assertEqual(routing_path, [Location.from_dict(expected['ROUTING_PATH'][0])])
+        self.assertEqual(answer_store_version, store.answer_store.get_hash())
+
+        store.answer_store = AnswerStore()
+        self.assertEqual(store.get_routing_path(SCHEMA), (None, None))
+
+    def test_questionnaire_store_does_not_load_routing_path_for_changed_schema(self):
+        # Given
+        expected = get_basic_input()
+        expected['ROUTING_PATH'] = expected['COMPLETED_BLOCKS']
+        expected['ROUTING_PATH_SCHEMA'] = SCHEMA.fingerprint
+        self.input_data = json.dumps(expected)
+
+        # When
+        store = QuestionnaireStore(self.storage)
+
+        # Then
+        self.assertEqual(store.get_routing_path(MagicMock(fingerprint='changed-schema-fingerprint')), (None, None))
+
+    def test_questionnaire_store_does_not_load_routing_path_saved_without_schema(self):
+        # Given
+        expected = get_basic_input()
+        expected['ROUTING_PATH'] = expected['COMPLETED_BLOCKS']
+        self.input_data = json.dumps(expected)
+
+        # When
+        store = QuestionnaireStore(self.storage)
+
+        # Then
+        self.assertEqual(store.get_routing_path(SCHEMA), (None, None))
+
+    def test_questionnaire_store_round_trips_routing_path_group_checkpoints(self):
+        # Given
+        location = Location('a-test-group', 0, 'a-test-block')
+        group_checkpoints = [GroupCheckpoint(0, 0, None, [0]), GroupCheckpoint(1, 0, location, [0, 1])]
+        store = QuestionnaireStore(self.storage)
+        store.set_routing_path(RoutingPath([location], group_checkpoints), store.answer_store.get_hash(), SCHEMA)
+        store.add_or_update()  # See setUp - populates self.output_data
+
+        # When
+        self.input_data = self.output_data
+        routing_path, _ = QuestionnaireStore(self.storage).get_routing_path(SCHEMA)
+
+        # Then
+        self.assertEqual(routing_path, [location])
+        self.assertEqual(routing_path.group_checkpoints, group_checkpoints)
+
     def test_questionnaire_store_errors_on_invalid_object(self):
         # Given
         class NotSerializable:
@@ -249,3 +411,130 @@ class TestQuestionnaireStore(TestCase):
 
         with self.assertRaises(TypeError):
             store.metadata['no'] = 'writing'
+
+
+class DeltaStorage:
+    """
+    Storage which keeps the state saved in full and the deltas saved to it in memory
+    """
+    def __init__(self):
+        self.data = None
+        self.deltas = []
+        self.full_saves = 0
+        self.accept_deltas = True
+
+    def get_user_data(self):
+        return self.data, QuestionnaireStore.LATEST_VERSION
+
+    def get_deltas(self):
+        return list(self.deltas)
+
+    def add_delta(self, data, version):  # pylint: disable=unused-argument
+        if self.accept_deltas:
+            self.deltas.append(data)
+        return self.accept_deltas
+
+    def add_or_update(self, data, version):  # pylint: disable=unused-argument
+        self.data = data
+        self.deltas = []
+        self.full_saves += 1
+
+
+class TestQuestionnaireStoreDeltas(TestCase):
+
+    def setUp(self):
+        self.storage = DeltaStorage()
+        store = QuestionnaireStore(self.storage, deltas_before_compaction=3)
+        store.set_metadata({'test': True})
+        store.answer_store.add_or_update(Answer(answer_id='first-name', value='Joe'))
+        store.answer_store.add_or_update(Answer(answer_id='last-name', value='Bloggs'))
+        store.add_or_update()
+
+    def _load(self, deltas_before_compaction=3):
+        return QuestionnaireStore(self.storage, deltas_before_compaction=deltas_before_compaction)
+
+    def test_state_saved_in_full_for_deltas(self):
+        self.assertEqual(self.storage.full_saves, 1)
+        self.assertTrue(json.loads(self.storage.data)['HAS_DELTAS'])
+
+    def test_changed_answers_saved_as_delta(self):
+        store = self._load()
+        store.answer_store.add_or_update(Answer(answer_id='first-name', value='Jane'))
+        store.completed_blocks.append(Location('group', 0, 'block'))
+        store.add_or_update()
+
+        self.assertEqual(self.storage.full_saves, 1)
+        self.assertEqual(json.loads(self.storage.deltas[0]), {
+            'ANSWERS': {'first-name': [Answer(answer_id='first-name', value='Jane').__dict__]},
+            'COMPLETED_BLOCKS_ADDED': [{'group_id': 'group', 'group_instance': 0, 'block_id': 'block'}],
+        })
+
+    def test_state_rebuilt_from_deltas(self):
+        store = self._load()
+        store.answer_store.add_or_update(Answer(answer_id='first-name', value='Jane'))
+        store.answer_store.add_or_update(Answer(answer_id='age', value=30))
+        store.completed_blocks.append(Location('group', 0, 'block'))
+        store.add_or_update()
+
+        store = self._load()
+        store.answer_store.remove(answer_ids=['last-name'])
+        store.completed_blocks.remove(Location('group', 0, 'block'))
+        store.completed_blocks.append(Location('group', 0, 'other-block'))
+        store.add_or_update()
+
+        expected_answers = AnswerStore([Answer(answer_id='first-name', value='Jane').__dict__,
+                                        Answer(answer_id='age', value=30).__dict__])
+
+        store = self._load()
+        self.assertEqual(len(self.storage.deltas), 2)
+        self.assertEqual(store.answer_store, expected_answers)
+        self.assertEqual(store.completed_blocks, [Location('group', 0, 'other-block')])
+        self.assertFalse(store.has_changed())
+
+    def test_state_saved_in_full_after_deltas_before_compaction(self):
+        for value in ('a', 'b', 'c', 'd'):
+            store = self._load()
+            store.answer_store.add_or_update(Answer(answer_id='first-name', value=value))
+            store.add_or_update()
+
+        self.assertEqual(self.storage.full_saves, 2)
+        self.assertEqual(self.storage.deltas, [])
+        self.assertEqual(self._load().answer_store.filter(answer_ids=['first-name']).values(), ['d'])
+
+    def test_state_saved_in_full_when_metadata_changes(self):
+        store = self._load()
+        store.set_metadata({'test': False})
+        store.add_or_update()
+
+        self.assertEqual(self.storage.full_saves, 2)
+
+    def test_state_saved_in_full_when_delta_not_saved(self):
+        self.storage.accept_deltas = False
+
+        store = self._load()
+        store.answer_store.add_or_update(Answer(answer_id='first-name', value='Jane'))
+        store.add_or_update()
+
+        self.assertEqual(self.storage.full_saves, 2)
+
+    def test_routing_path_change_not_saved_as_delta(self):
+        store = self._load()
+        store.set_routing_path(RoutingPath([Location('group', 0, 'block')]), store.answer_store.get_hash(), SCHEMA)
+        store.add_or_update()
+
+        self.assertEqual(self.storage.full_saves, 1)
+        self.assertEqual(self.storage.deltas, [])
+
+    def test_deltas_read_and_saved_in_full_once_disabled(self):
+        store = self._load()
+        store.answer_store.add_or_update(Answer(answer_id='first-name', value='Jane'))
+        store.add_or_update()
+
+        store = self._load(deltas_before_compaction=0)
+        self.assertEqual(store.answer_store.filter(answer_ids=['first-name']).values(), ['Jane'])
+
+        store.answer_store.add_or_update(Answer(answer_id='first-name', value='Joe'))
+        store.add_or_update()
+
+        self.assertEqual(self.storage.full_saves, 2)
+        self.assertNotIn('HAS_DELTAS', json.loads(self.storage.data))
@@ -47,6 +47,15 @@ class SessionStoreTest(AppContextTestCase):
             session_store = SessionStore('user_ik', 'pepper', 'eq_session_id')
             self.assertEqual(session_store.session_data.tx_id, 'tx_id')
 
+    def test_deferred_save(self):
+        with self._app.test_request_context():
+            self.session_store.create('eq_session_id', 'test', self.session_data, self.expires_at).save(defer=True)
+            self.assertIsNone(SessionStore('user_ik', 'pepper', 'eq_session_id').session_data)
+
+            data_access.put_deferred()
+            session_store = SessionStore('user_ik', 'pepper', 'eq_session_id')
+            self.assertEqual(session_store.session_data.tx_id, 'tx_id')
+
     def test_delete(self):
         with self._app.test_request_context():
             self.session_store.create('eq_session_id', 'test', self.session_data, self.expires_at).save()
@@ -290,6 +299,14 @@ class TestSessionStoreEncoding(AppContextTestCase):
         session_store = SessionStore(self.user_ik, self.pepper, self.session_id)
         self.assertEqual(session_store.session_data.tx_id, self.session_data.tx_id)
 
+    def test_save_encrypts_into_envelope(self):
+        with self._app.test_request_context():
+            SessionStore(self.user_ik, self.pepper).create(self.session_id, self.user_id, self.session_data).save()
+
+        session_store = SessionStore(self.user_ik, self.pepper, self.session_id)
+        self.assertIsInstance(session_store._eq_session.session_data, bytes)  # pylint: disable=protected-access
+        self.assertEqual(session_store.session_data.tx_id, self.session_data.tx_id)
+
     def _save_session(self, session_id, user_id, data, legacy=False):
         raw_data = json.dumps(vars(data))
         protected_header = {
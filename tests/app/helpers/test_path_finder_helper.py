@@ -10,11 +10,13 @@ class TestPathFinderHelper(AppContextTestCase):
 
     LOGIN_DISABLED = True
 
+    @patch('app.helpers.path_finder_helper.current_user')
+    @patch('app.helpers.path_finder_helper.get_questionnaire_store')
     @patch('app.helpers.path_finder_helper.PathFinder')
     @patch('app.helpers.path_finder_helper.get_metadata')
     @patch('app.helpers.path_finder_helper.get_answer_store')
     @patch('app.helpers.path_finder_helper.get_completed_blocks')
-    def test_path_finder_instantiated_once(self, mock_path_finder, _, __, ___):
+    def test_path_finder_instantiated_once(self, mock_path_finder, _, __, ___, ____, _____):
         g.schema = QuestionnaireSchema({})
 
         # Werkzeug LocalProxy only instantiates an object on
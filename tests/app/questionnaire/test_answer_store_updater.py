@@ -107,6 +107,20 @@ class TestAnswerStoreUpdater(unittest.TestCase):
             'value': answer_value
         }
 
+    def test_update_answers_does_not_save(self):
+        answer_id = 'answer'
+
+        self.schema.get_answer_ids_for_block.return_value = [answer_id]
+        self.schema.get_group_dependencies.return_value = None
+
+        form = MagicMock(spec=QuestionnaireForm, data={answer_id: '1000'})
+
+        self.answer_store_updater.update_answers(form)
+
+        assert self.questionnaire_store.completed_blocks == [self.location]
+        assert self.answer_store.add_or_update.call_count == 1
+        assert not self.questionnaire_store.add_or_update.called
+
     def test_save_answers_stores_specific_group(self):
         answer_id = 'answer'
         answer_value = '1000'
@@ -1,10 +1,13 @@
+import copy
 import uuid
 from unittest.mock import patch, MagicMock
 import pytest
 
 from app.data_model.answer_store import Answer, AnswerStore
+from app.data_model.questionnaire_store import QuestionnaireStore
 from app.questionnaire.location import Location
 from app.questionnaire.path_finder import PathFinder
+from app.questionnaire.questionnaire_schema import QuestionnaireSchema
 from app.utilities.schema import load_schema_from_params
 from tests.app.app_context_test_case import AppContextTestCase
 
@@ -1207,3 +1210,80 @@ class TestPathFinder(AppContextTestCase):  # pylint: disable=too-many-public-met
 
         self.assertNotIn(should_not_be_present, path)
         self.assertIn(expected_next_location, path)
+
+    def test_get_full_routing_path_reuses_routing_path_from_questionnaire_store(self):
+        schema = load_schema_from_params('test', '0102')
+        questionnaire_store = QuestionnaireStore(MagicMock(get_user_data=MagicMock(return_value=(None, None))))
+
+        routing_path = PathFinder(schema, questionnaire_store.answer_store, metadata={}, completed_blocks=[],
+                                  questionnaire_store=questionnaire_store).get_full_routing_path()
+
+        path_finder = PathFinder(schema, questionnaire_store.answer_store, metadata={}, completed_blocks=[],
+                                 questionnaire_store=questionnaire_store)
+
+        with patch.object(path_finder, 'build_path') as build_path:
+            self.assertEqual(routing_path, path_finder.get_full_routing_path())
+
+        build_path.assert_not_called()
+
+    def test_get_full_routing_path_rebuilds_stored_routing_path_when_answers_change(self):
+        schema = load_schema_from_params('test', '0102')
+        questionnaire_store = QuestionnaireStore(MagicMock(get_user_data=MagicMock(return_value=(None, None))))
+
+        PathFinder(schema, questionnaire_store.answer_store, metadata={}, completed_blocks=[],
+                   questionnaire_store=questionnaire_store).get_full_routing_path()
+
+        questionnaire_store.answer_store.add_or_update(Answer(answer_id='total-retail-turnover', value=100))
+
+        path_finder = PathFinder(schema, questionnaire_store.answer_store, metadata={}, completed_blocks=[],
+                                 questionnaire_store=questionnaire_store)
+        routing_path = path_finder.get_full_routing_path()
+
+        self.assertEqual(questionnaire_store.get_routing_path(schema), (routing_path, questionnaire_store.answer_store.get_hash()))
+
+    def test_get_full_routing_path_rebuilds_stored_routing_path_when_schema_changes(self):
+        schema = load_schema_from_params('test', '0102')
+        questionnaire_store = QuestionnaireStore(MagicMock(get_user_data=MagicMock(return_value=(None, None))))
+
+        PathFinder(schema, questionnaire_store.answer_store, metadata={}, completed_blocks=[],
+                   questionnaire_store=questionnaire_store).get_full_routing_path()
+
+        changed_schema_json = copy.deepcopy(schema.json)
+        changed_schema_json['sections'][0]['groups'][0]['blocks'].pop(0)
+        changed_schema = QuestionnaireSchema(changed_schema_json)
+
+        path_finder = PathFinder(changed_schema, questionnaire_store.answer_store, metadata={}, completed_blocks=[],
+                                 questionnaire_store=questionnaire_store)
+        routing_path = path_finder.get_full_routing_path()
+
+        self.assertNotIn(Location('rsi', 0, 'introduction'), routing_path)
+        self.assertEqual(questionnaire_store.get_routing_path(schema), (None, None))
+
+    def test_get_full_routing_path_rebuilds_from_first_group_routed_by_changed_answers(self):
+        schema = load_schema_from_params('test', 'skip_condition_group')
+        answer_store = AnswerStore()
+        path_finder = PathFinder(schema, answer_store, metadata={}, completed_blocks=[])
+
+        self.assertIn(Location('should-skip-group', 0, 'should-skip'), path_finder.get_full_routing_path())
+
+        answer_store.add_or_update(Answer(answer_id='do-you-want-to-skip-answer', value='Yes'))
+
+        with patch.object(path_finder, 'build_path', wraps=path_finder.build_path) as build_path:
+            routing_path = path_finder.get_full_routing_path()
+
+        self.assertEqual(build_path.call_args[0][1], 1)
+        self.assertNotIn(Location('should-skip-group', 0, 'should-skip'), routing_path)
+        self.assertEqual(routing_path, PathFinder(schema, answer_store, metadata={}, completed_blocks=[]).build_path())
+
+    def test_get_full_routing_path_not_rebuilt_when_changed_answers_not_routed_on(self):
+        schema = load_schema_from_params('test', 'skip_condition_group')
+        answer_store = AnswerStore()
+        path_finder = PathFinder(schema, answer_store, metadata={}, completed_blocks=[])
+        routing_path = path_finder.get_full_routing_path()
+
+        answer_store.add_or_update(Answer(answer_id='last-group-answer', value='Some text'))
+
+        with patch.object(path_finder, 'build_path') as build_path:
+            self.assertIs(routing_path, path_finder.get_full_routing_path())
+
+        build_path.assert_not_called()
@@ -1,3 +1,6 @@
+import copy
+import pickle
+
 from app.questionnaire.questionnaire_schema import QuestionnaireSchema
 from app.utilities.schema import load_schema_from_params
 from tests.app.app_context_test_case import AppContextTestCase
@@ -299,3 +302,52 @@ class TestQuestionnaireSchema(AppContextTestCase):
         self.assertIn('gender-answer', dependencies)
         self.assertIn('age-answer', dependencies)
         self.assertEqual(len(dependencies), 2)
+
+    def test_get_when_rules_evaluator_returns_compiled_schema_rules(self):
+        schema = load_schema_from_params('test', 'routing_number_equals')
+        when_rules = schema.get_block('number-question')['routing_rules'][0]['goto']['when']
+
+        self.assertIs(schema.get_when_rules_evaluator(when_rules), schema.get_when_rules_evaluator(when_rules))
+
+    def test_when_rules_are_compiled_after_unpickling(self):
+        schema = pickle.loads(pickle.dumps(load_schema_from_params('test', 'routing_number_equals')))
+        when_rules = schema.get_block('number-question')['routing_rules'][0]['goto']['when']
+
+        self.assertIs(schema.get_when_rules_evaluator(when_rules), schema.get_when_rules_evaluator(when_rules))
+
+    def test_lazy_schema_works_out_dependencies_when_they_are_used(self):
+        schema_json = load_schema_from_params('test', 'titles').json
+        schema = QuestionnaireSchema(schema_json, lazy=True)
+
+        self.assertIsNone(schema._answer_dependencies)  # pylint: disable=protected-access
+        self.assertEqual(schema.answer_dependencies, QuestionnaireSchema(schema_json).answer_dependencies)
+        self.assertIs(schema.answer_dependencies, schema.answer_dependencies)
+
+    def test_lazy_schema_compiles_when_rules_up_to_the_section_they_are_in(self):
+        schema_json = load_schema_from_params('test', 'routing_number_equals').json
+        schema = QuestionnaireSchema(schema_json, lazy=True)
+        when_rules = schema.get_block('number-question')['routing_rules'][0]['goto']['when']
+
+        self.assertIs(schema.get_when_rules_evaluator(when_rules), schema.get_when_rules_evaluator(when_rules))
+        self.assertLessEqual(schema._sections_with_compiled_when_rules, len(schema.json['sections']))  # pylint: disable=protected-access
+
+    def test_lazy_schema_is_parsed_in_full_when_materialised(self):
+        schema = QuestionnaireSchema(load_schema_from_params('test', 'routing_number_equals').json, lazy=True)
+        schema.materialise()
+
+        schema = pickle.loads(pickle.dumps(schema))
+
+        self.assertEqual(schema._sections_with_compiled_when_rules, len(schema.json['sections']))  # pylint: disable=protected-access
+        self.assertIsNotNone(schema._error_messages)  # pylint: disable=protected-access
+
+    def test_fingerprint_changes_with_schema(self):
+        schema = load_schema_from_params('test', '0102')
+        changed_schema_json = copy.deepcopy(schema.json)
+        changed_schema_json['sections'][0]['groups'][0]['blocks'].pop(0)
+
+        self.assertEqual(schema.fingerprint, QuestionnaireSchema(copy.deepcopy(schema.json)).fingerprint)
+        self.assertNotEqual(schema.fingerprint, QuestionnaireSchema(changed_schema_json).fingerprint)
+
+    def test_routing_uses_current_date(self):
+        self.assertTrue(load_schema_from_params('test', 'routing_date_less_than').routing_uses_current_date)
+        self.assertFalse(load_schema_from_params('test', '0102').routing_uses_current_date)
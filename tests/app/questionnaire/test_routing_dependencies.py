@@ -0,0 +1,95 @@
+import unittest
+
+from app.questionnaire.questionnaire_schema import QuestionnaireSchema
+from app.questionnaire.routing_dependencies import get_routing_dependencies
+
+
+def _question_block(block_id, answer_id, **kwargs):
+    block = {
+        'type': 'Question',
+        'id': block_id,
+        'questions': [{
+            'id': block_id + '-question',
+            'type': 'General',
+            'answers': [{
+                'id': answer_id,
+                'type': 'Number'
+            }]
+        }]
+    }
+    block.update(kwargs)
+    return block
+
+
+class TestGetRoutingDependencies(unittest.TestCase):
+
+    def setUp(self):
+        survey_json = {
+            'sections': [{
+                'id': 'default-section',
+                'groups': [
+                    {
+                        'id': 'first-group',
+                        'blocks': [
+                            _question_block('first-block', 'first-answer', routing_rules=[
+                                {'goto': {'block': 'third-block', 'when': [{
+                                    'id': 'first-answer',
+                                    'condition': 'greater than',
+                                    'comparison_id': 'second-answer'
+                                }]}},
+                                {'goto': {'block': 'second-block'}}
+                            ]),
+                            _question_block('second-block', 'second-answer'),
+                        ]
+                    },
+                    {
+                        'id': 'second-group',
+                        'skip_conditions': [{'when': [{
+                            'type': 'answer_count',
+                            'answer_ids': ['second-answer'],
+                            'condition': 'equals',
+                            'value': 0
+                        }]}],
+                        'routing_rules': [{
+                            'repeat': {
+                                'type': 'answer_value',
+                                'answer_id': 'first-answer'
+                            }
+                        }],
+                        'blocks': [
+                            _question_block('third-block', 'third-answer', skip_conditions=[{'when': [{
+                                'meta': 'region_code',
+                                'condition': 'equals',
+                                'value': 'GB-NIR'
+                            }]}]),
+                            _question_block('fourth-block', 'fourth-answer'),
+                        ]
+                    }
+                ]
+            }]
+        }
+
+        self.schema = QuestionnaireSchema(survey_json)
+
+    def test_goto_rule_answers_added_to_dependencies(self):
+        dependencies = get_routing_dependencies(self.schema)
+
+        self.assertIn('first-group', dependencies['first-answer'])
+        self.assertIn('first-group', dependencies['second-answer'])
+
+    def test_group_skip_condition_and_repeat_answers_added_to_dependencies(self):
+        dependencies = get_routing_dependencies(self.schema)
+
+        self.assertEqual(dependencies['first-answer'], {'first-group', 'second-group'})
+        self.assertEqual(dependencies['second-answer'], {'first-group', 'second-group'})
+
+    def test_answers_not_read_by_routing_have_no_dependencies(self):
+        dependencies = get_routing_dependencies(self.schema)
+
+        self.assertEqual(dependencies['third-answer'], set())
+        self.assertEqual(dependencies['fourth-answer'], set())
+
+    def test_get_first_group_index_routed_by(self):
+        self.assertEqual(self.schema.get_first_group_index_routed_by(['first-answer']), 0)
+        self.assertEqual(self.schema.get_first_group_index_routed_by(['fourth-answer', 'second-answer']), 0)
+        self.assertIsNone(self.schema.get_first_group_index_routed_by(['third-answer', 'fourth-answer']))
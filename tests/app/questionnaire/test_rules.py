@@ -5,7 +5,7 @@ from unittest.mock import Mock, patch
 from app.data_model.answer_store import AnswerStore, Answer
 from app.questionnaire.location import Location
 from app.questionnaire.questionnaire_schema import QuestionnaireSchema
-from app.questionnaire.rules import evaluate_rule, evaluate_goto, evaluate_repeat, \
+from app.questionnaire.rules import compile_when_rules, evaluate_rule, evaluate_goto, evaluate_repeat, \
     evaluate_skip_conditions, evaluate_when_rules
 from app.utilities.schema import load_schema_from_params
 from tests.app.app_context_test_case import AppContextTestCase
@@ -1146,3 +1146,33 @@ class TestRules(AppContextTestCase):  # pylint: disable=too-many-public-methods
 
         with patch('app.questionnaire.rules._is_answer_on_path', return_value=False):
             self.assertFalse(evaluate_when_rules(when['when'], get_schema_mock(), {}, answer_store, 0, None, routing_path=routing_path))
+
+    def test_compiled_when_rules_match_evaluate_when_rules(self):
+        schema = load_schema_from_params('test', 'routing_number_equals')
+        when_rules = [{
+            'id': 'answer',
+            'condition': 'equals',
+            'value': 123
+        }]
+        evaluator = compile_when_rules(when_rules, schema)
+
+        for value in (123, 321):
+            answer_store = AnswerStore({})
+            answer_store.add_or_update(Answer(answer_id='answer', value=value))
+
+            self.assertEqual(evaluator({}, answer_store, 0),
+                             evaluate_when_rules(when_rules, schema, {}, answer_store, 0))
+
+    def test_compiled_when_rules_raise_if_bad_when_condition(self):
+        when_rules = [{
+            'id': 'my_answer',
+            'condition': 'less than or equal to or greater than',
+            'value': 1
+        }]
+        evaluator = compile_when_rules(when_rules, get_schema_mock())
+
+        answer_store = AnswerStore({})
+        answer_store.add_or_update(Answer(answer_id='my_answer', value=1))
+
+        with self.assertRaises(KeyError):
+            evaluator({}, answer_store, 0)
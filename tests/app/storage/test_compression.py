@@ -0,0 +1,36 @@
+import unittest
+import zlib
+
+from app.storage.compression import CODECS, SnappyCodec, ZlibDictionaryCodec, get_codec
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_codecs_decompress_what_they_compress(self):
+        data = '{"ANSWERS": [{"answer_id": "first-name", "value": "Joe"}], "METADATA": {"ru_ref": "12345678901A"}}'
+
+        for codec in CODECS.values():
+            with self.subTest(codec=codec.name):
+                self.assertEqual(codec.decompress(codec.compress(data)), data.encode('utf-8'))
+
+    def test_get_codec_for_version_codec_was_introduced_with(self):
+        self.assertIsInstance(get_codec(3), SnappyCodec)
+        self.assertIsInstance(get_codec(5), ZlibDictionaryCodec)
+
+    def test_get_codec_for_version_without_new_codec(self):
+        self.assertIs(get_codec(4), get_codec(3))
+
+    def test_get_codec_for_newer_version(self):
+        latest_version = max(CODECS)
+
+        self.assertIs(get_codec(latest_version + 1), get_codec(latest_version))
+
+    def test_get_codec_for_uncompressed_version(self):
+        with self.assertRaises(ValueError):
+            get_codec(2)
+
+    def test_dictionary_improves_compression(self):
+        data = '{"ANSWERS": [{"answer_id": "name-answer", "answer_instance": 0, "group_instance": 0, ' \
+               '"group_instance_id": null, "value": "Joe"}], "COMPLETED_BLOCKS": [], "COLLECTION_METADATA": {}}'
+
+        self.assertLess(len(get_codec(5).compress(data)), len(zlib.compress(data.encode('utf-8'))))
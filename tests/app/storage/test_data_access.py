@@ -3,7 +3,7 @@ from botocore.exceptions import ClientError
 from sqlalchemy.exc import IntegrityError
 
 from app.data_model import models
-from app.data_model.app_models import QuestionnaireState, SubmittedResponse
+from app.data_model.app_models import EQSession, QuestionnaireState, QuestionnaireStateDelta, SubmittedResponse
 from app.storage import data_access
 from app.storage.data_access import ItemAlreadyExistsError
 from tests.app.app_context_test_case import AppContextTestCase
@@ -14,7 +14,7 @@ STATE_DATA = 'statedata'
 VERSION = 1
 
 
-class TestDataAccess(AppContextTestCase):
+class TestDataAccess(AppContextTestCase):  # pylint: disable=too-many-public-methods
 
     def test_get_by_key(self):
         dynamo_item = {'user_id': USER_ID, 'state_data': STATE_DATA, 'version': VERSION}
@@ -44,6 +44,180 @@ class TestDataAccess(AppContextTestCase):
         self.assertEqual(model.version, VERSION)
         self.assertFalse(getattr(model, '_use_dynamo'))
 
+    def test_get_attribute_by_key(self):
+        with mock.patch('app.storage.dynamo_api.get_item', return_value={'revision': 'abc'}) as get_item:
+            revision = data_access.get_attribute_by_key(QuestionnaireState, USER_ID, 'revision')
+
+        self.assertEqual(get_item.call_args[0][1], {'user_id': USER_ID})
+        self.assertEqual(get_item.call_args[1]['attributes'], ['revision'])
+        self.assertEqual(revision, 'abc')
+
+    def test_get_attribute_by_key_rds_fallback(self):
+        with mock.patch('app.storage.dynamo_api.get_item', return_value=None), \
+             mock.patch.object(models.QuestionnaireState, 'query') as query:
+            query.with_entities.return_value.filter_by.return_value.first.return_value = ('abc',)
+            revision = data_access.get_attribute_by_key(QuestionnaireState, USER_ID, 'revision')
+
+        query.with_entities.return_value.filter_by.assert_called_once_with(user_id=USER_ID)
+        self.assertEqual(revision, 'abc')
+
+    def test_get_attribute_by_key_not_found(self):
+        with mock.patch('app.storage.dynamo_api.get_item', return_value=None):
+            self.assertIsNone(data_access.get_attribute_by_key(QuestionnaireState, USER_ID, 'revision'))
+
+    def test_get_by_keys(self):
+        data_access.put_all([QuestionnaireState(USER_ID, STATE_DATA, VERSION), EQSession('session_id', USER_ID, STATE_DATA)])
+
+        with mock.patch('app.storage.dynamo_api.get_item') as get_item:
+            models_by_key = data_access.get_by_keys([(QuestionnaireState, USER_ID), (EQSession, 'session_id'),
+                                                     (EQSession, 'not_found')])
+
+        get_item.assert_not_called()
+        self.assertEqual(models_by_key[(QuestionnaireState, USER_ID)].state_data, STATE_DATA)
+        self.assertEqual(models_by_key[(EQSession, 'session_id')].user_id, USER_ID)
+        self.assertIsNone(models_by_key[(EQSession, 'not_found')])
+
+    def test_get_by_keys_rds_fallback(self):
+        rds_model = models.QuestionnaireState(USER_ID, STATE_DATA, VERSION)
+
+        with mock.patch.object(models.QuestionnaireState, 'query') as query:
+            query.filter_by.return_value.first.return_value = rds_model
+            models_by_key = data_access.get_by_keys([(QuestionnaireState, USER_ID)])
+
+        query.filter_by.assert_called_once_with(user_id=USER_ID)
+        self.assertEqual(models_by_key[(QuestionnaireState, USER_ID)].state_data, STATE_DATA)
+        self.assertFalse(getattr(models_by_key[(QuestionnaireState, USER_ID)], '_use_dynamo'))
+
+    def test_prefetched_model_is_returned_once(self):
+        data_access.put(QuestionnaireState(USER_ID, STATE_DATA, VERSION, 'revision'))
+        data_access.prefetch([(QuestionnaireState, USER_ID), (EQSession, 'not_found')])
+
+        with mock.patch('app.storage.dynamo_api.get_item', return_value=None) as get_item:
+            self.assertEqual(data_access.get_attribute_by_key(QuestionnaireState, USER_ID, 'revision'), 'revision')
+            self.assertEqual(data_access.get_by_key(QuestionnaireState, USER_ID).state_data, STATE_DATA)
+            self.assertIsNone(data_access.get_by_key(EQSession, 'not_found'))
+            get_item.assert_not_called()
+
+            data_access.get_by_key(QuestionnaireState, USER_ID)
+
+        get_item.assert_called_once()
+
+    def test_prefetched_model_is_not_returned_once_written(self):
+        data_access.prefetch([(QuestionnaireState, USER_ID)])
+        data_access.put(QuestionnaireState(USER_ID, STATE_DATA, VERSION))
+
+        self.assertEqual(data_access.get_by_key(QuestionnaireState, USER_ID).state_data, STATE_DATA)
+
+    def test_get_all_by_key(self):
+        data_access.put(QuestionnaireStateDelta(USER_ID, 1, STATE_DATA, VERSION, 'revision'))
+        data_access.put(QuestionnaireStateDelta(USER_ID, 0, STATE_DATA, VERSION, 'revision'))
+
+        deltas = data_access.get_all_by_key(QuestionnaireStateDelta, USER_ID)
+
+        self.assertEqual([delta.sequence for delta in deltas], [0, 1])
+
+    def test_get_all_by_key_rds_fallback(self):
+        rds_model = models.QuestionnaireStateDelta(USER_ID, 0, STATE_DATA, VERSION, 'revision')
+
+        with mock.patch.object(models.QuestionnaireStateDelta, 'query') as query:
+            query.filter_by.return_value.order_by.return_value.all.return_value = [rds_model]
+            deltas = data_access.get_all_by_key(QuestionnaireStateDelta, USER_ID)
+
+        query.filter_by.assert_called_once_with(user_id=USER_ID)
+        self.assertEqual(deltas[0].state_data, STATE_DATA)
+        self.assertFalse(getattr(deltas[0], '_use_dynamo'))
+
+    def test_delete_all(self):
+        for sequence in range(2):
+            data_access.put(QuestionnaireStateDelta(USER_ID, sequence, STATE_DATA, VERSION, 'revision'))
+
+        data_access.delete_all(data_access.get_all_by_key(QuestionnaireStateDelta, USER_ID))
+
+        self.assertEqual(data_access.get_all_by_key(QuestionnaireStateDelta, USER_ID), [])
+
+    def test_get_by_key_async(self):
+        data_access.put(QuestionnaireState(USER_ID, STATE_DATA, VERSION))
+
+        future = data_access.get_by_key_async(QuestionnaireState, USER_ID)
+
+        self.assertEqual(future.result(timeout=5).state_data, STATE_DATA)
+
+    def test_get_by_key_async_prefetched(self):
+        data_access.put(QuestionnaireState(USER_ID, STATE_DATA, VERSION))
+        data_access.prefetch([(QuestionnaireState, USER_ID)])
+
+        with mock.patch('app.storage.executor.submit') as submit:
+            future = data_access.get_by_key_async(QuestionnaireState, USER_ID)
+
+        submit.assert_not_called()
+        self.assertEqual(future.result().state_data, STATE_DATA)
+
+    def test_put_async(self):
+        data_access.put_async(SubmittedResponse('tx_id', 'data', None), overwrite=False).result(timeout=5)
+
+        future = data_access.put_async(SubmittedResponse('tx_id', 'data', None), overwrite=False)
+
+        with self.assertRaises(ItemAlreadyExistsError):
+            future.result(timeout=5)
+
+    def test_deferred_model_is_put_with_next_put(self):
+        session = EQSession('session_id', USER_ID, STATE_DATA)
+        data_access.defer_put(session)
+        data_access.defer_put(session)
+
+        with mock.patch('app.storage.dynamo_api.put_items') as put_items:
+            data_access.put(QuestionnaireState(USER_ID, STATE_DATA, VERSION))
+            data_access.put_deferred()
+
+        put_items.assert_called_once()
+        items_by_table = put_items.call_args[0][0]
+        self.assertEqual([item['eq_session_id'] for item in items_by_table[self._app.config['EQ_SESSION_TABLE_NAME']]],
+                         ['session_id'])
+        self.assertEqual([item['user_id'] for item in items_by_table[self._app.config['EQ_QUESTIONNAIRE_STATE_TABLE_NAME']]],
+                         [USER_ID])
+
+    def test_deferred_model_is_put_before_put_without_overwrite(self):
+        data_access.defer_put(EQSession('session_id', USER_ID, STATE_DATA))
+
+        with mock.patch('app.storage.dynamo_api.put_items') as put_items, \
+                mock.patch('app.storage.dynamo_api.put_item') as put_item:
+            data_access.put(SubmittedResponse('tx_id', 'data', None), overwrite=False)
+
+        put_items.assert_called_once()
+        self.assertFalse(put_item.call_args[1]['overwrite'])
+
+    def test_put_deferred(self):
+        data_access.defer_put(EQSession('session_id', USER_ID, STATE_DATA))
+        data_access.put_deferred()
+
+        self.assertEqual(data_access.get_by_key(EQSession, 'session_id').user_id, USER_ID)
+
+    def test_deferred_models_with_the_same_key_and_different_ranges_are_all_put(self):
+        for sequence in range(2):
+            data_access.defer_put(QuestionnaireStateDelta(USER_ID, sequence, STATE_DATA, VERSION, 'revision'))
+        data_access.put_deferred()
+
+        deltas = data_access.get_all_by_key(QuestionnaireStateDelta, USER_ID)
+
+        self.assertEqual([delta.sequence for delta in deltas], [0, 1])
+
+    def test_deferred_model_is_put_when_request_fails(self):
+        with self.app_request_context('/status'):
+            data_access.defer_put(EQSession('session_id', USER_ID, STATE_DATA))
+            self._app.do_teardown_request(ValueError())
+
+        self.assertEqual(data_access.get_by_key(EQSession, 'session_id').user_id, USER_ID)
+
+    def test_deleted_model_is_not_put_deferred(self):
+        session = EQSession('session_id', USER_ID, STATE_DATA)
+        data_access.defer_put(session)
+        data_access.delete(session)
+
+        with mock.patch('app.storage.dynamo_api.put_items') as put_items:
+            data_access.put_deferred()
+
+        self.assertFalse(put_items.called)
+
     def test_by_key_no_sql(self):
         model = data_access.get_by_key(SubmittedResponse, USER_ID)
 
@@ -98,6 +272,36 @@ class TestDataAccess(AppContextTestCase):
 
         self.assertTrue(add.called)
 
+    def test_put_all_rds_commits_once(self):
+        rds_models = [QuestionnaireStateDelta(USER_ID, sequence, STATE_DATA, VERSION, 'revision') for sequence in range(2)]
+        for model in rds_models:
+            setattr(model, '_use_dynamo', False)
+
+        with mock.patch('app.data_model.models.db.session.merge') as merge, \
+                mock.patch('app.data_model.models.db.session.commit') as commit:
+            data_access.put_all(rds_models)
+
+        self.assertEqual(merge.call_count, 2)
+        commit.assert_called_once()
+
+    def test_put_rds_in_request_transaction(self):
+        model = QuestionnaireState(USER_ID, STATE_DATA, VERSION)
+        setattr(model, '_use_dynamo', False)
+        self._app.config['EQ_SERVER_SIDE_STORAGE_DATABASE_TRANSACTION_PER_REQUEST'] = True
+
+        with self.app_request_context('/'), \
+                mock.patch('app.data_model.models.db.session.merge'), \
+                mock.patch('app.data_model.models.db.session.flush') as flush, \
+                mock.patch('app.data_model.models.db.session.commit') as commit:
+            data_access.put(model)
+            data_access.delete(model)
+
+            flush.assert_called()
+            self.assertFalse(commit.called)
+
+            data_access.commit_request_transaction()
+            commit.assert_called_once()
+
     def test_put_propogate_dynamo_exception(self):
         model = QuestionnaireState(USER_ID, STATE_DATA, VERSION)
 
@@ -1,3 +1,5 @@
+from unittest.mock import Mock, patch
+
 from botocore.exceptions import ClientError
 from flask import current_app
 
@@ -29,6 +31,99 @@ class TestDynamoApi(AppContextTestCase):
         dynamo_api.delete_item(table_name, KEY)
         self._assert_item(None)
 
+    def test_get_attributes(self):  # pylint: disable=no-self-use
+        table_name = current_app.config['EQ_QUESTIONNAIRE_STATE_TABLE_NAME']
+
+        with patch('app.storage.dynamo_api.get_table') as get_table:
+            dynamo_api.get_item(table_name, KEY, attributes=['version', 'updated_at'])
+
+        get_table.return_value.get_item.assert_called_once_with(
+            Key=KEY, ConsistentRead=True, ProjectionExpression='#0, #1',
+            ExpressionAttributeNames={'#0': 'version', '#1': 'updated_at'})
+
+    def test_get_and_put_items(self):
+        state_table_name = current_app.config['EQ_QUESTIONNAIRE_STATE_TABLE_NAME']
+        session_table_name = current_app.config['EQ_SESSION_TABLE_NAME']
+
+        dynamo_api.put_items({
+            state_table_name: [{'user_id': 'user_1', 'version': 1}, {'user_id': 'user_2', 'version': 2}],
+            session_table_name: [{'eq_session_id': 'session_1', 'user_id': 'user_1'}],
+        })
+        items = dynamo_api.get_items({
+            state_table_name: [{'user_id': 'user_1'}, {'user_id': 'not_found'}],
+            session_table_name: [{'eq_session_id': 'session_1'}],
+        })
+
+        self.assertEqual(items, {
+            state_table_name: [{'user_id': 'user_1', 'version': 1}],
+            session_table_name: [{'eq_session_id': 'session_1', 'user_id': 'user_1'}],
+        })
+
+    def test_query_items(self):
+        table_name = current_app.config['EQ_QUESTIONNAIRE_STATE_DELTA_TABLE_NAME']
+        for sequence in (1, 0):
+            dynamo_api.put_item(table_name, 'user_id', {'user_id': 'someuser', 'sequence': sequence})
+        dynamo_api.put_item(table_name, 'user_id', {'user_id': 'otheruser', 'sequence': 0})
+
+        items = dynamo_api.query_items(table_name, 'user_id', 'someuser')
+
+        self.assertEqual([item['sequence'] for item in items], [0, 1])
+
+    def test_delete_items(self):
+        table_name = current_app.config['EQ_QUESTIONNAIRE_STATE_DELTA_TABLE_NAME']
+        keys = [{'user_id': 'someuser', 'sequence': sequence} for sequence in range(30)]
+        for key in keys:
+            dynamo_api.put_item(table_name, 'user_id', key)
+
+        with patch.object(current_app.eq['dynamodb'], 'batch_write_item',
+                          wraps=current_app.eq['dynamodb'].batch_write_item) as batch_write_item:
+            dynamo_api.delete_items(table_name, keys)
+
+        self.assertEqual(batch_write_item.call_count, 2)
+        self.assertEqual(dynamo_api.query_items(table_name, 'user_id', 'someuser'), [])
+
+    def test_put_items_in_batches(self):
+        dynamodb = Mock()
+        dynamodb.batch_write_item.return_value = {'UnprocessedItems': {}}
+
+        with patch.dict(current_app.eq, {'dynamodb': dynamodb}):
+            dynamo_api.put_items({
+                'first': [{'user_id': index} for index in range(20)],
+                'second': [{'user_id': index} for index in range(10)],
+            })
+
+        first_batch, second_batch = [call[1]['RequestItems'] for call in dynamodb.batch_write_item.call_args_list]
+        self.assertEqual((len(first_batch['first']), len(first_batch['second'])), (20, 5))
+        self.assertEqual(list(second_batch), ['second'])
+        self.assertEqual(len(second_batch['second']), 5)
+
+    def test_unprocessed_items_are_retried(self):  # pylint: disable=no-self-use
+        unprocessed_items = {'table': [{'PutRequest': {'Item': {'user_id': 'user_2'}}}]}
+        responses = [{'UnprocessedItems': unprocessed_items}, {'UnprocessedItems': {}}]
+
+        dynamodb = Mock()
+        dynamodb.batch_write_item.side_effect = responses
+
+        with patch.dict(current_app.eq, {'dynamodb': dynamodb}), \
+                patch('app.storage.dynamo_api.sleep') as sleep:
+            dynamo_api.put_items({'table': [{'user_id': 'user_1'}, {'user_id': 'user_2'}]})
+
+        dynamodb.batch_write_item.assert_called_with(RequestItems=unprocessed_items)
+        sleep.assert_called_once_with(dynamo_api.UNPROCESSED_RETRY_DELAY)
+
+    def test_unprocessed_keys_raise_after_retries(self):
+        unprocessed_keys = {'table': {'Keys': [{'user_id': 'user_1'}], 'ConsistentRead': True}}
+
+        dynamodb = Mock()
+        dynamodb.batch_get_item.return_value = {'Responses': {}, 'UnprocessedKeys': unprocessed_keys}
+
+        with patch.dict(current_app.eq, {'dynamodb': dynamodb}), \
+                patch('app.storage.dynamo_api.sleep'), \
+                self.assertRaises(dynamo_api.UnprocessedItemsError):
+            dynamo_api.get_items({'table': [{'user_id': 'user_1'}]})
+
+        self.assertEqual(dynamodb.batch_get_item.call_count, current_app.config['EQ_DYNAMODB_MAX_RETRIES'] + 1)
+
     def _assert_item(self, version):
         table_name = current_app.config['EQ_QUESTIONNAIRE_STATE_TABLE_NAME']
         item = dynamo_api.get_item(table_name, KEY)
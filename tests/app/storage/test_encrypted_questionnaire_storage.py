@@ -1,13 +1,15 @@
 import unittest
+from unittest.mock import patch
 import json
-import snappy
 
 from jwcrypto import jwe
 from jwcrypto.common import base64url_encode
 
-from app.data_model.app_models import QuestionnaireState
+from app.data_model.app_models import QuestionnaireState, QuestionnaireStateDelta
 from app.data_model.questionnaire_store import QuestionnaireStore
 from app.storage import data_access
+from app.storage.compression import get_codec
+from app.storage.questionnaire_state_cache import QuestionnaireStateCache
 from app.storage.encrypted_questionnaire_storage import EncryptedQuestionnaireStorage
 from app.storage.storage_encryption import StorageEncryption
 from tests.app.app_context_test_case import AppContextTestCase
@@ -49,6 +51,12 @@ class TestEncryptedQuestionnaireStorage(AppContextTestCase):
         # check we can decrypt the data
         self.assertEqual(('test', QuestionnaireStore.LATEST_VERSION), encrypted.get_user_data())
 
+    def test_store_encrypts_into_envelope(self):
+        self.storage.add_or_update('test', QuestionnaireStore.LATEST_VERSION)
+
+        questionnaire_state = data_access.get_by_key(QuestionnaireState, 'user_id')
+        self.assertIsInstance(questionnaire_state.state_data, bytes)
+
     def test_store(self):
         data = 'test'
         self.assertIsNone(self.storage.add_or_update(data, QuestionnaireStore.LATEST_VERSION))
@@ -66,6 +74,134 @@ class TestEncryptedQuestionnaireStorage(AppContextTestCase):
         self.storage.delete()
         self.assertEqual((None, None), self.storage.get_user_data())  # pylint: disable=protected-access
 
+    def test_update_does_not_read_loaded_state(self):
+        self.storage.add_or_update('test', QuestionnaireStore.LATEST_VERSION)
+        storage = EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper')
+        storage.get_user_data()
+
+        with patch('app.storage.data_access.get_by_key') as get_by_key:
+            storage.add_or_update('test update', QuestionnaireStore.LATEST_VERSION)
+            storage.add_or_update('test update again', QuestionnaireStore.LATEST_VERSION)
+
+        get_by_key.assert_not_called()
+        self.assertEqual(('test update again', QuestionnaireStore.LATEST_VERSION), storage.get_user_data())
+
+    def test_create_after_delete(self):
+        self.storage.add_or_update('test', QuestionnaireStore.LATEST_VERSION)
+        self.storage.delete()
+        self.storage.add_or_update('test', QuestionnaireStore.LATEST_VERSION)
+
+        self.assertEqual(('test', QuestionnaireStore.LATEST_VERSION), self.storage.get_user_data())
+
+
+class TestEncryptedQuestionnaireStorageCache(AppContextTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.state_cache = QuestionnaireStateCache(max_bytes=10000, ttl=60)
+        patcher = patch('app.storage.encrypted_questionnaire_storage.state_cache', self.state_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_state_written_is_read_from_cache(self):
+        EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper').add_or_update('test', QuestionnaireStore.LATEST_VERSION)
+        storage = EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper')
+
+        with patch('app.storage.data_access.get_by_key') as get_by_key:
+            self.assertEqual(('test', QuestionnaireStore.LATEST_VERSION), storage.get_user_data())
+            storage.add_or_update('test update', QuestionnaireStore.LATEST_VERSION)
+
+        get_by_key.assert_not_called()
+        self.assertEqual(('test update', QuestionnaireStore.LATEST_VERSION),
+                         EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper').get_user_data())
+
+    def test_state_written_elsewhere_is_read(self):
+        EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper').add_or_update('test', QuestionnaireStore.LATEST_VERSION)
+
+        with patch('app.storage.encrypted_questionnaire_storage.state_cache', QuestionnaireStateCache(max_bytes=0, ttl=60)):
+            EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper').add_or_update('test update', QuestionnaireStore.LATEST_VERSION)
+
+        self.assertEqual(('test update', QuestionnaireStore.LATEST_VERSION),
+                         EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper').get_user_data())
+
+    def test_state_not_read_from_cache_with_another_key(self):
+        EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper').add_or_update('test', QuestionnaireStore.LATEST_VERSION)
+
+        with self.assertRaises(Exception):
+            EncryptedQuestionnaireStorage('user_id', 'another_user_ik', 'pepper').get_user_data()
+
+    def test_deleted_state_is_not_read_from_cache(self):
+        storage = EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper')
+        storage.add_or_update('test', QuestionnaireStore.LATEST_VERSION)
+        storage.delete()
+
+        self.assertEqual((None, None), EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper').get_user_data())
+        self.assertEqual(len(self.state_cache), 0)
+
+
+class TestEncryptedQuestionnaireStorageDeltas(AppContextTestCase):
+
+    def setUp(self):
+        super().setUp()
+        EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper').add_or_update('state', QuestionnaireStore.LATEST_VERSION)
+        self.storage = self._load()
+
+    @staticmethod
+    def _load():
+        storage = EncryptedQuestionnaireStorage('user_id', 'user_ik', 'pepper')
+        storage.get_user_data()
+        return storage
+
+    def test_add_and_get_deltas(self):
+        self.assertEqual(self.storage.get_deltas(), [])
+        self.assertTrue(self.storage.add_delta('first', QuestionnaireStore.LATEST_VERSION))
+        self.assertTrue(self.storage.add_delta('second', QuestionnaireStore.LATEST_VERSION))
+
+        self.assertEqual(self._load().get_deltas(), ['first', 'second'])
+
+    def test_deltas_are_encrypted(self):
+        self.storage.get_deltas()
+        self.storage.add_delta('first', QuestionnaireStore.LATEST_VERSION)
+
+        delta = data_access.get_all_by_key(QuestionnaireStateDelta, 'user_id')[0]
+        self.assertNotIn(b'first', delta.state_data)
+
+    def test_delta_not_added_before_deltas_read(self):
+        self.assertFalse(self.storage.add_delta('first', QuestionnaireStore.LATEST_VERSION))
+
+    def test_delta_not_added_after_another_delta(self):
+        other_storage = self._load()
+        self.storage.get_deltas()
+        other_storage.get_deltas()
+
+        self.assertTrue(other_storage.add_delta('other', QuestionnaireStore.LATEST_VERSION))
+        self.assertFalse(self.storage.add_delta('first', QuestionnaireStore.LATEST_VERSION))
+
+    def test_deltas_deleted_when_saved_in_full(self):
+        self.storage.get_deltas()
+        self.storage.add_delta('first', QuestionnaireStore.LATEST_VERSION)
+        self.storage.add_or_update('state', QuestionnaireStore.LATEST_VERSION)
+
+        self.assertEqual(data_access.get_all_by_key(QuestionnaireStateDelta, 'user_id'), [])
+        self.assertTrue(self.storage.add_delta('second', QuestionnaireStore.LATEST_VERSION))
+        self.assertEqual(self._load().get_deltas(), ['second'])
+
+    def test_deltas_to_previous_revision_ignored(self):
+        self.storage.get_deltas()
+        self.storage.add_delta('first', QuestionnaireStore.LATEST_VERSION)
+
+        with patch('app.storage.data_access.delete_all'):
+            self.storage.add_or_update('state', QuestionnaireStore.LATEST_VERSION)
+
+        self.assertEqual(self._load().get_deltas(), [])
+
+    def test_delete_deletes_deltas(self):
+        self.storage.get_deltas()
+        self.storage.add_delta('first', QuestionnaireStore.LATEST_VERSION)
+        self.storage.delete()
+
+        self.assertEqual(data_access.get_all_by_key(QuestionnaireStateDelta, 'user_id'), [])
+
 
 class TestEncryptedQuestionnaireStorageEncoding(AppContextTestCase):
     """Compression didn't used to be applied to the questionnaire store data. It also
@@ -112,6 +248,34 @@ class TestEncryptedQuestionnaireStorageEncoding(AppContextTestCase):
         self._save_compressed_state_data(self.user_id, 'test')
         self.assertEqual(('test', QuestionnaireStore.LATEST_VERSION + 1), self.storage.get_user_data())
 
+    def test_jwe_state_read_and_saved_as_envelope(self):
+        """Tests that snappy compressed JWE state from version 3 can be read and is then
+        saved in an envelope
+        """
+        self._save_compressed_state_data(self.user_id, 'test', version=3)
+        self.assertEqual(('test', 3), self.storage.get_user_data())
+
+        self.storage.add_or_update('test update', QuestionnaireStore.LATEST_VERSION)
+
+        questionnaire_state = data_access.get_by_key(QuestionnaireState, self.user_id)
+        self.assertIsInstance(questionnaire_state.state_data, bytes)
+        self.assertEqual(('test update', QuestionnaireStore.LATEST_VERSION), self.storage.get_user_data())
+
+    def test_snappy_state_read_and_saved_with_latest_codec(self):
+        """Tests that snappy compressed state from version 4 can be read and is then
+        saved with the codec of the latest version
+        """
+        encrypter = self.storage.encrypter
+        state_data = encrypter.encrypt_data_as_envelope(get_codec(3).compress('test'))
+        data_access.put(QuestionnaireState(self.user_id, state_data, 4))
+        self.assertEqual(('test', 4), self.storage.get_user_data())
+
+        self.storage.add_or_update('test update', QuestionnaireStore.LATEST_VERSION)
+
+        questionnaire_state = data_access.get_by_key(QuestionnaireState, self.user_id)
+        decrypted_data = encrypter.decrypt_data(questionnaire_state.state_data)
+        self.assertEqual(get_codec(QuestionnaireStore.LATEST_VERSION).decompress(decrypted_data), b'test update')
+
     def _save_legacy_state_data(self, user_id, data):
         protected_header = {
             'alg': 'dir',
@@ -134,7 +298,7 @@ class TestEncryptedQuestionnaireStorageEncoding(AppContextTestCase):
         )
         data_access.put(questionnaire_state)
 
-    def _save_compressed_state_data(self, user_id, data):
+    def _save_compressed_state_data(self, user_id, data, version=QuestionnaireStore.LATEST_VERSION + 1):
         protected_header = {
             'alg': 'dir',
             'enc': 'A256GCM',
@@ -142,7 +306,7 @@ class TestEncryptedQuestionnaireStorageEncoding(AppContextTestCase):
         }
 
         jwe_token = jwe.JWE(
-            plaintext=snappy.compress(data),
+            plaintext=get_codec(version).compress(data),
             protected=protected_header,
             recipient=self.storage.encrypter.key
         )
@@ -152,7 +316,7 @@ class TestEncryptedQuestionnaireStorageEncoding(AppContextTestCase):
         questionnaire_state = QuestionnaireState(
             user_id,
             state_data,
-            QuestionnaireStore.LATEST_VERSION + 1
+            version
         )
         data_access.put(questionnaire_state)
 
@@ -0,0 +1,77 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from mock import patch
+
+from app.storage import executor
+from app.storage.executor import GreenletExecutor
+from tests.app.app_context_test_case import AppContextTestCase
+
+
+class TestExecutor(AppContextTestCase):
+
+    def tearDown(self):
+        executor.shutdown()
+        super().tearDown()
+
+    def test_submit_runs_in_app_context(self):
+        app = current_app._get_current_object()  # pylint: disable=protected-access
+
+        future = executor.submit(lambda: current_app._get_current_object())  # pylint: disable=protected-access,unnecessary-lambda
+
+        self.assertIs(future.result(timeout=5), app)
+
+    def test_submit_result_raises_exception(self):
+        def fail():
+            raise ValueError('failed')
+
+        with self.assertRaises(ValueError):
+            executor.submit(fail).result(timeout=5)
+
+    def test_completed(self):
+        future = executor.completed('result')
+
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), 'result')
+
+    def test_threads_without_gevent(self):
+        with patch('app.storage.executor.is_gevent_patched', return_value=False):
+            executor.submit(int).result(timeout=5)
+
+        self.assertIsInstance(executor._executor, ThreadPoolExecutor)  # pylint: disable=protected-access
+
+    def test_greenlets_under_gevent(self):
+        with patch('app.storage.executor.is_gevent_patched', return_value=True):
+            future = executor.submit(int, '1')
+
+        self.assertIsInstance(executor._executor, GreenletExecutor)  # pylint: disable=protected-access
+
+        # without gevent patching, waiting on the future would not yield to the greenlet
+        executor.shutdown()
+        self.assertEqual(future.result(timeout=5), 1)
+
+    def test_pool_size_from_settings(self):
+        current_app.config['EQ_DYNAMODB_MAX_POOL_CONNECTIONS'] = 3
+
+        executor.submit(int).result(timeout=5)
+
+        self.assertEqual(executor._executor._max_workers, 3)  # pylint: disable=protected-access
+
+
+class TestGreenletExecutor(unittest.TestCase):
+
+    def test_submit(self):
+        greenlet_executor = GreenletExecutor(2)
+        future = greenlet_executor.submit(sum, [1, 2])
+        greenlet_executor.shutdown()
+
+        self.assertEqual(future.result(timeout=5), 3)
+
+    def test_submit_result_raises_exception(self):
+        greenlet_executor = GreenletExecutor(2)
+        future = greenlet_executor.submit(int, 'one')
+        greenlet_executor.shutdown()
+
+        with self.assertRaises(ValueError):
+            future.result(timeout=5)
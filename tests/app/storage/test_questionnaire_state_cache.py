@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from app.data_model.app_models import QuestionnaireState
+from app.instrumentation import get_counters, reset_counters
+from app.storage.questionnaire_state_cache import QuestionnaireStateCache
+
+
+def _questionnaire_state(revision='1', state_data=b'encrypted'):
+    return QuestionnaireState('user_id', state_data, 5, revision)
+
+
+class TestQuestionnaireStateCache(unittest.TestCase):
+
+    def setUp(self):
+        reset_counters()
+        self.cache = QuestionnaireStateCache(max_bytes=1000, ttl=60)
+
+    def test_get_cached_state(self):
+        questionnaire_state = _questionnaire_state()
+        self.cache.set('user_id', 'key', questionnaire_state, 'data')
+
+        cached_state, data = self.cache.get('user_id', 'key', Mock(return_value='1'))
+
+        self.assertEqual(data, 'data')
+        self.assertEqual(vars(cached_state), vars(questionnaire_state))
+        self.assertIsNot(cached_state, questionnaire_state)
+        self.assertEqual(get_counters(), {'questionnaire_state_cache_hit': 1})
+
+    def test_get_with_another_key(self):
+        self.cache.set('user_id', 'key', _questionnaire_state(), 'data')
+
+        self.assertIsNone(self.cache.get('user_id', 'another key', Mock(return_value='1')))
+        self.assertEqual(get_counters(), {'questionnaire_state_cache_miss': 1})
+
+    def test_get_when_stored_revision_has_changed(self):
+        self.cache.set('user_id', 'key', _questionnaire_state(), 'data')
+
+        self.assertIsNone(self.cache.get('user_id', 'key', Mock(return_value='2')))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(get_counters(), {'questionnaire_state_cache_stale': 1})
+
+    def test_revision_not_read_within_sticky_window(self):
+        cache = QuestionnaireStateCache(max_bytes=1000, ttl=60, sticky_seconds=5)
+        get_revision = Mock(return_value='1')
+
+        with patch('app.storage.questionnaire_state_cache.monotonic', return_value=1000):
+            cache.set('user_id', 'key', _questionnaire_state(), 'data')
+        with patch('app.storage.questionnaire_state_cache.monotonic', return_value=1004):
+            self.assertIsNotNone(cache.get('user_id', 'key', get_revision))
+
+        get_revision.assert_not_called()
+
+        with patch('app.storage.questionnaire_state_cache.monotonic', return_value=1005):
+            self.assertIsNotNone(cache.get('user_id', 'key', get_revision))
+
+        get_revision.assert_called_once_with()
+
+    def test_cached_state_expires(self):
+        with patch('app.storage.questionnaire_state_cache.monotonic', return_value=1000):
+            self.cache.set('user_id', 'key', _questionnaire_state(), 'data')
+        with patch('app.storage.questionnaire_state_cache.monotonic', return_value=1060):
+            self.assertIsNone(self.cache.get('user_id', 'key', Mock(return_value='1')))
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(get_counters(), {'questionnaire_state_cache_expired': 1})
+
+    def test_least_recently_used_state_is_evicted(self):
+        cache = QuestionnaireStateCache(max_bytes=30, ttl=60)
+
+        cache.set('user_1', 'key', _questionnaire_state(), 'data')
+        cache.set('user_2', 'key', _questionnaire_state(), 'data')
+        cache.get('user_1', 'key', Mock(return_value='1'))
+        cache.set('user_3', 'key', _questionnaire_state(), 'data')
+
+        self.assertEqual(cache.size, 26)
+        self.assertIsNone(cache.get('user_2', 'key', Mock(return_value='1')))
+        self.assertIsNotNone(cache.get('user_1', 'key', Mock(return_value='1')))
+        self.assertEqual(get_counters()['questionnaire_state_cache_evicted'], 1)
+
+    def test_replacing_state_updates_size(self):
+        self.cache.set('user_id', 'key', _questionnaire_state(), 'data')
+        self.cache.set('user_id', 'key', _questionnaire_state(), 'more data')
+
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.size, 18)
+
+    def test_state_larger_than_cache_is_not_cached(self):
+        self.cache.set('user_id', 'key', _questionnaire_state(), 'data')
+        self.cache.set('user_id', 'key', _questionnaire_state(), 'x' * 1000)
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_state_without_revision_is_not_cached(self):
+        self.cache.set('user_id', 'key', _questionnaire_state(revision=None), 'data')
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_delete(self):
+        self.cache.set('user_id', 'key', _questionnaire_state(), 'data')
+        self.cache.delete('user_id')
+
+        self.assertIsNone(self.cache.get('user_id', 'key', Mock(return_value='1')))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_disabled_cache(self):
+        cache = QuestionnaireStateCache(max_bytes=0, ttl=60)
+        cache.set('user_id', 'key', _questionnaire_state(), 'data')
+
+        self.assertIsNone(cache.get('user_id', 'key', Mock(return_value='1')))
+        self.assertEqual(get_counters(), {})
@@ -1,7 +1,9 @@
 from unittest import TestCase
+from unittest.mock import patch
 import simplejson as json
+from cryptography.exceptions import InvalidTag
 
-from app.storage.storage_encryption import StorageEncryption
+from app.storage.storage_encryption import ENVELOPE_VERSION, KeyCache, StorageEncryption, flush_key_cache, key_cache
 
 
 # pylint: disable=W0212
@@ -56,6 +58,87 @@ class TestStorageEncryption(TestCase):
         decrypted_data = json.loads(decrypted_data)
         self.assertEqual(data, decrypted_data)
 
+    def test_envelope_encryption_decryption(self):
+        data = {
+            'data1': 'Test Data One',
+            'data2': 'Test Data Two'
+        }
+        encrypted_data = self.encrypter.encrypt_data_as_envelope(data)
+        self.assertIsInstance(encrypted_data, bytes)
+        self.assertTrue(encrypted_data.startswith(ENVELOPE_VERSION))
+
+        decrypted_data = self.encrypter.decrypt_data(encrypted_data)
+        decrypted_data = json.loads(decrypted_data)
+        self.assertEqual(data, decrypted_data)
+
+    def test_envelope_nonce_is_not_reused(self):
+        self.assertNotEqual(self.encrypter.encrypt_data_as_envelope(b'data'),
+                            self.encrypter.encrypt_data_as_envelope(b'data'))
+
+    def test_envelope_decryption_requires_same_key(self):
+        encrypted_data = self.encrypter.encrypt_data_as_envelope(b'data')
+
+        with self.assertRaises(InvalidTag):
+            StorageEncryption('user_id', 'another_user_ik', 'pepper').decrypt_data(encrypted_data)
+
+    def test_envelope_decryption_rejects_tampered_data(self):
+        encrypted_data = bytearray(self.encrypter.encrypt_data_as_envelope(b'data'))
+        encrypted_data[-1] ^= 1
+
+        with self.assertRaises(InvalidTag):
+            self.encrypter.decrypt_data(bytes(encrypted_data))
+
+    def test_envelope_decryption_rejects_unknown_version(self):
+        encrypted_data = self.encrypter.encrypt_data_as_envelope(b'data')
+
+        with self.assertRaises(ValueError):
+            self.encrypter.decrypt_data(b'\x02' + encrypted_data[1:])
+
     def test_no_pepper(self):
         with self.assertRaises(ValueError):
             self.encrypter = StorageEncryption('user_id', 'user_ik', None)
+
+    def test_key_is_cached(self):
+        flush_key_cache()
+        key1 = StorageEncryption('user1', 'user_ik_1', 'pepper').key
+        key2 = StorageEncryption('user1', 'user_ik_1', 'pepper').key
+        key3 = StorageEncryption('user1', 'user_ik_1', 'another pepper').key
+
+        self.assertIs(key1, key2)
+        self.assertIsNot(key1, key3)
+        self.assertEqual(len(key_cache), 2)
+
+    def test_flush_key_cache(self):
+        key1 = StorageEncryption('user1', 'user_ik_1', 'pepper').key
+        flush_key_cache()
+        key2 = StorageEncryption('user1', 'user_ik_1', 'pepper').key
+
+        self.assertIsNot(key1, key2)
+        self.assertEqual(key1._key['k'], key2._key['k'])
+
+
+class TestKeyCache(TestCase):
+
+    def test_cached_keys_expire(self):
+        cache = KeyCache(max_size=10, ttl=60)
+
+        with patch('app.storage.storage_encryption.monotonic', return_value=1000):
+            key1 = cache.get(StorageEncryption._generate_key, 'user1', 'user_ik_1', 'pepper')
+        with patch('app.storage.storage_encryption.monotonic', return_value=1059):
+            key2 = cache.get(StorageEncryption._generate_key, 'user1', 'user_ik_1', 'pepper')
+        with patch('app.storage.storage_encryption.monotonic', return_value=1061):
+            key3 = cache.get(StorageEncryption._generate_key, 'user1', 'user_ik_1', 'pepper')
+
+        self.assertIs(key1, key2)
+        self.assertIsNot(key1, key3)
+
+    def test_least_recently_used_keys_are_removed(self):
+        cache = KeyCache(max_size=2, ttl=60)
+
+        key1 = cache.get(StorageEncryption._generate_key, 'user1', 'user_ik_1', 'pepper')
+        cache.get(StorageEncryption._generate_key, 'user2', 'user_ik_2', 'pepper')
+        cache.get(StorageEncryption._generate_key, 'user1', 'user_ik_1', 'pepper')
+        cache.get(StorageEncryption._generate_key, 'user3', 'user_ik_3', 'pepper')
+
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get(StorageEncryption._generate_key, 'user1', 'user_ik_1', 'pepper'), key1)
@@ -48,7 +48,7 @@ class TestMetadataContext(AppContextTestCase):
 
     def test_defend_against_XSS_attack(self):
         jwt = self.jwt.copy()
-        escaped_bad_characters = r'&lt;&#34;&gt;\\'
+        escaped_bad_characters = '&lt;&#34;&gt;\\'
 
         for key in PROPERTIES:
             jwt[key] = '<">\\'
@@ -198,7 +198,7 @@ class TestBuildAnswersContext(TestCase):
         self.assertEqual(len(context_answers), 1)
         self.assertEqual(context_answers['first_name'], r'&#34;')
 
-    def test_given_backslash_in_answers_when_create_context_then_backslash_are_escaped(self):
+    def test_given_backslash_in_answers_when_create_context_then_backslash_unchanged(self):
         # Given
         self.answer_store.add_or_update(Answer(
             answer_id='first_name',
@@ -211,7 +211,7 @@ class TestBuildAnswersContext(TestCase):
 
         # Then
         self.assertEqual(len(context_answers), 1)
-        self.assertEqual(context_answers['first_name'], r'\\')
+        self.assertEqual(context_answers['first_name'], '\\')
 
     def test_build_answers_excludes_answers_not_in_routing_path(self):
         # Given
@@ -323,7 +323,7 @@ class TestBuildSchemaMetadata(TestCase):
         # Then
         self.assertEqual(metadata_context['trad_as'], r'&#34;trading name&#34;')
 
-    def test_given_backslash_in_trading_name_when_create_context_then_backslash_are_escaped(self):
+    def test_given_backslash_in_trading_name_when_create_context_then_backslash_unchanged(self):
         # Given
         self.metadata['trad_as'] = '\\trading name\\'
 
@@ -331,7 +331,7 @@ class TestBuildSchemaMetadata(TestCase):
         metadata_context = build_schema_metadata(self.metadata, self.schema)
 
         # Then
-        self.assertEqual(metadata_context['trad_as'], r'\\trading name\\')
+        self.assertEqual(metadata_context['trad_as'], '\\trading name\\')
 
     def test_given_quotes_in_ru_name_when_create_context_then_quotes_are_html_encoded(self):
         # Given
@@ -343,7 +343,7 @@ class TestBuildSchemaMetadata(TestCase):
         # Then
         self.assertEqual(metadata_context['ru_name'], r'&#34;ru name&#34;')
 
-    def test_given_backslash_in_ru_name_when_create_context_then_backslash_are_escaped(self):
+    def test_given_backslash_in_ru_name_when_create_context_then_backslash_unchanged(self):
         # Given
         self.metadata['ru_name'] = '\\ru name\\'
 
@@ -351,4 +351,4 @@ class TestBuildSchemaMetadata(TestCase):
         metadata_context = build_schema_metadata(self.metadata, self.schema)
 
         # Then
-        self.assertEqual(metadata_context['ru_name'], r'\\ru name\\')
+        self.assertEqual(metadata_context['ru_name'], '\\ru name\\')
@@ -189,6 +189,20 @@ class TestCalculatedSummaryContext(TestStandardSummaryContext):
 
 
     @patch('app.jinja_filters.flask_babel.get_locale', Mock(return_value='en_GB'))
+    def test_build_view_context_for_calculated_summary_does_not_change_schema(self):
+        current_location = Location(
+            block_id='currency-total-playback',
+            group_id='group',
+            group_instance=0,
+        )
+        answers_by_question = {question['id']: list(question['answers']) for question in self.schema.questions}
+
+        build_view_context_for_calculated_summary(self.metadata, self.schema, self.answer_store,
+                                                  self.schema_context, self.block_type,
+                                                  None, current_location)
+
+        self.assertEqual({question['id']: question['answers'] for question in self.schema.questions}, answers_by_question)
+
     def test_build_view_context_for_currency_calculated_summary_with_skip(self):
         variables = None
 
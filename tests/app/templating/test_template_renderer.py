@@ -4,6 +4,7 @@
 
 import datetime
 
+from app.instrumentation import get_counters, reset_counters
 from app.templating.template_renderer import TemplateRenderer
 from tests.app.app_context_test_case import AppContextTestCase
 
@@ -257,3 +258,92 @@ class TestTemplateRenderer(AppContextTestCase):
         }
         rendered = TemplateRenderer().render(content, **context)
         self.assertEqual(rendered, 'The least recent date is {}'.format(then))
+
+    def test_render_reuses_compiled_template(self):
+        renderer = TemplateRenderer()
+        block = {'title': 'Hello {{name}}'}
+
+        self.assertEqual(renderer.render(block, name='Joe Bloggs'), {'title': 'Hello Joe Bloggs'})
+        self.assertEqual(renderer.render(block, name='Jane Bloggs'), {'title': 'Hello Jane Bloggs'})
+
+        cache_info = renderer.cache_info()
+        self.assertEqual(cache_info.misses, 1)
+        self.assertEqual(cache_info.hits, 1)
+
+    def test_render_counts_template_cache_hits_and_misses(self):
+        reset_counters()
+        renderer = TemplateRenderer()
+
+        renderer.render('Hello {{name}}', name='Joe Bloggs')
+        renderer.render('Hello {{name}}', name='Jane Bloggs')
+
+        counters = get_counters()
+        self.assertEqual(counters['template_cache_miss'], 1)
+        self.assertEqual(counters['template_cache_hit'], 1)
+
+    def test_render_without_template_markers_does_not_compile_template(self):
+        renderer = TemplateRenderer()
+        block = {'title': 'Hello', 'list': ['People here on holiday']}
+
+        rendered = renderer.render(block, name='Joe Bloggs')
+
+        self.assertIs(rendered, block)
+        self.assertEqual(renderer.render('Hello'), 'Hello')
+        self.assertEqual(renderer.cache_info().currsize, 0)
+
+    def test_precompile_compiles_templates_into_cache(self):
+        renderer = TemplateRenderer()
+        block = {'title': 'Hello {{name}}', 'questions': [{'title': 'Hello'}, {'title': 'Are you {{name}}?'}]}
+
+        self.assertTrue(renderer.precompile(block))
+        self.assertEqual(renderer.cache_info().currsize, 2)
+
+        renderer.render(block, name='Joe Bloggs')
+        self.assertEqual(renderer.cache_info().hits, 2)
+
+    def test_precompile_stops_once_cache_is_full(self):
+        renderer = TemplateRenderer(cache_size=2)
+        block = {'title': '{{first}}', 'questions': [{'title': '{{second}}'}, {'title': '{{third}}'}]}
+
+        self.assertFalse(renderer.precompile(block))
+        self.assertEqual(renderer.cache_info().misses, 2)
+        self.assertTrue(renderer.precompile({'title': 'Hello'}))
+
+    def test_compiled_template_cache_is_bounded(self):
+        renderer = TemplateRenderer(cache_size=2)
+
+        for name in ('first', 'second', 'third'):
+            renderer.render('{{' + name + '}}', **{name: name})
+
+        self.assertEqual(renderer.cache_info().currsize, 2)
+
+    def test_render_shares_parts_of_renderable_without_templates(self):
+        block = {
+            'title': 'Hello {{name}}',
+            'guidance': {'title': 'Include'},
+            'answers': [{'id': 'first-answer', 'label': '{{name}}'}, {'id': 'second-answer'}],
+        }
+
+        rendered = TemplateRenderer().render(block, name='Joe Bloggs')
+
+        self.assertEqual(rendered, {
+            'title': 'Hello Joe Bloggs',
+            'guidance': {'title': 'Include'},
+            'answers': [{'id': 'first-answer', 'label': 'Joe Bloggs'}, {'id': 'second-answer'}],
+        })
+        self.assertIs(rendered['guidance'], block['guidance'])
+        self.assertIs(rendered['answers'][1], block['answers'][1])
+        self.assertEqual(block['title'], 'Hello {{name}}')
+        self.assertEqual(block['answers'][0]['label'], '{{name}}')
+
+    def test_render_dict_with_json_characters_in_context(self):
+        block = {'title': '{{ [answers.person_name] | format_household_name }}'}
+        context = {
+            'answers': {
+                'person_name': '\\n"}',
+            }
+        }
+
+        rendered = TemplateRenderer().render(block, **context)
+
+        self.assertEqual(rendered, {'title': '\\n&#34;}'})
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from dateutil.tz import tzutc
+from flask import current_app, session as cookie_session
+from mock import patch
+
+from app.data_model.questionnaire_store import QuestionnaireStore
+from app.data_model.session_data import SessionData
+from app.data_model.session_store import SessionStore
+from app.globals import get_questionnaire_store, get_session_store, store_user_id_in_cookie
+from app.settings import EQ_SESSION_ID, ENCRYPTED_USER_ID, USER_IK
+from app.storage.encrypted_questionnaire_storage import EncryptedQuestionnaireStorage
+from app.storage.questionnaire_state_cache import state_cache
+from tests.app.app_context_test_case import AppContextTestCase
+
+QUESTIONNAIRE_URL = '/questionnaire/eq_id/form_type/collection_id/group/0/block'
+
+
+class TestGlobals(AppContextTestCase):
+
+    def setUp(self):
+        super().setUp()
+        pepper = current_app.eq['secret_store'].get_secret_by_name('EQ_SERVER_SIDE_STORAGE_ENCRYPTION_USER_PEPPER')
+        session_data = SessionData(
+            tx_id='tx_id',
+            eq_id='eq_id',
+            form_type='form_type',
+            period_str='period_str',
+            language_code=None,
+            survey_url=None,
+            ru_name='ru_name',
+            ru_ref='ru_ref',
+            case_id='case_id'
+        )
+        expires_at = datetime.now(tzutc()) + timedelta(seconds=60)
+
+        with self.app_request_context('/status'):
+            SessionStore('user_ik', pepper).create('eq_session_id', 'user_id', session_data, expires_at).save()
+            EncryptedQuestionnaireStorage('user_id', 'user_ik', pepper).add_or_update('{}', QuestionnaireStore.LATEST_VERSION)
+
+    def test_session_and_questionnaire_state_read_together(self):
+        with self.app_request_context(QUESTIONNAIRE_URL):
+            cookie_session[USER_IK] = 'user_ik'
+            cookie_session[EQ_SESSION_ID] = 'eq_session_id'
+            store_user_id_in_cookie('user_id')
+
+            with patch('app.storage.dynamo_api.get_item') as get_item:
+                session_store = get_session_store()
+                get_questionnaire_store(session_store.user_id, 'user_ik')
+
+            get_item.assert_not_called()
+
+    def test_session_read_alone_without_user_id_in_cookie(self):
+        with self.app_request_context(QUESTIONNAIRE_URL):
+            cookie_session[USER_IK] = 'user_ik'
+            cookie_session[EQ_SESSION_ID] = 'eq_session_id'
+
+            with patch('app.storage.dynamo_api.get_items') as get_items:
+                session_store = get_session_store()
+                get_questionnaire_store(session_store.user_id, 'user_ik')
+
+            get_items.assert_not_called()
+            self.assertEqual(session_store.user_id, 'user_id')
+
+    def test_session_read_alone_when_user_id_in_cookie_cannot_be_decrypted(self):
+        with self.app_request_context(QUESTIONNAIRE_URL):
+            cookie_session[USER_IK] = 'user_ik'
+            cookie_session[EQ_SESSION_ID] = 'other_eq_session_id'
+            store_user_id_in_cookie('user_id')
+            cookie_session[EQ_SESSION_ID] = 'eq_session_id'
+
+            with patch('app.storage.dynamo_api.get_items') as get_items:
+                session_store = get_session_store()
+
+            get_items.assert_not_called()
+            self.assertEqual(session_store.user_id, 'user_id')
+
+    def test_session_read_alone_outside_the_questionnaire(self):
+        with self.app_request_context('/status'):
+            cookie_session[USER_IK] = 'user_ik'
+            cookie_session[EQ_SESSION_ID] = 'eq_session_id'
+            store_user_id_in_cookie('user_id')
+
+            with patch('app.storage.dynamo_api.get_items') as get_items:
+                session_store = get_session_store()
+
+            get_items.assert_not_called()
+            self.assertEqual(session_store.user_id, 'user_id')
+
+    def test_session_read_alone_when_questionnaire_state_is_cached(self):
+        with self.app_request_context(QUESTIONNAIRE_URL):
+            cookie_session[USER_IK] = 'user_ik'
+            cookie_session[EQ_SESSION_ID] = 'eq_session_id'
+            store_user_id_in_cookie('user_id')
+
+            with patch('app.storage.dynamo_api.get_items') as get_items, \
+                    patch.object(state_cache, '_entries', {'user_id': None}):
+                session_store = get_session_store()
+
+            get_items.assert_not_called()
+            self.assertEqual(session_store.user_id, 'user_id')
+
+    def test_user_id_is_not_readable_from_cookie(self):
+        with self.app_request_context('/status'):
+            cookie_session[USER_IK] = 'user_ik'
+            cookie_session[EQ_SESSION_ID] = 'eq_session_id'
+            store_user_id_in_cookie('user_id')
+
+            self.assertNotIn(b'user_id', cookie_session[ENCRYPTED_USER_ID])
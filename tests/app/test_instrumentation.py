@@ -0,0 +1,29 @@
+import unittest
+
+from app.instrumentation import get_counters, increment, reset_counters
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        reset_counters()
+
+    def test_increment(self):
+        increment('first')
+        increment('first')
+        increment('second', 5)
+
+        self.assertEqual(get_counters(), {'first': 2, 'second': 5})
+
+    def test_get_counters_returns_copy(self):
+        increment('first')
+        counters = get_counters()
+        increment('first')
+
+        self.assertEqual(counters, {'first': 1})
+
+    def test_reset_counters(self):
+        increment('first')
+        reset_counters()
+
+        self.assertEqual(get_counters(), {})
@@ -0,0 +1,153 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from time import sleep
+from unittest.mock import patch
+
+from werkzeug.exceptions import NotFound
+
+from app.instrumentation import get_counters, reset_counters
+from app.storage import executor
+from app.utilities.schema import get_schema_file_path, load_schema_from_params, load_schema_from_url, preload_schemas
+from app.utilities.schema_cache import url_schema_cache
+from tests.app.app_context_test_case import AppContextTestCase
+
+
+class TestPreloadSchemas(AppContextTestCase):
+
+    def setUp(self):
+        super().setUp()
+        reset_counters()
+
+    def test_preloaded_schemas_are_not_loaded_again(self):
+        self._app.config['EQ_SCHEMA_PRELOAD'] = 'test_language'
+        preload_schemas(self._app)
+
+        with patch('app.utilities.schema._load_schema_file') as load_schema_file:
+            load_schema_from_params('test', 'language')
+            load_schema_from_params('test', 'language', 'en')
+            load_schema_from_params('test', 'language', 'cy')
+
+        self.assertFalse(load_schema_file.called)
+        self.assertEqual(get_counters()['schemas_preloaded'], 2)
+
+    def test_preloaded_schema_is_translated(self):
+        self._app.config['EQ_SCHEMA_PRELOAD'] = 'test_language'
+        preload_schemas(self._app)
+
+        english_schema = load_schema_from_params('test', 'language', 'en')
+        welsh_schema = load_schema_from_params('test', 'language', 'cy')
+
+        self.assertNotEqual(english_schema.error_messages['MANDATORY_QUESTION'], welsh_schema.error_messages['MANDATORY_QUESTION'])
+
+    def test_lazily_parsed_schema_is_parsed_in_full_when_preloaded(self):
+        self._app.config['EQ_SCHEMA_PRELOAD'] = 'test_language'
+        self._app.config['EQ_SCHEMA_LAZY_PARSING'] = True
+        preload_schemas(self._app)
+
+        schema = load_schema_from_params('test', 'language')
+
+        self.assertIsNotNone(schema._routing_dependencies)  # pylint: disable=protected-access
+
+    def test_schema_which_cannot_be_loaded_is_not_preloaded(self):
+        self._app.config['EQ_SCHEMA_PRELOAD'] = 'test_language'
+
+        with patch('app.utilities.schema._load_schema_file', side_effect=ValueError):
+            preload_schemas(self._app)
+
+        self.assertEqual(get_counters()['schemas_preloaded'], 0)
+
+
+class _SchemaRegisterHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in for the schema register, serving test_textarea with an ETag
+    """
+    etag = '"1"'
+    requests = []
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.requests.append((self.path, self.headers.get('If-None-Match')))
+        # Slow enough that requests made together overlap
+        sleep(0.1)
+
+        if not self.path.startswith('/my-test-schema?'):
+            self.send_response(404)
+            self.end_headers()
+        elif self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+        else:
+            with open(get_schema_file_path('test_textarea.json', 'en'), 'rb') as schema_file:
+                body = schema_file.read()
+
+            self.send_response(200)
+            self.send_header('ETag', self.etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class TestLoadSchemaFromUrl(AppContextTestCase):
+
+    def setUp(self):
+        super().setUp()
+        reset_counters()
+        _SchemaRegisterHandler.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _SchemaRegisterHandler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.survey_url = 'http://127.0.0.1:{}/my-test-schema'.format(self.server.server_port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def test_load_schema_from_url(self):
+        schema = load_schema_from_url(self.survey_url, 'en')
+
+        self.assertEqual(schema.language_code, 'en')
+        self.assertIs(load_schema_from_url(self.survey_url, None), schema)
+        self.assertEqual(_SchemaRegisterHandler.requests, [('/my-test-schema?language=en', None)])
+
+    def test_schema_not_found(self):
+        with self.assertRaises(NotFound):
+            load_schema_from_url(self.survey_url + '-not-found', 'en')
+
+    def test_concurrent_loads_make_one_request(self):
+        schemas = []
+
+        def load():
+            with self._app.test_request_context():
+                schemas.append(load_schema_from_url(self.survey_url, 'en'))
+
+        threads = [Thread(target=load) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(schemas), 5)
+        self.assertTrue(all(schema is schemas[0] for schema in schemas))
+        self.assertEqual(len(_SchemaRegisterHandler.requests), 1)
+
+    def test_expired_schema_is_revalidated(self):
+        with patch.object(url_schema_cache, '_ttl', 0), patch.object(url_schema_cache, '_stale_seconds', 0):
+            schema = load_schema_from_url(self.survey_url, 'en')
+            self.assertIs(load_schema_from_url(self.survey_url, 'en'), schema)
+
+        self.assertEqual(_SchemaRegisterHandler.requests, [('/my-test-schema?language=en', None),
+                                                           ('/my-test-schema?language=en', '"1"')])
+        self.assertEqual(get_counters()['url_schema_cache_not_modified'], 1)
+
+    def test_stale_schema_is_reloaded_in_background(self):
+        with patch.object(url_schema_cache, '_ttl', 0):
+            schema = load_schema_from_url(self.survey_url, 'en')
+
+            self.assertIs(load_schema_from_url(self.survey_url, 'en'), schema)
+            executor.shutdown()
+
+        self.assertEqual(len(_SchemaRegisterHandler.requests), 2)
+        self.assertEqual(get_counters()['url_schema_cache_stale'], 1)
+        self.assertEqual(get_counters()['url_schema_cache_not_modified'], 1)
@@ -0,0 +1,131 @@
+import unittest
+from threading import Event, Thread
+from unittest.mock import Mock, patch
+
+from app.instrumentation import get_counters, reset_counters
+from app.utilities.schema_cache import SchemaCache
+
+
+class TestSchemaCache(unittest.TestCase):
+
+    def setUp(self):
+        reset_counters()
+        self.cache = SchemaCache('schema_cache', max_bytes=1000)
+
+    def test_get_cached_schema(self):
+        schema = object()
+        load = Mock(return_value=(schema, 100, None))
+
+        self.assertIs(self.cache.get_or_load('key', load), schema)
+        self.assertIs(self.cache.get_or_load('key', load), schema)
+
+        load.assert_called_once_with(None)
+        counters = get_counters()
+        self.assertEqual(counters['schema_cache_miss'], 1)
+        self.assertEqual(counters['schema_cache_hit'], 1)
+        self.assertIn('schema_cache_load_ms', counters)
+
+    def test_least_recently_used_schema_is_evicted(self):
+        self.cache.get_or_load('first', Mock(return_value=('first', 400, None)))
+        self.cache.get_or_load('second', Mock(return_value=('second', 400, None)))
+        self.cache.get_or_load('first', Mock())
+        self.cache.get_or_load('third', Mock(return_value=('third', 400, None)))
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.size, 800)
+        self.assertEqual(get_counters()['schema_cache_evicted'], 1)
+
+        load = Mock(return_value=('second', 400, None))
+        self.cache.get_or_load('second', load)
+        load.assert_called_once()
+
+    def test_schema_larger_than_cache_is_not_cached(self):
+        self.assertEqual(self.cache.get_or_load('key', Mock(return_value=('schema', 2000, None))), 'schema')
+        self.assertEqual(len(self.cache), 0)
+
+    def test_schema_expires(self):
+        cache = SchemaCache('url_schema_cache', max_bytes=1000, ttl=60)
+
+        with patch('app.utilities.schema_cache.monotonic', return_value=0):
+            cache.get_or_load('key', Mock(return_value=('schema', 100, {'ETag': '"1"'})))
+
+        load = Mock(return_value=('new schema', 100, {'ETag': '"2"'}))
+        with patch('app.utilities.schema_cache.monotonic', return_value=61):
+            self.assertEqual(cache.get_or_load('key', load), 'new schema')
+
+        load.assert_called_once_with({'ETag': '"1"'})
+        self.assertEqual(get_counters()['url_schema_cache_expired'], 1)
+        self.assertEqual(cache.size, 100)
+
+    def test_expired_schema_not_modified_is_kept(self):
+        cache = SchemaCache('url_schema_cache', max_bytes=1000, ttl=60)
+
+        with patch('app.utilities.schema_cache.monotonic', return_value=0):
+            cache.get_or_load('key', Mock(return_value=('schema', 100, {'ETag': '"1"'})))
+
+        with patch('app.utilities.schema_cache.monotonic', return_value=61):
+            self.assertEqual(cache.get_or_load('key', Mock(return_value=(None, None, {'ETag': '"1"'}))), 'schema')
+
+        with patch('app.utilities.schema_cache.monotonic', return_value=62):
+            self.assertEqual(cache.get_or_load('key', Mock()), 'schema')
+
+        self.assertEqual(get_counters()['url_schema_cache_not_modified'], 1)
+
+    def test_stale_schema_is_used_while_it_is_reloaded(self):
+        cache = SchemaCache('url_schema_cache', max_bytes=1000, ttl=60, stale_seconds=60)
+
+        with patch('app.utilities.schema_cache.monotonic', return_value=0):
+            cache.get_or_load('key', Mock(return_value=('schema', 100, None)))
+
+        load = Mock(return_value=('new schema', 100, None))
+        with patch('app.utilities.schema_cache.monotonic', return_value=61), \
+                patch('app.utilities.schema_cache.executor.submit', side_effect=lambda fn, *args: fn(*args)) as submit:
+            self.assertEqual(cache.get_or_load('key', load), 'schema')
+
+        submit.assert_called_once()
+        self.assertEqual(get_counters()['url_schema_cache_stale'], 1)
+        with patch('app.utilities.schema_cache.monotonic', return_value=62):
+            self.assertEqual(cache.get_or_load('key', Mock()), 'new schema')
+
+    def test_concurrent_requests_wait_for_one_load(self):
+        loading = Event()
+        loaded = Event()
+
+        def load(_):
+            loading.set()
+            loaded.wait(5)
+            return 'schema', 100, None
+
+        first = Thread(target=self.cache.get_or_load, args=('key', load))
+        first.start()
+        loading.wait(5)
+
+        second_load = Mock()
+        results = []
+        second = Thread(target=lambda: results.append(self.cache.get_or_load('key', second_load)))
+        second.start()
+
+        loaded.set()
+        first.join(5)
+        second.join(5)
+
+        self.assertEqual(results, ['schema'])
+        self.assertFalse(second_load.called)
+
+    def test_failed_load_is_raised_to_waiting_requests(self):
+        self.cache._loading['key'] = Mock()  # pylint: disable=protected-access
+
+        with self.assertRaises(ValueError):
+            self.cache._load('key', Mock(side_effect=ValueError), None)  # pylint: disable=protected-access
+
+        self.assertNotIn('key', self.cache._loading)  # pylint: disable=protected-access
+
+    def test_disabled_cache_always_loads(self):
+        cache = SchemaCache('schema_cache', max_bytes=0)
+        load = Mock(return_value=('schema', 100, None))
+
+        cache.get_or_load('key', load)
+        cache.get_or_load('key', load)
+
+        self.assertEqual(load.call_count, 2)
+        self.assertEqual(get_counters(), {})
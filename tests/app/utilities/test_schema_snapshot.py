@@ -0,0 +1,68 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from app.data_model.answer_store import AnswerStore
+from app.questionnaire.location import Location
+from app.utilities import schema_snapshot
+from app.utilities.schema import load_schema_from_params
+from app.views.questionnaire import _evaluate_skip_conditions
+from scripts.build_schema_snapshot import build_schemas
+from tests.app.app_context_test_case import AppContextTestCase
+
+
+class TestSchemaSnapshot(AppContextTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.snapshot_file = tempfile.NamedTemporaryFile(suffix='.snapshot', delete=False).name
+        schemas = build_schemas(['en', 'cy'])
+        schema_snapshot.write_snapshot(self.snapshot_file, {key: schema for key, schema in schemas.items()
+                                                            if key[0] in ('test_language', 'test_skip_condition_block',
+                                                                          'test_skip_condition_question')})
+
+    def tearDown(self):
+        schema_snapshot.clear()
+        os.remove(self.snapshot_file)
+        super().tearDown()
+
+    def test_schema_loaded_from_snapshot(self):
+        schema_snapshot.load_snapshot(self.snapshot_file)
+
+        with patch('app.utilities.schema._load_schema_file') as load_schema_file:
+            english_schema = load_schema_from_params('test', 'language')
+            welsh_schema = load_schema_from_params('test', 'language', 'cy')
+
+        self.assertFalse(load_schema_file.called)
+        self.assertEqual(english_schema.language_code, 'en')
+        self.assertEqual(welsh_schema.error_messages['MANDATORY_QUESTION'], 'Nodwch ateb i barhau.')
+        self.assertIs(load_schema_from_params('test', 'language'), english_schema)
+
+    def test_snapshot_schema_evaluates_when_rules(self):
+        schema_snapshot.load_snapshot(self.snapshot_file)
+        schema = load_schema_from_params('test', 'skip_condition_block')
+
+        self.assertTrue(schema._when_rules_evaluators)  # pylint: disable=protected-access
+
+    def test_snapshot_schema_is_not_changed_by_skip_conditions(self):
+        schema_snapshot.load_snapshot(self.snapshot_file)
+        schema = load_schema_from_params('test', 'skip_condition_question')
+        block = schema.get_block('should-skip')
+
+        block_json = _evaluate_skip_conditions(block, Location('do-you-want-to-skip-group', 0, 'should-skip'), schema,
+                                               AnswerStore(), {'user_id': 'Skip'})
+
+        self.assertTrue(block_json['questions'][1]['skipped'])
+        self.assertNotIn('skipped', block['questions'][1])
+        self.assertTrue(block['questions'][1]['answers'][0]['mandatory'])
+
+    def test_schema_not_in_snapshot_is_loaded_from_file(self):
+        schema_snapshot.load_snapshot(self.snapshot_file)
+
+        self.assertEqual(load_schema_from_params('test', 'checkbox').json['title'], 'Other input fields')
+
+    def test_snapshot_of_unsupported_format_is_not_loaded(self):
+        with patch('app.utilities.schema_snapshot.SNAPSHOT_FORMAT_VERSION', 0):
+            schema_snapshot.load_snapshot(self.snapshot_file)
+
+        self.assertIsNone(schema_snapshot.get_schema('test_language', 'en'))
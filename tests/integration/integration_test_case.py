@@ -13,6 +13,7 @@ from sdc.crypto.key_store import KeyStore
 
 from app.keys import KEY_PURPOSE_AUTHENTICATION, KEY_PURPOSE_SUBMISSION
 from app.setup import create_app
+from app.utilities.schema_cache import local_schema_cache, url_schema_cache
 from tests.app.app_context_test_case import setup_tables
 
 from tests.integration.create_token import TokenGenerator
@@ -49,6 +50,9 @@ class IntegrationTestCase(unittest.TestCase):  # pylint: disable=too-many-public
         self._ddb = mock_dynamodb2()
         self._ddb.start()
 
+        local_schema_cache.clear()
+        url_schema_cache.clear()
+
         from application import configure_logging
         configure_logging()
 
@@ -0,0 +1,22 @@
+from tests.integration.integration_test_case import IntegrationTestCase
+
+
+class TestQuestionnaireQuestionSkipConditions(IntegrationTestCase):
+
+    def test_skipped_question_stays_mandatory_for_other_users(self):
+        # Given a user whose answers skip the second question
+        self.launchSurvey('test', 'skip_condition_question', ru_ref='123456789012A')
+        self.post({'do-you-want-to-skip-first-answer': 'Yes', 'do-you-want-to-skip-second-answer': 'No'})
+        self.assertNotInBody('Was I skipped?')
+        self.post({'skipped-answer-one': 'Yes'})
+        self.assertInUrl('summary')
+
+        # When another user, whose answers do not skip it, submits the same block without answering it
+        self.launchSurvey('test', 'skip_condition_question', ru_ref='210987654321A')
+        self.post({'do-you-want-to-skip-first-answer': 'No', 'do-you-want-to-skip-second-answer': 'No'})
+        self.assertInBody('Was I skipped?')
+        self.post({'skipped-answer-one': 'Yes'})
+
+        # Then the question is still mandatory for them
+        self.assertInUrl('should-skip')
+        self.assertInBody('Select an answer to continue')
@@ -182,6 +182,18 @@ class TestCreateApp(unittest.TestCase):
                 versioned_url_for('static', filename='some.js')
             )
 
+    def test_questionnaire_state_deltas_require_delta_table(self):
+        self._setting_overrides.update({
+            'EQ_QUESTIONNAIRE_STATE_DELTAS_BEFORE_COMPACTION': 5,
+            'EQ_QUESTIONNAIRE_STATE_DYNAMO_WRITE': True,
+            'EQ_QUESTIONNAIRE_STATE_DELTA_TABLE_NAME': None,
+        })
+
+        with self.assertRaises(Exception) as e:
+            create_app(self._setting_overrides)
+
+        self.assertIn('EQ_QUESTIONNAIRE_STATE_DELTA_TABLE_NAME', str(e.exception))
+
     def test_adds_rabbit_submitter_to_the_application(self):
         self._setting_overrides['EQ_RABBITMQ_ENABLED'] = True
         application = create_app(self._setting_overrides)
@@ -1,18 +1,19 @@
-from app.setup import cache
+from app.instrumentation import get_counters, reset_counters
+from app.utilities.schema_cache import local_schema_cache
 from tests.integration.integration_test_case import IntegrationTestCase
 
 
 class TestApplicationVariables(IntegrationTestCase):
 
     def test_schema_is_cached(self):
-        cache.init_app(self._application, config={'CACHE_TYPE': 'simple'})
-        with self._application.app_context():
-            self.assertEqual(len(cache.cache._cache), 0)  # pylint: disable=protected-access
+        reset_counters()
+        self.assertEqual(len(local_schema_cache), 0)
 
-            self.launchSurvey('0', 'star_wars')
-            self.assertStatusOK()
-            self.assertNotEqual(cache.get('app.utilities.schema.load_schema_from_params_memver'), None)
+        self.launchSurvey('0', 'star_wars')
+        self.assertStatusOK()
+        self.assertEqual(len(local_schema_cache), 1)
 
-            self.launchSurvey('0', 'star_wars')
-            self.assertStatusOK()
-            self.assertNotEqual(cache.get('app.utilities.schema.load_schema_from_params_memver'), None)
+        self.launchSurvey('0', 'star_wars')
+        self.assertStatusOK()
+        self.assertEqual(len(local_schema_cache), 1)
+        self.assertEqual(get_counters()['schema_cache_miss'], 1)
@@ -2,6 +2,7 @@ from flask_caching.backends.null import NullCache
 
 from app import settings
 from app.setup import cache
+from app.utilities.schema_cache import local_schema_cache
 from tests.integration.integration_test_case import IntegrationTestCase
 
 
@@ -18,3 +19,8 @@ class TestApplicationVariables(IntegrationTestCase):
     def test_schema_is_cached(self):
         with self._application.app_context():
             self.assertTrue(isinstance(cache.cache, NullCache))
+
+    def test_schema_is_not_cached(self):
+        self.launchSurvey('0', 'star_wars')
+        self.assertStatusOK()
+        self.assertEqual(len(local_schema_cache), 0)
@@ -13,7 +13,8 @@ class TestCookie(IntegrationTestCase):
         self.assertIsNotNone(cookie.get('survey_title'))
         self.assertIsNotNone(cookie.get('theme'))
         self.assertIsNotNone(cookie.get('user_ik'))
-        self.assertEqual(len(cookie), 7)
+        self.assertIsNotNone(cookie.get('encrypted_user_id'))
+        self.assertEqual(len(cookie), 8)
 
         self.assertIsNone(cookie.get('user_id'))
         self.assertIsNone(cookie.get('_permanent'))
@@ -7,3 +7,4 @@ class TestStatus(IntegrationTestCase):
         self.get('/status')
         self.assertStatusOK()
         self.assertTrue('version' in self.getResponseData())
+        self.assertTrue('counters' in self.getResponseData())